@@ -1,7 +1,11 @@
+import atexit
 import logging
+import logging.handlers
 from functools import wraps
 import os
+import queue
 import shutil
+import threading
 
 log_path = "Logger/log_status"
 if os.path.exists(log_path):
@@ -15,15 +19,84 @@ else:
 
 os.makedirs(log_path, exist_ok=True)
 
+# Профили журналирования: debug - уровни из декораторов, production - только
+# предупреждения и ошибки. Профиль по умолчанию задается переменной окружения
+PROFILE_DEBUG = "debug"
+PROFILE_PRODUCTION = "production"
+PROFILE_LEVELS = {PROFILE_DEBUG: None, PROFILE_PRODUCTION: logging.WARNING}
+
+_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler без форматирования в вызывающем потоке
+
+    Стандартный prepare подставляет args в сообщение до постановки в очередь;
+    здесь запись уходит как есть, а строка собирается в потоке записи
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class _FileRouter(logging.Handler):
+    """Раскладка записей по файлам Logger/log_status/<имя логгера>.log"""
+
+    def __init__(self):
+        super().__init__()
+        self.formatter = logging.Formatter(_FORMAT)
+        self.files = {}
+
+    def emit(self, record):
+        handler = self.files.get(record.name)
+        if handler is None:
+            handler = logging.FileHandler(f"{log_path}/{record.name}.log", encoding='utf-8')
+            handler.setFormatter(self.formatter)
+            self.files[record.name] = handler
+        handler.handle(record)
+
+    def close(self):
+        for handler in self.files.values():
+            handler.close()
+        super().close()
+
+
+_queue = queue.SimpleQueue()
+_queue_handler = _LazyQueueHandler(_queue)
+_listener = logging.handlers.QueueListener(_queue, _FileRouter())
+_listener.start()
+atexit.register(_listener.stop)
+
+_levels = {}
+_lock = threading.Lock()
+_profile = os.environ.get("MODBUS_LOG_PROFILE", PROFILE_DEBUG)
+
+
+def _effective_level(level):
+    profile_level = PROFILE_LEVELS.get(_profile)
+    return level if profile_level is None else max(level, profile_level)
+
+
+def set_profile(profile):
+    """Переключение профиля для всех созданных логгеров"""
+    global _profile
+    if profile not in PROFILE_LEVELS:
+        raise ValueError(f"Неизвестный профиль журналирования: {profile}")
+
+    with _lock:
+        _profile = profile
+        for logger_name, level in _levels.items():
+            logging.getLogger(logger_name).setLevel(_effective_level(level))
+
+
 def setup_logger(logger_name, level):
     log = logging.getLogger(logger_name)
 
-    if not log.handlers:
-        file_handler = logging.FileHandler(f"Logger/log_status/{logger_name}.log", encoding='utf-8')
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(formatter)
-        log.addHandler(file_handler)
-        log.setLevel(level)
+    with _lock:
+        if logger_name not in _levels:
+            _levels[logger_name] = level
+            log.addHandler(_queue_handler)
+            log.setLevel(_effective_level(level))
     return log
 
 def logged(cls=None, *, name="", level=logging.INFO):
@@ -37,20 +110,23 @@ def logged(cls=None, *, name="", level=logging.INFO):
 
 def log_function_call(name="", level=logging.DEBUG):
     def decorator(func):
+        log = setup_logger(name or f"app.{func.__module__}.{func.__name__}", level)
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            logger_name = name or f"app.{func.__module__}.{func.__name__}"
-            log = setup_logger(logger_name, level)
-
-            log.log(level, f"Вызов функции {func.__name__} с args: {args}, kwargs: {kwargs}")
+            # При отключенном уровне аргументы и результат не форматируются вовсе
+            enabled = log.isEnabledFor(level)
+            if enabled:
+                log.log(level, "Вызов функции %s с args: %s, kwargs: %s", func.__name__, args, kwargs)
             try:
                 result = func(*args, **kwargs)
-                log.log(level, f"Функция {func.__name__} завершена успешно. Результат: {result}")
-                return result
             except Exception as e:
-                log.exception(f"Ошибка в функции {func.__name__}: {e}")
+                log.exception("Ошибка в функции %s: %s", func.__name__, e)
                 raise
+            if enabled:
+                log.log(level, "Функция %s завершена успешно. Результат: %s", func.__name__, result)
+            return result
 
         return wrapper
 
-    return decorator
\ No newline at end of file
+    return decorator
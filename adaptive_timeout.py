@@ -0,0 +1,101 @@
+import threading
+from typing import Dict, Optional
+
+# Таймаут до первого измерения, секунды
+DEFAULT_TIMEOUT = 1.0
+
+# Границы вычисленного таймаута, секунды
+DEFAULT_TIMEOUT_FLOOR = 0.02
+DEFAULT_TIMEOUT_CEILING = 3.0
+
+# Коэффициенты сглаживания RTT и множитель разброса (как RTO в TCP, RFC 6298)
+RTT_ALPHA = 0.125
+RTT_BETA = 0.25
+RTT_K = 4
+
+# Минимальный запас на разброс, секунды
+RTT_GRANULARITY = 0.005
+
+# Предельный множитель таймаута после потерь подряд
+MAX_BACKOFF = 8
+
+
+class RttEstimator:
+    """Сглаженное время ответа одного устройства и его разброс"""
+    __slots__ = ("srtt", "rttvar", "backoff", "samples")
+
+    def __init__(self):
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.backoff = 1
+        self.samples = 0
+
+    def observe(self, rtt: float) -> None:
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - RTT_BETA) * self.rttvar + RTT_BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - RTT_ALPHA) * self.srtt + RTT_ALPHA * rtt
+        self.backoff = 1
+        self.samples += 1
+
+    def on_timeout(self) -> None:
+        """Потеря ответа: таймаут удваивается до следующего успешного ответа"""
+        self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+
+    def rto(self) -> Optional[float]:
+        if self.srtt is None:
+            return None
+        return (self.srtt + max(RTT_GRANULARITY, RTT_K * self.rttvar)) * self.backoff
+
+
+class AdaptiveTimeout:
+    """Таймауты запросов по измеренному времени ответа каждого устройства
+
+    Измеряется время реакции устройства: wire_time (передача кадров по
+    линии) вычитается из измерения и добавляется к таймауту конкретного
+    запроса, поэтому длинные чтения на медленной шине не выглядят
+    медленным устройством. До первого ответа действует initial
+    """
+
+    def __init__(self, initial: float = DEFAULT_TIMEOUT, floor: float = DEFAULT_TIMEOUT_FLOOR,
+                 ceiling: float = DEFAULT_TIMEOUT_CEILING):
+        if not 0 < floor <= ceiling:
+            raise ValueError(f"Нужно 0 < floor <= ceiling, получено: {floor}, {ceiling}")
+        if initial <= 0:
+            raise ValueError(f"initial должен быть положительным, получено: {initial}")
+
+        self.initial = initial
+        self.floor = floor
+        self.ceiling = ceiling
+        self._estimators: Dict[int, RttEstimator] = {}
+        self._lock = threading.Lock()
+
+    def _estimator(self, slave_id: int) -> RttEstimator:
+        estimator = self._estimators.get(slave_id)
+        if estimator is None:
+            with self._lock:
+                estimator = self._estimators.setdefault(slave_id, RttEstimator())
+        return estimator
+
+    def timeout(self, slave_id: int, wire_time: float = 0.0) -> float:
+        """Таймаут очередного запроса к устройству"""
+        estimator = self._estimators.get(slave_id)
+        rto = estimator.rto() if estimator is not None else None
+        if rto is None:
+            # До первого ответа таймаут не меньше initial, но учитывает потери подряд
+            rto = self.initial * (estimator.backoff if estimator is not None else 1)
+        return min(self.ceiling, max(self.floor, rto + wire_time))
+
+    def observe(self, slave_id: int, elapsed: float, wire_time: float = 0.0) -> None:
+        """Учет полученного ответа (в том числе с кодом исключения)"""
+        self._estimator(slave_id).observe(max(0.0, elapsed - wire_time))
+
+    def on_timeout(self, slave_id: int) -> None:
+        self._estimator(slave_id).on_timeout()
+
+    def snapshot(self) -> Dict[int, Dict[str, Optional[float]]]:
+        return {slave_id: {"srtt": estimator.srtt, "rttvar": estimator.rttvar, "backoff": estimator.backoff,
+                           "samples": estimator.samples, "timeout": self.timeout(slave_id)}
+                for slave_id, estimator in list(self._estimators.items())}
@@ -0,0 +1,228 @@
+from abc import ABC, abstractmethod
+from base import ModbusBaseClient
+from link_health import LinkState, DEFAULT_HEARTBEAT_INTERVAL
+from adaptive_timeout import DEFAULT_TIMEOUT
+from line_timing import LineTiming
+from register_codec import decode_value
+from metrics import RTU_FRAME_OVERHEAD
+from pymodbus.client import AsyncModbusTcpClient, AsyncModbusSerialClient
+from pymodbus.exceptions import ModbusException
+from typing import List, Optional
+import logging
+import time
+from exceptions import ModbusExceptionResponse
+from Logger.logger import logged
+
+
+@logged(name="async_client", level=logging.DEBUG)
+class AsyncModbusClient(ModbusBaseClient, ABC):
+    """Асинхронный клиент Modbus
+
+    Повторяет семантику PyModbusClientTCP/PyModbusClientRTU поверх
+    асинхронных клиентов pymodbus: те же проверки, исключения, контроль
+    линии и адаптивные таймауты
+    """
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL):
+        super().__init__(heartbeat_interval, timeout)
+
+    @abstractmethod
+    def _create_client(self):
+        """Асинхронный клиент pymodbus для соединения"""
+
+    @abstractmethod
+    def _endpoint(self) -> str:
+        """Адрес соединения для метрик и сообщений"""
+
+    def _transport_open(self) -> bool:
+        return self.client is not None and self.client.connected
+
+    def is_connected(self) -> bool:
+        """Проверка соединения (без обмена по линии)"""
+        return self._transport_open() and self.link.state is not LinkState.DOWN
+
+    async def connect(self) -> None:
+        """Установка соединения"""
+        try:
+            self.log.debug(f"Установка соединения с {self._endpoint()}")
+
+            self.client = self._create_client()
+            if not await self.client.connect():
+                self.log.exception(f"Не удалось подключиться к {self._endpoint()}")
+                raise ModbusException(f"Не удалось подключиться к {self._endpoint()}")
+
+            self.link.reset()
+            self.log.debug(f"Успешное подключение к {self._endpoint()}")
+
+        except ModbusException as e:
+            self.log.exception(e)
+            raise
+        except Exception as e:
+            self.log.exception(f"Ошибка подключения: {e}")
+            raise ModbusException(f"Ошибка подключения: {e}") from e
+
+    async def _read_registers(self, slave_id: int, address: int, count: int = 2) -> Optional[List[int]]:
+        """Базовый метод чтения регистров"""
+        if not self._transport_open():
+            self.log.exception("Нет соединения")
+            raise ConnectionError("Нет соединения")
+
+        try:
+            valid_slave_id = self._validate_slave_id(slave_id)
+            valid_address = self._validate_address(address)
+
+            wire_time = self._wire_time(3, count)
+            started = time.perf_counter()
+            try:
+                with self._response_timeout(valid_slave_id, wire_time):
+                    result = await self.client.read_holding_registers(
+                        address=valid_address,
+                        count=count,
+                        device_id=valid_slave_id
+                    )
+            except Exception as e:
+                self.link.record_failure()
+                self._observe_rtt(valid_slave_id, started, wire_time, e)
+                self._record_metrics(valid_slave_id, 3, count, started, error=e)
+                raise
+            self.link.record_success(valid_slave_id)
+            self._observe_rtt(valid_slave_id, started, wire_time)
+            self._record_metrics(valid_slave_id, 3, count, started, result)
+
+            if result.isError():
+                self.log.exception(f"Ошибка чтения регистров: {result}")
+                raise ModbusExceptionResponse(getattr(result, "exception_code", None), f"Ошибка чтения регистров: {result}")
+
+            return result.registers
+
+        except (ValueError, ConnectionError, ModbusException) as e:
+            self.log.exception(e)
+            raise
+        except Exception as e:
+            self.log.exception(f"Ошибка чтения: {e}")
+            raise ModbusException(f"Ошибка чтения: {e}") from e
+
+    async def _write_registers(self, slave_id: int, address: int, registers: Optional[List[int]]) -> bool:
+        """Базовый метод записи регистров; True при успешной записи"""
+        if not self._transport_open():
+            self.log.exception("Нет соединения")
+            raise ConnectionError("Нет соединения")
+
+        try:
+            valid_slave_id = self._validate_slave_id(slave_id)
+            valid_address = self._validate_address(address)
+
+            wire_time = self._wire_time(16, len(registers))
+            started = time.perf_counter()
+            try:
+                with self._response_timeout(valid_slave_id, wire_time):
+                    result = await self.client.write_registers(
+                        address=valid_address,
+                        values=registers,
+                        device_id=valid_slave_id
+                    )
+            except Exception as e:
+                self.link.record_failure()
+                self._observe_rtt(valid_slave_id, started, wire_time, e)
+                self._record_metrics(valid_slave_id, 16, len(registers), started, error=e)
+                raise
+            self.link.record_success(valid_slave_id)
+            self._observe_rtt(valid_slave_id, started, wire_time)
+            self._record_metrics(valid_slave_id, 16, len(registers), started, result)
+
+            if result.isError():
+                self.log.exception(f"Ошибка записи регистров: {result}")
+                raise ModbusExceptionResponse(getattr(result, "exception_code", None), f"Ошибка записи регистров: {result}")
+            return True
+
+        except (ValueError, ConnectionError, ModbusException) as e:
+            self.log.exception(e)
+            raise
+        except Exception as e:
+            self.log.exception(f"Ошибка записи: {e}")
+            raise ModbusException(f"Ошибка записи: {e}") from e
+
+    async def read_int(self, slave_id: int, address: int, count: int = 1) -> int:
+        """Чтение целочисленного значения"""
+        registers = await self._read_registers(slave_id, address, count)
+
+        if registers is None:
+            self.log.exception("Данные с устройства не получены")
+            raise ValueError("Данные с устройства не получены")
+
+        return registers[0]
+
+    async def read_float(self, slave_id: int, address: int, count: int = 2) -> float:
+        """Чтение значения с плавающей точкой"""
+        registers = await self._read_registers(slave_id, address, count)
+
+        if registers is None:
+            self.log.exception("Данные с устройства не получены")
+            raise ValueError("Данные с устройства не получены")
+
+        return decode_value("FLOAT 32", registers, *self.data_order(slave_id))
+
+    async def disconnect(self) -> None:
+        """Закрытие соединения"""
+        try:
+            if self.client:
+                self.client.close()
+                self.log.debug(f"Соединение с {self._endpoint()} закрыто")
+        except Exception as e:
+            self.log.exception(f"Ошибка закрытия: {e}")
+            raise ModbusException(f"Ошибка закрытия: {e}") from e
+        finally:
+            self.client = None
+
+
+@logged(name="async_client", level=logging.DEBUG)
+class AsyncPyModbusClientTCP(AsyncModbusClient):
+    """Асинхронный клиент Modbus TCP"""
+
+    def __init__(self, host, port=502, timeout=DEFAULT_TIMEOUT, heartbeat_interval=DEFAULT_HEARTBEAT_INTERVAL):
+        super().__init__(timeout, heartbeat_interval)
+        self.host = host
+        self.port = port
+
+    def _create_client(self):
+        return AsyncModbusTcpClient(self.host, port=self.port, timeout=self.timeouts.initial, retries=0)
+
+    def _endpoint(self) -> str:
+        return f"{self.host}:{self.port}"
+
+
+@logged(name="async_client", level=logging.DEBUG)
+class AsyncPyModbusClientRTU(AsyncModbusClient):
+    """Асинхронный клиент Modbus RTU"""
+
+    frame_overhead = RTU_FRAME_OVERHEAD
+
+    def __init__(self, port="COM4", baudrate=9600, bytesize=8, parity='N', stopbits=1,
+                 timeout=DEFAULT_TIMEOUT, heartbeat_interval=DEFAULT_HEARTBEAT_INTERVAL):
+        super().__init__(timeout, heartbeat_interval)
+        self.port = port
+        self.baudrate = baudrate
+        self.bytesize = bytesize
+        self.parity = parity
+        self.stopbits = stopbits
+        self.timing = LineTiming(baudrate, bytesize, parity, stopbits)
+
+    def _create_client(self):
+        return AsyncModbusSerialClient(
+            self.port,
+            baudrate=self.baudrate,
+            bytesize=self.bytesize,
+            parity=self.parity,
+            stopbits=self.stopbits,
+            timeout=self.timeouts.initial,
+            retries=0
+        )
+
+    def _endpoint(self) -> str:
+        return self.port
+
+    def _wire_time(self, function_code: int, count: int) -> float:
+        return self.timing.wire_time(function_code, count)
+
+    def _serial_bus(self) -> Optional[str]:
+        return self.port
@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from async_client import AsyncPyModbusClientTCP, DEFAULT_TIMEOUT
+from connection_pool import ConnectionPool
+from readers.read_planner import ReadPlanner
+from register_codec import device_data_order, DEFAULT_WORD_ORDER, DEFAULT_BYTE_ORDER
+from circuit_breaker import DeviceBreakers, BreakerState
+from change_filter import ChangeFilter
+from exceptions import DeviceQuarantinedError
+from Logger.logger import logged
+
+
+class PollTarget:
+    """Устройство и список опрашиваемых полей (с конкретными адресами)"""
+    __slots__ = ("device", "fields")
+
+    def __init__(self, device: Dict[str, Any], fields: List[Dict[str, Any]]):
+        self.device = device
+        self.fields = fields
+
+    @property
+    def name(self) -> str:
+        return self.device.get("name", "Unknown")
+
+
+class _BusClient:
+    """Линия опроса последовательного порта поверх общего планировщика шины пула
+
+    Чтения ставятся в очередь шины с плановым приоритетом, поэтому запись и
+    диагностика через тот же пул обгоняют опрос, а порт открыт один раз
+    """
+
+    def __init__(self, pool: ConnectionPool, device: Dict[str, Any]):
+        self.pool = pool
+        self.device = device
+        self.bus = None
+        self._data_orders: Dict[int, Tuple[Optional[str], Optional[str]]] = {}
+
+    def is_connected(self) -> bool:
+        return self.bus is not None and self.bus.is_connected()
+
+    async def connect(self) -> None:
+        # Открытие порта блокирует - выполняется вне цикла событий
+        self.bus = await asyncio.get_running_loop().run_in_executor(None, self.pool.bus, self.device)
+
+    async def disconnect(self) -> None:
+        # Шиной владеет пул: линия опроса только перестает ее использовать
+        self.bus = None
+
+    async def _read_registers(self, slave_id: int, address: int, count: int = 2) -> Optional[List[int]]:
+        if self.bus is None:
+            raise ConnectionError(f"Шина {self.device['port']} не подключена")
+        return await asyncio.wrap_future(self.bus.submit_read(slave_id, address, count))
+
+    def set_data_order(self, slave_id: int, word_order: Optional[str] = DEFAULT_WORD_ORDER,
+                       byte_order: Optional[str] = DEFAULT_BYTE_ORDER) -> None:
+        self._data_orders[slave_id] = (word_order, byte_order)
+
+    def data_order(self, slave_id: int) -> Tuple[Optional[str], Optional[str]]:
+        return self._data_orders.get(slave_id, (DEFAULT_WORD_ORDER, DEFAULT_BYTE_ORDER))
+
+
+class _Lane:
+    """Независимая линия опроса: TCP-точка или последовательный порт"""
+
+    def __init__(self, key: Tuple[Any, ...], clients: List[Any]):
+        self.key = key
+        self.clients = clients
+        self.targets: List[PollTarget] = []
+        self.free: Optional[asyncio.Queue] = None
+
+
+@logged(name="async_poller", level=logging.DEBUG)
+class AsyncPollingEngine:
+    """Асинхронный опрос устройств
+
+    Все TCP-точки опрашиваются одновременно, каждый последовательный порт -
+    отдельная независимая линия. На TCP-точку открывается не более
+    tcp_connections соединений; последовательный порт опрашивается через
+    планировщик шины из pool, общий с остальными потребителями порта
+    """
+
+    def __init__(self, targets: List[PollTarget], tcp_connections: int = 1, timeout: float = DEFAULT_TIMEOUT,
+                 breakers: Optional[DeviceBreakers] = None, changes: Optional[ChangeFilter] = None,
+                 pool: Optional[ConnectionPool] = None):
+        self.log.info("=== Инициализация объекта AsyncPollingEngine ===")
+        if tcp_connections < 1:
+            raise ValueError(f"tcp_connections должен быть не меньше 1, получено: {tcp_connections}")
+
+        self.tcp_connections = tcp_connections
+        self.timeout = timeout
+        # Без общего пула шины принадлежат движку и останавливаются в close
+        self.pool = pool if pool is not None else ConnectionPool(timeout=timeout)
+        self._own_pool = pool is None
+        # Устройства в карантине пропускаются, их проверяет один пробный запрос
+        self.breakers = breakers
+        # При заданном фильтре в результат попадают только изменившиеся значения
+        self.changes = changes
+        self.planner = ReadPlanner(None)
+        self.lanes: Dict[Tuple[Any, ...], _Lane] = {}
+
+        for target in targets:
+            key = self.lane_key(target.device)
+            if key not in self.lanes:
+                self.lanes[key] = _Lane(key, self._create_clients(target.device))
+            self.lanes[key].targets.append(target)
+            for client in self.lanes[key].clients:
+                client.set_data_order(target.device["device_id"], *device_data_order(target.device))
+
+    @staticmethod
+    def lane_key(device: Dict[str, Any]) -> Tuple[Any, ...]:
+        """Линия опроса: TCP-точка или имя последовательного порта"""
+        if device["type"] == "tcp":
+            return ("tcp", device["ip"], device.get("port", 502))
+        if device["type"] == "rtu":
+            return ("rtu", device["port"])
+        raise ValueError(f"Неизвестный тип устройства: {device['type']}")
+
+    def _create_clients(self, device: Dict[str, Any]) -> List[Any]:
+        if device["type"] == "tcp":
+            return [AsyncPyModbusClientTCP(device["ip"], device.get("port", 502), timeout=self.timeout)
+                    for _ in range(self.tcp_connections)]
+        return [_BusClient(self.pool, device)]
+
+    async def poll_cycle(self) -> Dict[str, Any]:
+        """Один цикл опроса всех устройств
+
+        Результат: имя устройства -> {адрес: значение} или исключение
+        """
+        started = time.perf_counter()
+        lane_results = await asyncio.gather(*(self._poll_lane(lane) for lane in self.lanes.values()))
+
+        results: Dict[str, Any] = {}
+        for lane_result in lane_results:
+            results.update(lane_result)
+
+        self.log.debug("Цикл опроса: %s устройств за %.3f с", len(results), time.perf_counter() - started)
+        return results
+
+    async def run(self, interval: float = 1.0, cycles: Optional[int] = None,
+                  on_cycle: Optional[Callable[[Dict[str, Any]], None]] = None, profiler=None) -> None:
+        """Циклический опрос с заданным периодом
+
+        profiler - CycleProfiler, каждый цикл оборачивается в profiler.cycle()
+        """
+        done = 0
+        while cycles is None or done < cycles:
+            started = time.monotonic()
+            if profiler is None:
+                results = await self.poll_cycle()
+            else:
+                with profiler.cycle():
+                    results = await self.poll_cycle()
+            if on_cycle is not None:
+                on_cycle(results)
+
+            done += 1
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    async def close(self) -> None:
+        """Закрытие всех соединений"""
+        for lane in self.lanes.values():
+            for client in lane.clients:
+                await client.disconnect()
+        if self._own_pool:
+            await asyncio.get_running_loop().run_in_executor(None, self.pool.close_all)
+
+    async def _poll_lane(self, lane: _Lane) -> Dict[str, Any]:
+        if lane.free is None:
+            lane.free = asyncio.Queue()
+            for client in lane.clients:
+                lane.free.put_nowait(client)
+
+        results = await asyncio.gather(*(self._poll_target(lane, target) for target in lane.targets))
+        return dict(zip((target.name for target in lane.targets), results))
+
+    async def _poll_target(self, lane: _Lane, target: PollTarget) -> Any:
+        state = BreakerState.CLOSED if self.breakers is None else self.breakers.check(target.name)
+        if state is BreakerState.OPEN:
+            return DeviceQuarantinedError(f"{target.name} в карантине, проверка через "
+                                          f"{self.breakers.retry_in(target.name):.1f} с")
+
+        client = await lane.free.get()
+        try:
+            if not client.is_connected():
+                await client.disconnect()
+                await client.connect()
+
+            spans = self.planner.plan(target.fields)
+            if state is BreakerState.HALF_OPEN:
+                # Пробный запрос: один регистр вместо полного опроса
+                await client._read_registers(target.device["device_id"], spans[0].address, 1)
+                self.breakers.record_success(target.name)
+
+            # Все блоки читаются до фильтрации: состояние фильтра обновляется
+            # только по успешному опросу устройства целиком
+            blocks = [(span, await client._read_registers(target.device["device_id"], span.address, span.count))
+                      for span in spans]
+
+            values: Dict[int, Any] = {}
+            data_order = client.data_order(target.device["device_id"])
+            for span, registers in blocks:
+                if self.changes is None:
+                    values.update(self.planner.decode(span, registers, data_order))
+                else:
+                    values.update(self.changes.filter_block(
+                        target.name, span, registers, lambda: self.planner.decode(span, registers, data_order)))
+            if self.breakers is not None:
+                self.breakers.record_success(target.name)
+            return values
+
+        except Exception as e:
+            # Соединение переоткрывается, когда контроль линии переведет его в down
+            self.log.warning(f"Ошибка опроса {target.name} на линии {lane.key}: {e}")
+            if self.breakers is not None:
+                self.breakers.record_failure(target.name)
+            return e
+        finally:
+            lane.free.put_nowait(client)
@@ -1,6 +1,15 @@
-from pymodbus.exceptions import ModbusException
-from typing import Tuple, Optional, List, NewType
+from pymodbus.exceptions import ModbusException, ModbusIOException
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple, Optional, List, NewType
 import logging
+import time
+from link_health import LinkHealth, LinkState, DEFAULT_HEARTBEAT_INTERVAL
+from register_cache import RegisterCache, DEFAULT_TTL
+from adaptive_timeout import AdaptiveTimeout, DEFAULT_TIMEOUT, DEFAULT_TIMEOUT_FLOOR, DEFAULT_TIMEOUT_CEILING
+from register_codec import DEFAULT_WORD_ORDER, DEFAULT_BYTE_ORDER
+from metrics import REGISTRY, MetricsRegistry, TCP_FRAME_OVERHEAD, pdu_sizes, \
+    OUTCOME_OK, OUTCOME_EXCEPTION, OUTCOME_TIMEOUT, OUTCOME_ERROR
+from exceptions import ModbusExceptionResponse
 from Logger.logger import logged
 
 SlaveID = NewType('SlaveID', int)
@@ -9,8 +18,144 @@ ModbusAddress = NewType('ModbusAddress', int)
 @logged(name="base", level=logging.DEBUG)
 class ModbusBaseClient:
     """Базовый класс для Modbus клиентов"""
-    def __init__(self):
+
+    # Служебные байты кадра (учет трафика в метриках)
+    frame_overhead = TCP_FRAME_OVERHEAD
+
+    def __init__(self, heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL, timeout: float = DEFAULT_TIMEOUT,
+                 timeout_floor: float = DEFAULT_TIMEOUT_FLOOR, timeout_ceiling: float = DEFAULT_TIMEOUT_CEILING):
         self.log.info("=== Инициализация объекта ModbusBaseClient ===")
+        self.client = None
+        self.link = LinkHealth(heartbeat_interval)
+        # Таймаут каждого запроса - по сглаженному времени ответа устройства
+        self.timeouts = AdaptiveTimeout(timeout, timeout_floor, timeout_ceiling)
+        self.cache: Optional[RegisterCache] = None
+        # None отключает учет метрик
+        self.metrics: Optional[MetricsRegistry] = REGISTRY
+        self._data_orders: Dict[int, Tuple[str, str]] = {}
+
+    def _endpoint(self) -> str:
+        """Адрес соединения для метрик и сообщений"""
+        return "unknown"
+
+    def _serial_bus(self) -> Optional[str]:
+        """Последовательный порт, загрузка которого учитывается в метриках"""
+        return None
+
+    def _wire_time(self, function_code: int, count: int) -> float:
+        """Время передачи кадров запроса и ответа по линии"""
+        return 0.0
+
+    @contextmanager
+    def _response_timeout(self, slave_id: int, wire_time: float) -> Iterator[None]:
+        """Адаптивный таймаут ответа на время одной транзакции
+
+        pymodbus берет из comm_params.timeout_connect и таймаут подключения,
+        и таймаут ответа, поэтому после транзакции прежнее значение
+        восстанавливается. Транспорт без comm_params работает со своим таймаутом
+        """
+        comm_params = getattr(self.client, "comm_params", None)
+        if comm_params is None:
+            yield
+            return
+
+        previous = comm_params.timeout_connect
+        comm_params.timeout_connect = self.timeouts.timeout(slave_id, wire_time)
+        try:
+            yield
+        finally:
+            comm_params.timeout_connect = previous
+
+    def _observe_rtt(self, slave_id: int, started: float, wire_time: float, error: Optional[Exception] = None) -> None:
+        if error is None:
+            self.timeouts.observe(slave_id, time.perf_counter() - started, wire_time)
+        elif isinstance(error, ModbusIOException):
+            self.timeouts.on_timeout(slave_id)
+
+    def _record_metrics(self, slave_id: int, function_code: int, count: int, started: float,
+                        result=None, error: Optional[Exception] = None) -> None:
+        if self.metrics is None:
+            return
+
+        latency = time.perf_counter() - started
+        exception_code = None
+        if isinstance(error, ModbusExceptionResponse):
+            outcome = OUTCOME_EXCEPTION
+            exception_code = error.exception_code
+        elif error is not None:
+            outcome = OUTCOME_TIMEOUT if isinstance(error, ModbusIOException) else OUTCOME_ERROR
+        elif result is not None and result.isError():
+            outcome = OUTCOME_EXCEPTION
+            exception_code = getattr(result, "exception_code", None)
+        else:
+            outcome = OUTCOME_OK
+
+        request_pdu, response_pdu = pdu_sizes(function_code, count, outcome == OUTCOME_EXCEPTION)
+        received = 0 if error is not None else self.frame_overhead + response_pdu
+        self.metrics.observe(self._endpoint(), slave_id, function_code, latency, self.frame_overhead + request_pdu,
+                             received, outcome, exception_code, self._serial_bus())
+
+    def _record_shared_read(self, slave_id: int, waiters: int, elapsed: float) -> None:
+        if self.metrics is not None:
+            self.metrics.observe_shared(self._endpoint(), slave_id, waiters, waiters * elapsed)
+
+    def set_data_order(self, slave_id: int, word_order: Optional[str] = DEFAULT_WORD_ORDER,
+                       byte_order: Optional[str] = DEFAULT_BYTE_ORDER) -> None:
+        """Порядок слов и байт 32-битных значений устройства"""
+        self._data_orders[slave_id] = (word_order, byte_order)
+
+    def data_order(self, slave_id: int) -> Tuple[Optional[str], Optional[str]]:
+        return self._data_orders.get(slave_id, (DEFAULT_WORD_ORDER, DEFAULT_BYTE_ORDER))
+
+    def enable_cache(self, ttl: float = DEFAULT_TTL) -> RegisterCache:
+        """Включение кэша регистров настройки"""
+        if self.cache is None:
+            self.cache = RegisterCache(ttl)
+        return self.cache
+
+    def _transport_open(self) -> bool:
+        """Открыт ли сокет/порт (без обмена по линии)"""
+        if self.client is None:
+            return False
+
+        try:
+            return self.client.is_socket_open()
+        except Exception as e:
+            self.log.exception(e)
+            return False
+
+    def is_connected(self) -> bool:
+        """Проверка соединения
+
+        Состояние берется из результатов последних транзакций, явный запрос
+        отправляется только если линия простаивала дольше heartbeat_interval
+        """
+        self.log.debug("Проверка соединения")
+
+        if not self._transport_open():
+            return False
+
+        if self.link.needs_heartbeat():
+            self._heartbeat()
+
+        self.log.debug("Соединение: %s", self.link.state.value)
+        return self.link.state is not LinkState.DOWN
+
+    def _heartbeat(self) -> None:
+        """Явная проверка линии запросом к последнему ответившему устройству"""
+        slave_id = self.link.last_slave_id
+        if slave_id is None:
+            return
+
+        self.log.debug(f"Heartbeat: устройство {slave_id}")
+        try:
+            with self._response_timeout(slave_id, self._wire_time(3, 1)):
+                self.client.read_holding_registers(address=0, count=1, device_id=slave_id)
+            # Ответ с кодом исключения тоже подтверждает, что линия жива
+            self.link.record_success(slave_id)
+        except Exception as e:
+            self.log.debug(f"Heartbeat без ответа: {e}")
+            self.link.record_failure()
 
     def _validate_slave_id(self, slave_id: int) -> SlaveID:
         self.log.debug("Валидация slave_id")
@@ -28,11 +173,15 @@ class ModbusBaseClient:
         self.log.debug("_read_registers: успешно")
         return ModbusAddress(address)
 
-    def _read_registers(self, slave_id: int, address: int, count: int = 2) -> Tuple[Optional[List[int]]]:
-        """Базовый метод чтения регистров"""
+    def _read_registers(self, slave_id: int, address: int, count: int = 2, use_cache: bool = True) -> Tuple[Optional[List[int]]]:
+        """Базовый метод чтения регистров
+
+        При включенном кэше регистры настройки отдаются из памяти;
+        use_cache=False читает с устройства в обход кэша
+        """
         self.log.debug("Базовый метод чтения регистров")
 
-        if not self.is_connected():
+        if not self._transport_open():
             self.log.exception("Нет соединения")
             raise ConnectionError("Нет соединения")
 
@@ -40,18 +189,19 @@ class ModbusBaseClient:
             valid_slave_id = self._validate_slave_id(slave_id)
             valid_address = self._validate_address(address)
 
-            result = self.client.read_holding_registers(
-                address=valid_address,
-                count=count,
-                device_id=valid_slave_id
-            )
+            if self.cache is not None and use_cache:
+                cached = self.cache.get(valid_slave_id, valid_address, count)
+                if cached is not None:
+                    self.log.debug("_read_registers: из кэша")
+                    return cached
 
-            if result.isError():
-                self.log.exception(f"Ошибка чтения регистров: {result}")
-                raise ModbusException(f"Ошибка чтения регистров: {result}")
+            registers = self._fetch_registers(valid_slave_id, valid_address, count)
+
+            if self.cache is not None:
+                self.cache.put(valid_slave_id, valid_address, registers)
 
             self.log.debug("_read_registers: успешно")
-            return result.registers
+            return registers
 
         except (ValueError, ConnectionError, ModbusException) as e:
             self.log.exception(e)
@@ -60,11 +210,36 @@ class ModbusBaseClient:
             self.log.exception(f"Ошибка чтения: {e}")
             raise ModbusException(f"Ошибка чтения: {e}") from e
 
-    def _write_registers(self, slave_id: int, address: int, registers: Optional[List[int]]):
-        """Базовый метод записи регистров"""
+    def _fetch_registers(self, slave_id: SlaveID, address: ModbusAddress, count: int) -> List[int]:
+        """Транзакция чтения регистров по линии"""
+        wire_time = self._wire_time(3, count)
+        started = time.perf_counter()
+        try:
+            with self._response_timeout(slave_id, wire_time):
+                result = self.client.read_holding_registers(
+                    address=address,
+                    count=count,
+                    device_id=slave_id
+                )
+        except Exception as e:
+            self.link.record_failure()
+            self._observe_rtt(slave_id, started, wire_time, e)
+            self._record_metrics(slave_id, 3, count, started, error=e)
+            raise
+        self.link.record_success(slave_id)
+        self._observe_rtt(slave_id, started, wire_time)
+        self._record_metrics(slave_id, 3, count, started, result)
+
+        if result.isError():
+            self.log.exception(f"Ошибка чтения регистров: {result}")
+            raise ModbusExceptionResponse(getattr(result, "exception_code", None), f"Ошибка чтения регистров: {result}")
+        return result.registers
+
+    def _write_registers(self, slave_id: int, address: int, registers: Optional[List[int]]) -> bool:
+        """Базовый метод записи регистров; True при успешной записи"""
         self.log.debug("Базовый метод записи регистров")
 
-        if not self.is_connected():
+        if not self._transport_open():
             self.log.exception("Нет соединения")
             raise ConnectionError("Нет соединения")
 
@@ -72,17 +247,38 @@ class ModbusBaseClient:
             valid_slave_id = self._validate_slave_id(slave_id)
             valid_address = self._validate_address(address)
 
-            result = self.client.write_registers(
-                address=valid_address,
-                values=registers,
-                device_id=valid_slave_id
-            )
+            wire_time = self._wire_time(16, len(registers))
+            started = time.perf_counter()
+            try:
+                with self._response_timeout(valid_slave_id, wire_time):
+                    result = self.client.write_registers(
+                        address=valid_address,
+                        values=registers,
+                        device_id=valid_slave_id
+                    )
+            except Exception as e:
+                self.link.record_failure()
+                self._observe_rtt(valid_slave_id, started, wire_time, e)
+                self._record_metrics(valid_slave_id, 16, len(registers), started, error=e)
+                # Неизвестно, дошла ли запись до устройства
+                if self.cache is not None:
+                    self.cache.invalidate(valid_slave_id, valid_address, len(registers))
+                raise
+            self.link.record_success(valid_slave_id)
+            self._observe_rtt(valid_slave_id, started, wire_time)
+            self._record_metrics(valid_slave_id, 16, len(registers), started, result)
 
             if result.isError():
+                if self.cache is not None:
+                    self.cache.invalidate(valid_slave_id, valid_address, len(registers))
                 self.log.exception(f"Ошибка записи регистров: {result}")
-                raise ModbusException(f"Ошибка записи регистров: {result}")
+                raise ModbusExceptionResponse(getattr(result, "exception_code", None), f"Ошибка записи регистров: {result}")
+
+            if self.cache is not None:
+                self.cache.put(valid_slave_id, valid_address, registers)
 
             self.log.debug("_write_registers: успешно")
+            return True
 
         except (ValueError, ConnectionError, ModbusException) as e:
             self.log.exception(e)
@@ -0,0 +1,79 @@
+"""Накладные расходы журналирования на одно чтение регистров
+
+Запуск из корня репозитория: python -m benchmarks.logging_overhead [число чтений]
+
+Клиент PyModbusClientTCP работает поверх транспорта в памяти, поэтому
+измеряется только обвязка клиента: проверки, контроль линии, кэш и журнал
+"""
+import logging
+import sys
+import time
+from Logger import logger as log_module
+from tcp_client import PyModbusClientTCP
+
+
+class _Result:
+    registers = [0x0000, 0x4120]
+
+    def isError(self):
+        return False
+
+
+class _MemoryTransport:
+    def is_socket_open(self):
+        return True
+
+    def read_holding_registers(self, address, count, device_id):
+        return _Result()
+
+
+def _per_read(client, reads):
+    started = time.perf_counter()
+    for _ in range(reads):
+        client.read_float(1, 4000)
+    return (time.perf_counter() - started) / reads * 1e6
+
+
+def _sync_handlers():
+    """Синхронные FileHandler на каждом логгере - запись в файл в потоке опроса"""
+    replaced = []
+    for name in log_module._levels:
+        log = logging.getLogger(name)
+        handler = logging.FileHandler(f"{log_module.log_path}/{name}.sync.log", encoding='utf-8')
+        handler.setFormatter(logging.Formatter(log_module._FORMAT))
+        log.removeHandler(log_module._queue_handler)
+        log.addHandler(handler)
+        replaced.append((log, handler))
+    return replaced
+
+
+def main(reads=20000):
+    client = PyModbusClientTCP("benchmark")
+    client.client = _MemoryTransport()
+
+    results = {}
+    log_module.set_profile(log_module.PROFILE_DEBUG)
+    results["queue, debug"] = _per_read(client, reads)
+
+    log_module.set_profile(log_module.PROFILE_PRODUCTION)
+    results["queue, production"] = _per_read(client, reads)
+
+    log_module.set_profile(log_module.PROFILE_DEBUG)
+    replaced = _sync_handlers()
+    results["sync FileHandler, debug"] = _per_read(client, reads)
+    for log, handler in replaced:
+        log.removeHandler(handler)
+        handler.close()
+        log.addHandler(log_module._queue_handler)
+
+    logging.disable(logging.CRITICAL)
+    results["logging disabled"] = _per_read(client, reads)
+    logging.disable(logging.NOTSET)
+
+    print(f"\n read_float, {reads} чтений:")
+    for name, value in results.items():
+        print(f"  {name:<26} {value:8.2f} мкс/чтение")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
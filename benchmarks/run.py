@@ -0,0 +1,191 @@
+"""Бенчмарк пути опроса на локальных имитаторах устройств
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.run [--reads N] [--latency S] [--drop-rate P] [--output results.json]
+
+Результат - JSON: чтений в секунду и перцентили времени чтения для TCP и
+RTU, время и память полного цикла read_all_devices, скорость и потери
+потокового чтения динамометра
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+# Сообщения модулей проекта при импорте уходят в stderr: в stdout только JSON
+with contextlib.redirect_stdout(sys.stderr):
+    from benchmarks.simulators import Faults, TcpDeviceSimulator, RtuDeviceSimulator, MedLineEmitter
+    from config.register_map import MB210_101, TPM10, ACCESS_READ_ONLY
+    from readers.read_planner import ReadPlanner
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def at(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {"p50_ms": at(0.5), "p95_ms": at(0.95), "p99_ms": at(0.99), "max_ms": ordered[-1] * 1000}
+
+
+def measure_reads(read: Callable[[], Any], reads: int) -> Dict[str, Any]:
+    """reads вызовов read: вызовов в секунду, перцентили, число ошибок"""
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(reads):
+        t = time.perf_counter()
+        try:
+            read()
+            latencies.append(time.perf_counter() - t)
+        except Exception:
+            errors += 1
+    elapsed = time.perf_counter() - started
+    return {"reads": reads, "errors": errors, "seconds": elapsed,
+            "reads_per_second": reads / elapsed if elapsed else 0.0, **percentiles(latencies)}
+
+
+def bench_tcp(args, faults: Faults) -> Dict[str, Any]:
+    from tcp_client import PyModbusClientTCP
+
+    simulator = TcpDeviceSimulator(faults).start()
+    try:
+        client = PyModbusClientTCP(simulator.host, simulator.port)
+        client.connect()
+        planner = ReadPlanner(client)
+        fields = MB210_101.where(ACCESS_READ_ONLY)
+        results = {
+            "read_float": measure_reads(lambda: client.read_float(1, 4000), args.reads),
+            "planned_block": measure_reads(lambda: planner.read(1, fields), max(1, args.reads // 10)),
+        }
+        client.disconnect()
+        return results
+    finally:
+        simulator.stop()
+
+
+def bench_rtu(args, faults: Faults) -> Dict[str, Any]:
+    from rtu_client import PyModbusClientRTU
+
+    simulator = RtuDeviceSimulator(faults, baudrate=args.baudrate).start()
+    try:
+        client = PyModbusClientRTU(simulator.port, args.baudrate)
+        client.connect()
+        planner = ReadPlanner(client)
+        results = {
+            "read_float": measure_reads(lambda: client.read_float(2, 0), max(1, args.reads // 10)),
+            "planned_block": measure_reads(lambda: planner.read(2, TPM10.fields[0:3]), max(1, args.reads // 10)),
+        }
+        client.disconnect()
+        return results
+    finally:
+        simulator.stop()
+
+
+def bench_cycle(args, faults: Faults) -> Dict[str, Any]:
+    """Полный цикл read_all_devices на имитаторах TCP и RTU"""
+    try:
+        import modbusBridge
+    except (ImportError, SyntaxError) as e:
+        # modbusBridge использует msvcrt и синтаксис f-строк Python 3.12
+        return {"skipped": f"modbusBridge недоступен: {e}"}
+
+    tcp = TcpDeviceSimulator(faults).start()
+    rtu = RtuDeviceSimulator(faults, baudrate=args.baudrate).start()
+    saved = list(modbusBridge.devices)
+    modbusBridge.devices[:] = [
+        {"name": "AnalogInputModul_TCP_Room1", "ip": tcp.host, "port": tcp.port, "device_id": 1, "type": "tcp"},
+        {"name": "MeasureModuleMicroprocessor_RTU_Slave1", "port": rtu.port, "baudrate": args.baudrate,
+         "bytesize": 8, "parity": 'N', "stopbits": 1, "device_id": 2, "type": "rtu"},
+    ]
+    try:
+        durations = []
+        tracemalloc.start()
+        for _ in range(args.cycles):
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                modbusBridge.read_all_devices()
+            durations.append(time.perf_counter() - started)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {"cycles": args.cycles, **percentiles(durations),
+                "memory_current_kib": current / 1024, "memory_peak_kib": peak / 1024}
+    finally:
+        modbusBridge.devices[:] = saved
+        modbusBridge.pool.close_all()
+        tcp.stop()
+        rtu.stop()
+
+
+def bench_med(args, faults: Faults) -> Dict[str, Any]:
+    from med_stream import MedStreamReader
+
+    emitter = MedLineEmitter(args.med_rate).start()
+    reader = MedStreamReader(emitter.port, 115200)
+    try:
+        with reader:
+            received = 0
+            stop_at = time.perf_counter() + args.med_seconds
+            while time.perf_counter() < stop_at:
+                received += len(reader.drain(timeout=1))
+        return {"rate": args.med_rate, "seconds": args.med_seconds, "sent": emitter.sent,
+                "consumed": received, "samples_per_second": received / args.med_seconds, **reader.stats()}
+    finally:
+        emitter.stop()
+
+
+SCENARIOS = {"tcp": bench_tcp, "rtu": bench_rtu, "cycle": bench_cycle, "med": bench_med}
+
+
+def main(argv=None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Бенчмарк пути опроса на имитаторах устройств")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Список сценариев через запятую")
+    parser.add_argument("--reads", type=int, default=2000, help="Число чтений в сценарии tcp")
+    parser.add_argument("--cycles", type=int, default=5, help="Число циклов read_all_devices")
+    parser.add_argument("--baudrate", type=int, default=115200, help="Имитируемая скорость RTU")
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка ответа, с")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Разброс задержки, с")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Доля запросов без ответа")
+    parser.add_argument("--exception-rate", type=float, default=0.0, help="Доля ответов с кодом исключения")
+    parser.add_argument("--med-rate", type=float, default=500.0, help="Строк в секунду от динамометра")
+    parser.add_argument("--med-seconds", type=float, default=2.0, help="Длительность сценария med")
+    parser.add_argument("--output", help="Файл результатов JSON (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    faults = Faults(args.latency, args.jitter, args.drop_rate, args.exception_rate)
+    results: Dict[str, Any] = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {key: value for key, value in vars(args).items() if key != "output"},
+        "scenarios": {},
+    }
+    for name in args.scenarios.split(","):
+        name = name.strip()
+        if name not in SCENARIOS:
+            parser.error(f"Неизвестный сценарий: {name}")
+        try:
+            # Сообщения клиентов не смешиваются с JSON в stdout
+            with contextlib.redirect_stdout(sys.stderr):
+                results["scenarios"][name] = SCENARIOS[name](args, faults)
+        except Exception as e:
+            results["scenarios"][name] = {"error": f"{type(e).__name__}: {e}"}
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
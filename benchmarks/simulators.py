@@ -0,0 +1,321 @@
+"""Локальные имитаторы устройств для бенчмарков
+
+- Modbus TCP: сервер pymodbus с регистрами из карт MB210-101 и TPM10
+  за прокси, вносящим задержку и потерю запросов
+- Modbus RTU: ведомое устройство на псевдотерминале (pty)
+- НПО 'МЭД': генератор строк значений на псевдотерминале
+"""
+import asyncio
+import os
+import random
+import struct
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+from config.register_map import MB210_101, TPM10, RegisterMap
+from register_codec import encode_value
+
+# Тип датчика, при котором читатели считают канал подключенным
+SENSOR_TYPE = 8
+
+
+class Faults:
+    """Вносимые неисправности: задержка ответа и доли потерянных/ошибочных запросов"""
+    __slots__ = ("latency", "jitter", "drop_rate", "exception_rate")
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, drop_rate: float = 0.0, exception_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.exception_rate = exception_rate
+
+    def delay(self) -> float:
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def drop(self) -> bool:
+        return self.drop_rate > 0 and random.random() < self.drop_rate
+
+    def exception(self) -> bool:
+        return self.exception_rate > 0 and random.random() < self.exception_rate
+
+
+def build_registers(maps: Iterable[RegisterMap] = (MB210_101, TPM10)) -> Dict[int, int]:
+    """Образ регистров устройства по картам: правдоподобные значения всех полей"""
+    registers: Dict[int, int] = {}
+    for register_map in maps:
+        for field in register_map:
+            if "Тип датчика" in field.name:
+                value = SENSOR_TYPE
+            elif field.data_type == "FLOAT 32":
+                value = 20.0 + field.channel + field.address / 1000
+            else:
+                value = field.address % 1000
+            if field.data_type in ("UINT 32", "INT 32"):
+                # Целые прибор отдает младшим регистром вперед, независимо от кодека
+                words = [value & 0xFFFF, (value >> 16) & 0xFFFF]
+            else:
+                words = encode_value(field.data_type, value)
+            for i, word in enumerate(words):
+                registers[field.address + i] = word
+    return registers
+
+
+def crc16(frame: bytes) -> int:
+    crc = 0xFFFF
+    for byte in frame:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+
+class _TcpFaultProxy(asyncio.Protocol):
+    """Прокси Modbus TCP: каждый кадр MBAP задерживается или теряется"""
+
+    def __init__(self, upstream: Tuple[str, int], faults: Faults):
+        self.upstream = upstream
+        self.faults = faults
+        self.buffer = bytearray()
+        self.transport = None
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue()
+        self.task = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.task = asyncio.ensure_future(self._forward())
+
+    def data_received(self, data):
+        self.buffer += data
+        while len(self.buffer) >= 6:
+            length = struct.unpack_from(">H", self.buffer, 4)[0]
+            if len(self.buffer) < 6 + length:
+                break
+            frame = bytes(self.buffer[:6 + length])
+            del self.buffer[:6 + length]
+            if not self.faults.drop():
+                self.queue.put_nowait(frame)
+
+    def connection_lost(self, exc):
+        if self.task is not None:
+            self.task.cancel()
+
+    async def _forward(self):
+        reader, writer = await asyncio.open_connection(*self.upstream)
+        try:
+            while True:
+                frame = await self.queue.get()
+                delay = self.faults.delay()
+                if delay:
+                    await asyncio.sleep(delay)
+                if self.faults.exception():
+                    # Ответ с кодом исключения 04 (отказ устройства)
+                    tid, _, _, unit, function_code = struct.unpack_from(">HHHBB", frame)
+                    self.transport.write(struct.pack(">HHHBBB", tid, 0, 3, unit, function_code | 0x80, 4))
+                    continue
+                writer.write(frame)
+                header = await reader.readexactly(6)
+                body = await reader.readexactly(struct.unpack_from(">H", header, 4)[0])
+                self.transport.write(header + body)
+        except (asyncio.CancelledError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+class TcpDeviceSimulator:
+    """Сервер pymodbus с образом регистров за прокси с неисправностями"""
+
+    def __init__(self, faults: Optional[Faults] = None, device_ids: Iterable[int] = (1, 2), host: str = "127.0.0.1"):
+        self.faults = faults or Faults()
+        self.device_ids = tuple(device_ids)
+        self.host = host
+        self.port: Optional[int] = None
+        self.server_port: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def start(self) -> "TcpDeviceSimulator":
+        self._thread = threading.Thread(target=self._run, name="tcp-simulator", daemon=True)
+        self._thread.start()
+        self._ready.wait(10)
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def stop(self) -> None:
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+            self._thread.join(5)
+
+    async def _shutdown(self) -> None:
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop.stop()
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._serve())
+        except BaseException as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _serve(self) -> None:
+        from pymodbus.datastore import ModbusDeviceContext, ModbusSequentialDataBlock, ModbusServerContext
+        from pymodbus.server import ModbusTcpServer
+
+        image = build_registers()
+        values = [image.get(address, 0) for address in range(max(image) + 1)]
+        devices = {device_id: ModbusDeviceContext(hr=ModbusSequentialDataBlock(1, list(values)))
+                   for device_id in self.device_ids}
+        context = ModbusServerContext(devices=devices, single=False)
+
+        self.server_port = _free_port()
+        server = ModbusTcpServer(context, address=(self.host, self.server_port))
+        asyncio.ensure_future(server.serve_forever())
+        for _ in range(100):
+            try:
+                _, writer = await asyncio.open_connection(self.host, self.server_port)
+                writer.close()
+                break
+            except OSError:
+                await asyncio.sleep(0.05)
+
+        proxy = await self._loop.create_server(lambda: _TcpFaultProxy((self.host, self.server_port), self.faults),
+                                               self.host, 0)
+        self.port = proxy.sockets[0].getsockname()[1]
+
+
+class RtuDeviceSimulator:
+    """Ведомое устройство Modbus RTU на псевдотерминале
+
+    Клиент открывает port (ведомая сторона pty), имитатор отвечает через
+    ведущую сторону. Задержка faults добавляется к времени передачи кадров
+    на скорости baudrate
+    """
+
+    def __init__(self, faults: Optional[Faults] = None, device_ids: Iterable[int] = (1, 2), baudrate: int = 9600):
+        import pty
+        import tty
+
+        self.faults = faults or Faults()
+        self.device_ids = set(device_ids)
+        self.registers = build_registers()
+        self.char_time = 11 / baudrate
+        self.master, slave = pty.openpty()
+        tty.setraw(slave)
+        self.port = os.ttyname(slave)
+        self._slave = slave
+        self._running = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.requests = 0
+
+    def start(self) -> "RtuDeviceSimulator":
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name="rtu-simulator", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join(2)
+        os.close(self.master)
+        os.close(self._slave)
+
+    def _run(self) -> None:
+        import select
+
+        buffer = bytearray()
+        while self._running.is_set():
+            readable, _, _ = select.select([self.master], [], [], 0.1)
+            if not readable:
+                buffer.clear()
+                continue
+            buffer += os.read(self.master, 1024)
+
+            while len(buffer) >= 8:
+                size = 9 + buffer[6] if buffer[1] == 16 and len(buffer) >= 7 else 8
+                if len(buffer) < size:
+                    break
+                frame = bytes(buffer[:size])
+                del buffer[:size]
+                response = self._respond(frame)
+                if response is not None:
+                    time.sleep(self.char_time * (len(frame) + len(response)) + self.faults.delay())
+                    os.write(self.master, response)
+
+    def _respond(self, frame: bytes) -> Optional[bytes]:
+        if crc16(frame[:-2]) != struct.unpack_from("<H", frame, len(frame) - 2)[0]:
+            return None
+        unit, function_code, address, count = struct.unpack_from(">BBHH", frame)
+        if unit not in self.device_ids or self.faults.drop():
+            return None
+        self.requests += 1
+
+        if self.faults.exception() or function_code not in (3, 16):
+            body = struct.pack(">BBB", unit, function_code | 0x80, 4 if function_code in (3, 16) else 1)
+        elif function_code == 3:
+            words = [self.registers.get(address + i, 0) for i in range(count)]
+            body = struct.pack(f">BBB{count}H", unit, 3, 2 * count, *words)
+        else:
+            for i, word in enumerate(struct.unpack_from(f">{count}H", frame, 7)):
+                self.registers[address + i] = word
+            body = struct.pack(">BBHH", unit, 16, address, count)
+        return body + struct.pack("<H", crc16(body))
+
+
+class MedLineEmitter:
+    """Генератор строк динамометра на псевдотерминале с заданной частотой"""
+
+    def __init__(self, rate: float = 100.0):
+        import pty
+        import tty
+
+        self.rate = rate
+        self.master, slave = pty.openpty()
+        tty.setraw(slave)
+        self.port = os.ttyname(slave)
+        self._slave = slave
+        self._running = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.sent = 0
+
+    def start(self) -> "MedLineEmitter":
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name="med-emitter", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join(2)
+        os.close(self.master)
+        os.close(self._slave)
+
+    def _run(self) -> None:
+        period = 1.0 / self.rate
+        next_time = time.perf_counter()
+        while self._running.is_set():
+            os.write(self.master, b"%.3f\r\n" % (100 + (self.sent % 1000) / 10))
+            self.sent += 1
+            next_time += period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+
+def _free_port() -> int:
+    import socket
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
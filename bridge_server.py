@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import struct
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pymodbus.exceptions import ModbusException
+from config.register_map import RegisterMap, RegisterField
+from register_codec import encode_value, device_data_order
+from Logger.logger import logged
+
+# Порт сервера по умолчанию (502 требует прав администратора)
+DEFAULT_PORT = 5020
+
+# Возраст данных, после которого чтение отклоняется, секунды
+DEFAULT_MAX_AGE = 10.0
+
+# Коды исключений Modbus
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+SERVER_DEVICE_FAILURE = 0x04
+GATEWAY_TARGET_FAILED = 0x0B
+
+_MBAP = struct.Struct(">HHHB")
+
+# Запись значения в устройство: (устройство, поле карты, значение)
+Writer = Callable[[Dict[str, Any], RegisterField, Any], None]
+
+
+class _ModbusError(Exception):
+    def __init__(self, code: int):
+        super().__init__(code)
+        self.code = code
+
+
+class _Unit:
+    """Образ регистров одного полевого устройства"""
+    __slots__ = ("device", "register_map", "data_order", "registers", "first", "end", "updated")
+
+    def __init__(self, device: Dict[str, Any], register_map: RegisterMap, data_order: Tuple[str, str]):
+        self.device = device
+        self.register_map = register_map
+        self.data_order = data_order
+        self.first = min(field.address for field in register_map)
+        self.end = max(field.address + field.width for field in register_map)
+        self.registers = array("H", bytes(2 * (self.end - self.first)))
+        self.updated: Optional[float] = None
+
+    def store(self, field: RegisterField, value: Any) -> None:
+        offset = field.address - self.first
+        self.registers[offset:offset + field.width] = array("H", encode_value(field.data_type, value, *self.data_order))
+
+
+@logged(name="bridge_server", level=logging.DEBUG)
+class BridgeServer:
+    """Сервер Modbus TCP поверх данных опроса
+
+    Каждое полевое устройство доступно под своим unit ID с раскладкой
+    регистров его карты. Чтения (функции 03/04) обслуживаются из образа в
+    памяти без обращения к полевой шине; запись (06/16) раскладывается по
+    полям карты и передается в устройство через writer
+    """
+
+    def __init__(self, writer: Writer, host: str = "0.0.0.0", port: int = DEFAULT_PORT,
+                 max_age: float = DEFAULT_MAX_AGE):
+        self.log.info("=== Инициализация объекта BridgeServer ===")
+        self.writer = writer
+        self.host = host
+        self.port = port
+        self.max_age = max_age
+        self.units: Dict[int, _Unit] = {}
+        self._by_name: Dict[str, _Unit] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self.requests = 0
+
+    def add_device(self, device: Dict[str, Any], register_map: RegisterMap, unit_id: Optional[int] = None,
+                   data_order: Optional[Tuple[str, str]] = None) -> int:
+        """Публикация устройства; возвращает назначенный unit ID
+
+        data_order по умолчанию - порядок слов и байт устройства из config/devices.py
+        """
+        if unit_id is None:
+            unit_id = next(i for i in range(1, 248) if i not in self.units)
+        if not 1 <= unit_id <= 247 or unit_id in self.units:
+            raise ValueError(f"unit ID {unit_id} занят или вне диапазона 1-247")
+
+        unit = _Unit(device, register_map, data_order or device_data_order(device))
+        self.units[unit_id] = unit
+        self._by_name[device.get("name", "Unknown")] = unit
+        return unit_id
+
+    def update(self, device_name: str, values: Dict[int, Any], timestamp: Optional[float] = None) -> None:
+        """Обновление образа результатом опроса {адрес: значение}"""
+        unit = self._by_name.get(device_name)
+        if unit is None:
+            return
+        for address, value in values.items():
+            field = unit.register_map.at(address)
+            if field is not None and field.address == address and value is not None:
+                unit.store(field, value)
+        unit.updated = time.monotonic() if timestamp is None else timestamp
+
+    def start(self) -> None:
+        """Запуск сервера в отдельном потоке"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="bridge-server", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        self.log.info(f"Сервер моста слушает {self.host}:{self.port}")
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._server.close)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+        self._thread = None
+        self._loop = None
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._serve_client, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+        # Обработчики подключенных клиентов завершаются до закрытия цикла
+        pending = asyncio.all_tasks(self._loop)
+        for task in pending:
+            task.cancel()
+        self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        self._loop.close()
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info("peername")
+        self.log.debug(f"Подключен клиент {peer}")
+        try:
+            while True:
+                header = await reader.readexactly(_MBAP.size)
+                transaction_id, protocol_id, length, unit_id = _MBAP.unpack(header)
+                if protocol_id != 0 or not 2 <= length <= 254:
+                    break
+                pdu = await reader.readexactly(length - 1)
+                self.requests += 1
+
+                try:
+                    response = await self._handle(unit_id, pdu)
+                except _ModbusError as e:
+                    response = struct.pack(">BB", pdu[0] | 0x80, e.code)
+                writer.write(_MBAP.pack(transaction_id, 0, len(response) + 1, unit_id) + response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            self.log.debug(f"Клиент {peer} отключен")
+
+    async def _handle(self, unit_id: int, pdu: bytes) -> bytes:
+        unit = self.units.get(unit_id)
+        if unit is None:
+            raise _ModbusError(GATEWAY_TARGET_FAILED)
+
+        function_code = pdu[0]
+        if function_code in (3, 4):
+            address, count = self._unpack(">HH", pdu)
+            if not 1 <= count <= 125:
+                raise _ModbusError(ILLEGAL_DATA_VALUE)
+            if unit.updated is None or time.monotonic() - unit.updated > self.max_age:
+                raise _ModbusError(GATEWAY_TARGET_FAILED)
+            offset = self._offset(unit, address, count)
+            words = unit.registers[offset:offset + count]
+            return struct.pack(f">BB{count}H", function_code, 2 * count, *words)
+
+        if function_code == 6:
+            address, value = self._unpack(">HH", pdu)
+            await self._write(unit, address, [value])
+            return pdu[:5]
+
+        if function_code == 16:
+            address, count, byte_count = self._unpack(">HHB", pdu)
+            if not 1 <= count <= 123 or byte_count != 2 * count or len(pdu) != 6 + byte_count:
+                raise _ModbusError(ILLEGAL_DATA_VALUE)
+            await self._write(unit, address, list(struct.unpack_from(f">{count}H", pdu, 6)))
+            return struct.pack(">BHH", 16, address, count)
+
+        raise _ModbusError(ILLEGAL_FUNCTION)
+
+    async def _write(self, unit: _Unit, address: int, words: List[int]) -> None:
+        """Разбор записи по полям карты и передача в устройство"""
+        self._offset(unit, address, len(words))
+
+        fields: List[Tuple[RegisterField, Any]] = []
+        position = 0
+        while position < len(words):
+            field = unit.register_map.at(address + position)
+            if field is None or field.address != address + position or not field.writable \
+                    or position + field.width > len(words):
+                raise _ModbusError(ILLEGAL_DATA_ADDRESS)
+            fields.append((field, field.decode(words[position:position + field.width], *unit.data_order)))
+            position += field.width
+
+        for field, value in fields:
+            try:
+                await self._loop.run_in_executor(None, self.writer, unit.device, field, value)
+            except (ValueError, ConnectionError, ModbusException, OSError) as e:
+                self.log.exception(f"Ошибка записи {field} в {unit.device.get('name')}: {e}")
+                raise _ModbusError(SERVER_DEVICE_FAILURE) from e
+            unit.store(field, value)
+
+    @staticmethod
+    def _offset(unit: _Unit, address: int, count: int) -> int:
+        if address < unit.first or address + count > unit.end:
+            raise _ModbusError(ILLEGAL_DATA_ADDRESS)
+        return address - unit.first
+
+    @staticmethod
+    def _unpack(fmt: str, pdu: bytes) -> tuple:
+        try:
+            return struct.unpack_from(fmt, pdu, 1)
+        except struct.error:
+            raise _ModbusError(ILLEGAL_DATA_VALUE) from None
@@ -0,0 +1,263 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+from pymodbus.exceptions import ModbusIOException
+from rtu_client import PyModbusClientRTU
+from link_health import LINK_ERRORS
+from adaptive_timeout import DEFAULT_TIMEOUT
+from line_timing import LineTiming, DEFAULT_TURNAROUND
+from register_cache import RegisterCache, DEFAULT_TTL
+from register_codec import decode_value, encode_value, DEFAULT_WORD_ORDER, DEFAULT_BYTE_ORDER
+from single_flight import SingleFlight
+from Logger.logger import logged
+
+# Приоритеты заданий: меньшее значение обслуживается раньше
+PRIORITY_ALARM = 0
+PRIORITY_WRITE = 1
+PRIORITY_POLL = 2
+
+# Пауза перед повторным открытием потерянного порта; после каждой неудачи удваивается, секунды
+DEFAULT_RECONNECT_DELAY = 0.5
+MAX_RECONNECT_DELAY = 30.0
+
+# Таймаутов подряд по всей шине (ни одно устройство не ответило), после которых порт переоткрывается
+LINK_TIMEOUTS = 3
+
+
+class _Job:
+    __slots__ = ("operation", "args", "future", "expected")
+
+    def __init__(self, operation: Callable[..., Any], args: tuple, expected: float):
+        self.operation = operation
+        self.args = args
+        self.future: Future = Future()
+        self.expected = expected
+
+
+@logged(name="bus_scheduler", level=logging.DEBUG)
+class SerialBusScheduler:
+    """Планировщик транзакций одной шины RS-485
+
+    Единственный владелец клиента порта: задания из любых потоков ставятся
+    в очередь с приоритетом и выполняются по одному с минимальной паузой
+    t3.5 между кадрами. Запись и аварийные запросы обгоняют плановый опрос.
+    Чтение регистров, уже покрытых ждущим в очереди или выполняемым
+    чтением того же устройства, получает его результат без новой транзакции.
+    При потере порта (отключение преобразователя USB-RS485) поток шины
+    переоткрывает его с растущей паузой; пока порта нет, задания сразу
+    завершаются ConnectionError.
+
+    Синхронные методы повторяют интерфейс PyModbusClientRTU, поэтому
+    планировщик выдается пулом соединений вместо клиента порта
+    """
+
+    def __init__(self, port: str, baudrate: int = 9600, bytesize: int = 8, parity: str = 'N', stopbits: int = 1,
+                 turnaround: float = DEFAULT_TURNAROUND, reconnect_delay: float = DEFAULT_RECONNECT_DELAY,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self.log.info(f"=== Инициализация объекта SerialBusScheduler ({port}) ===")
+        self.client = PyModbusClientRTU(port, baudrate, bytesize, parity, stopbits, timeout=timeout)
+        self.timing = LineTiming(baudrate, bytesize, parity, stopbits, turnaround)
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._running = threading.Event()
+        # Запуск и остановка из разных потоков (пул, шлюз) не пересекаются
+        self._lifecycle = threading.Lock()
+        self._last_frame_end = 0.0
+        self.reconnect_delay = reconnect_delay
+        self._retry_delay = reconnect_delay
+        # Момент следующей попытки открыть порт; None - порт в порядке
+        self._reconnect_at: Optional[float] = None
+        self._timeouts = 0
+        # Одновременные чтения тех же регистров разными потребителями - одна транзакция
+        self.single_flight = SingleFlight(self._record_shared_read)
+
+    def start(self) -> None:
+        """Открытие порта и запуск потока шины"""
+        with self._lifecycle:
+            if self._thread is not None:
+                return
+
+            self.client.connect()
+            self._running.set()
+            self._thread = threading.Thread(target=self._run, name=f"bus-{self.client.port}", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Остановка потока шины; невыполненные задания отменяются"""
+        with self._lifecycle:
+            if self._thread is None:
+                return
+
+            self._running.clear()
+            self._queue.put((PRIORITY_ALARM, -1, None))
+            self._thread.join(timeout)
+            self._thread = None
+
+            while True:
+                try:
+                    _, _, job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None:
+                    job.future.cancel()
+
+            self.client.disconnect()
+
+    def submit_read(self, slave_id: int, address: int, count: int = 2, priority: int = PRIORITY_POLL,
+                    use_cache: bool = True) -> Future:
+        """Постановка чтения регистров в очередь шины
+
+        use_cache=False (например, проверка записи) читает с устройства
+        отдельной транзакцией, не присоединяясь к уже поставленному чтению
+        """
+        def start() -> Future:
+            job = _Job(self.client._read_registers, (slave_id, address, count, use_cache), self.timing.read_time(count))
+            return self._submit(job, priority)
+        if not use_cache:
+            return start()
+        return self.single_flight.submit(slave_id, address, count, start)
+
+    def submit_write(self, slave_id: int, address: int, registers: List[int], priority: int = PRIORITY_WRITE) -> Future:
+        """Постановка записи регистров в очередь шины"""
+        # Чтения, поставленные до записи, не раздаются вызывающим после нее
+        self.single_flight.forget(slave_id, address, len(registers))
+        job = _Job(self.client._write_registers, (slave_id, address, registers), self.timing.write_time(len(registers)))
+        return self._submit(job, priority)
+
+    def _read_registers(self, slave_id: int, address: int, count: int = 2, use_cache: bool = True) -> Optional[List[int]]:
+        """Синхронное чтение через очередь шины (совместимо с ReadPlanner)"""
+        return self.submit_read(slave_id, address, count, use_cache=use_cache).result()
+
+    def _write_registers(self, slave_id: int, address: int, registers: Optional[List[int]]) -> bool:
+        """Синхронная запись через очередь шины"""
+        return self.submit_write(slave_id, address, registers).result()
+
+    def read_int(self, slave_id: int, address: int, count: int = 1) -> int:
+        """Чтение целочисленного значения через очередь шины"""
+        registers = self._read_registers(slave_id, address, count)
+        if registers is None:
+            raise ValueError("Данные не получены с устройства")
+        return registers[0]
+
+    def read_float(self, slave_id: int, address: int, count: int = 2) -> float:
+        """Чтение значения с плавающей точкой через очередь шины"""
+        registers = self._read_registers(slave_id, address, count)
+        if registers is None:
+            raise ValueError("Данные не получены с устройства")
+        return decode_value("FLOAT 32", registers, *self.data_order(slave_id))
+
+    def write_int(self, slave_id: int, address: int, value_int: int) -> bool:
+        return self._write_registers(slave_id, address, [value_int & 0xFFFF])
+
+    def write_float(self, slave_id: int, address: int, value_float: float) -> bool:
+        return self._write_registers(slave_id, address, encode_value("FLOAT 32", value_float, *self.data_order(slave_id)))
+
+    def set_data_order(self, slave_id: int, word_order: Optional[str] = DEFAULT_WORD_ORDER,
+                       byte_order: Optional[str] = DEFAULT_BYTE_ORDER) -> None:
+        self.client.set_data_order(slave_id, word_order, byte_order)
+
+    def data_order(self, slave_id: int) -> Tuple[Optional[str], Optional[str]]:
+        return self.client.data_order(slave_id)
+
+    def enable_cache(self, ttl: float = DEFAULT_TTL) -> RegisterCache:
+        return self.client.enable_cache(ttl)
+
+    def is_connected(self) -> bool:
+        """Запущен ли поток шины (потерянный порт он переоткрывает сам)"""
+        return self._running.is_set()
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _record_shared_read(self, slave_id: int, waiters: int, elapsed: float) -> None:
+        record = getattr(self.client, "_record_shared_read", None)
+        if record is not None:
+            record(slave_id, waiters, elapsed)
+
+    @property
+    def available(self) -> bool:
+        """Открыт ли порт шины"""
+        return self._running.is_set() and self._reconnect_at is None
+
+    def _submit(self, job: _Job, priority: int) -> Future:
+        if not self._running.is_set():
+            raise ConnectionError(f"Шина {self.client.port} не запущена")
+        self._queue.put((priority, next(self._sequence), job))
+        return job.future
+
+    def _run(self) -> None:
+        while self._running.is_set():
+            _, _, job = self._queue.get()
+            if job is None or not job.future.set_running_or_notify_cancel():
+                continue
+
+            # Пауза t3.5 отсчитывается от конца предыдущей транзакции
+            delay = self._last_frame_end + self.timing.t35 - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            if not self._link_ready():
+                job.future.set_exception(ConnectionError(
+                    f"Шина {self.client.port} недоступна, повторное подключение через "
+                    f"{max(0.0, self._reconnect_at - time.monotonic()):.1f} с"))
+                continue
+
+            started = time.monotonic()
+            try:
+                result = job.operation(*job.args)
+            except Exception as e:
+                # Состояние порта обновляется до того, как вызывающий получит ошибку
+                self._on_error(e)
+                job.future.set_exception(e)
+            else:
+                self._timeouts = 0
+                job.future.set_result(result)
+            finally:
+                self._last_frame_end = time.monotonic()
+
+            elapsed = self._last_frame_end - started
+            if elapsed > 2 * job.expected:
+                self.log.debug(f"Транзакция {elapsed * 1000:.1f} мс при ожидаемых {job.expected * 1000:.1f} мс")
+
+    def _on_error(self, error: Exception) -> None:
+        """Ошибка линии: порт закрывается и переоткрывается перед следующим заданием"""
+        if not isinstance(error, LINK_ERRORS):
+            return
+        if isinstance(error, ModbusIOException) and self.client._transport_open():
+            # Таймаут одного устройства - не повод переоткрывать порт
+            self._timeouts += 1
+            if self._timeouts < LINK_TIMEOUTS:
+                return
+
+        self.log.warning(f"Потеря связи по шине {self.client.port}, порт будет открыт заново: {error}")
+        try:
+            self.client.disconnect()
+        except Exception as e:
+            self.log.exception(e)
+        self._timeouts = 0
+        self._retry_delay = self.reconnect_delay
+        self._reconnect_at = time.monotonic()
+
+    def _link_ready(self) -> bool:
+        """Готов ли порт; при потере - попытка открыть его, если пауза истекла"""
+        if self._reconnect_at is None:
+            return True
+        if time.monotonic() < self._reconnect_at:
+            return False
+
+        try:
+            self.client.connect()
+        except Exception as e:
+            self._reconnect_at = time.monotonic() + self._retry_delay
+            self.log.warning(f"Не удалось открыть {self.client.port}, повтор через {self._retry_delay:.1f} с: {e}")
+            self._retry_delay = min(self._retry_delay * 2, MAX_RECONNECT_DELAY)
+            return False
+
+        self.log.info(f"Шина {self.client.port} снова доступна")
+        self._reconnect_at = None
+        return True
@@ -0,0 +1,131 @@
+import logging
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from tag_history import TagHistory
+from Logger.logger import logged
+
+# Максимальный интервал без передачи значения тега, секунды
+DEFAULT_MAX_SILENCE = 60.0
+
+# Типы, значения которых сравниваются точно, без зоны нечувствительности
+EXACT_TYPES = ("UINT 16", "INT 16", "UINT 32", "INT 32")
+
+
+class Deadband:
+    """Зона нечувствительности тега: абсолютная, в процентах от значения и предельная пауза"""
+    __slots__ = ("absolute", "percent", "max_silence")
+
+    def __init__(self, absolute: float = 0.0, percent: float = 0.0, max_silence: float = DEFAULT_MAX_SILENCE):
+        if absolute < 0 or percent < 0:
+            raise ValueError(f"Зона нечувствительности не может быть отрицательной: {absolute}, {percent}")
+        if max_silence <= 0:
+            raise ValueError(f"max_silence должен быть положительным, получено: {max_silence}")
+        self.absolute = absolute
+        self.percent = percent
+        self.max_silence = max_silence
+
+    def exceeded(self, value: Any, last: Any) -> bool:
+        try:
+            delta = abs(value - last)
+        except TypeError:
+            return value != last
+        if math.isnan(delta):
+            return not (math.isnan(value) and math.isnan(last))
+        threshold = max(self.absolute, self.percent / 100 * abs(last))
+        return delta > threshold if threshold > 0 else delta != 0
+
+
+@logged(name="change_filter", level=logging.DEBUG)
+class ChangeFilter:
+    """Передача значений по изменению (report by exception)
+
+    Значение тега передается, если оно вышло за зону нечувствительности
+    относительно последнего переданного, либо если тег молчал дольше
+    max_silence. Целочисленные поля и регистры настройки сравниваются
+    точно. Блок регистров, слова которого не изменились, отбрасывается
+    до разбора
+    """
+
+    def __init__(self, absolute: float = 0.0, percent: float = 0.0, max_silence: float = DEFAULT_MAX_SILENCE):
+        self.log.info("=== Инициализация объекта ChangeFilter ===")
+        self.default = Deadband(absolute, percent, max_silence)
+        self.deadbands: Dict[str, Deadband] = {}
+        self._sent: Dict[str, Tuple[Any, float]] = {}
+        self._blocks: Dict[Tuple[str, int, int], Tuple[int, ...]] = {}
+        self.received = 0
+        self.passed = 0
+        self.blocks_skipped = 0
+
+    def set_deadband(self, tag: str, absolute: float = 0.0, percent: float = 0.0,
+                     max_silence: float = DEFAULT_MAX_SILENCE) -> None:
+        """Зона тега "устройство:адрес" или всех тегов устройства (tag - имя устройства)"""
+        self.deadbands[tag] = Deadband(absolute, percent, max_silence)
+
+    def deadband(self, device_name: str, address: int) -> Deadband:
+        return (self.deadbands.get(TagHistory.tag_name(device_name, address))
+                or self.deadbands.get(device_name)
+                or self.default)
+
+    def changed(self, device_name: str, address: int, value: Any, exact: bool = False,
+                timestamp: Optional[float] = None) -> bool:
+        """Нужно ли передавать значение; при True оно запоминается как последнее переданное"""
+        tag = TagHistory.tag_name(device_name, address)
+        now = time.monotonic() if timestamp is None else timestamp
+        deadband = self.deadband(device_name, address)
+        self.received += 1
+
+        sent = self._sent.get(tag)
+        if sent is not None and now - sent[1] < deadband.max_silence:
+            last = sent[0]
+            if (value == last) if exact else not deadband.exceeded(value, last):
+                return False
+
+        self._sent[tag] = (value, now)
+        self.passed += 1
+        return True
+
+    def filter(self, device_name: str, values: Dict[int, Any], timestamp: Optional[float] = None) -> Dict[int, Any]:
+        """Измененные значения результата опроса {адрес: значение}"""
+        return {address: value for address, value in values.items()
+                if self.changed(device_name, address, value, isinstance(value, int), timestamp)}
+
+    def filter_block(self, device_name: str, span, registers: List[int],
+                     decode: Callable[[], Dict[int, Any]], timestamp: Optional[float] = None) -> Dict[int, Any]:
+        """Измененные значения блока ReadSpan
+
+        Если слова блока совпадают с прошлым опросом и ни один его тег не
+        молчит дольше max_silence, блок отбрасывается без разбора. Блок и
+        значения запоминаются сразу, поэтому вызывается после успешного
+        чтения всех блоков устройства
+        """
+        now = time.monotonic() if timestamp is None else timestamp
+        key = (device_name, span.address, span.count)
+        words = tuple(registers[:span.count])
+
+        if self._blocks.get(key) == words and not self._silent(device_name, span, now):
+            self.received += len(span.fields)
+            self.blocks_skipped += 1
+            return {}
+        self._blocks[key] = words
+
+        types = dict(span.fields)
+        return {address: value for address, value in decode().items()
+                if self.changed(device_name, address, value, types.get(address) in EXACT_TYPES, now)}
+
+    def _silent(self, device_name: str, span, now: float) -> bool:
+        """Есть ли в блоке тег, не передававшийся дольше max_silence"""
+        for address, _ in span.fields:
+            sent = self._sent.get(TagHistory.tag_name(device_name, address))
+            if sent is None or now - sent[1] >= self.deadband(device_name, address).max_silence:
+                return True
+        return False
+
+    def reset(self) -> None:
+        """Следующий опрос передается целиком"""
+        self._sent.clear()
+        self._blocks.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"received": self.received, "passed": self.passed, "suppressed": self.received - self.passed,
+                "blocks_skipped": self.blocks_skipped}
@@ -0,0 +1,145 @@
+import logging
+import threading
+import time
+from enum import Enum
+from typing import Callable, Dict, List, Optional
+from events import DeviceEvent, DeviceQuarantined, DeviceProbing, DeviceRecovered
+from metrics import REGISTRY, MetricsRegistry
+from Logger.logger import logged
+
+# Число ошибок подряд, после которого устройство выводится из опроса
+DEFAULT_FAILURE_THRESHOLD = 3
+
+# Пауза до первой проверки и ее предел; после каждой неудачной проверки пауза удваивается, секунды
+DEFAULT_BASE_BACKOFF = 1.0
+DEFAULT_MAX_BACKOFF = 60.0
+
+
+class BreakerState(Enum):
+    """Состояние предохранителя устройства"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Предохранитель одного устройства"""
+    __slots__ = ("name", "state", "failures", "backoff", "next_probe")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.backoff = 0.0
+        self.next_probe = 0.0
+
+
+@logged(name="circuit_breaker", level=logging.DEBUG)
+class DeviceBreakers:
+    """Карантин устройств, переставших отвечать
+
+    После failure_threshold ошибок подряд устройство пропускается при
+    опросе. Когда истекает пауза, check() один раз возвращает HALF_OPEN:
+    вызывающий отправляет один дешевый пробный запрос и сообщает результат.
+    Успех возвращает устройство в опрос, неудача удваивает паузу (не больше
+    max_backoff). Переходы передаются подписчикам событиями из events.py
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, base_backoff: float = DEFAULT_BASE_BACKOFF,
+                 max_backoff: float = DEFAULT_MAX_BACKOFF, metrics: Optional[MetricsRegistry] = REGISTRY):
+        if failure_threshold < 1:
+            raise ValueError(f"failure_threshold должен быть не меньше 1, получено: {failure_threshold}")
+        if not 0 < base_backoff <= max_backoff:
+            raise ValueError(f"Нужно 0 < base_backoff <= max_backoff, получено: {base_backoff}, {max_backoff}")
+
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.metrics = metrics
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._listeners: List[Callable[[DeviceEvent], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, listener: Callable[[DeviceEvent], None]) -> None:
+        self._listeners.append(listener)
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(name, CircuitBreaker(name))
+        return breaker
+
+    def state(self, name: str) -> BreakerState:
+        return self.breaker(name).state
+
+    def retry_in(self, name: str) -> float:
+        """Время до следующей проверки устройства в карантине, секунды"""
+        return max(0.0, self.breaker(name).next_probe - time.monotonic())
+
+    def check(self, name: str) -> BreakerState:
+        """CLOSED - обычный опрос, HALF_OPEN - пора отправить пробный запрос, OPEN - пропустить"""
+        breaker = self.breaker(name)
+        if breaker.state is BreakerState.CLOSED:
+            return BreakerState.CLOSED
+        if breaker.state is BreakerState.HALF_OPEN:
+            # Пробный запрос уже отправлен другим потребителем
+            return BreakerState.OPEN
+
+        with self._lock:
+            if breaker.state is not BreakerState.OPEN or time.monotonic() < breaker.next_probe:
+                return BreakerState.OPEN
+            self._transition(breaker, BreakerState.HALF_OPEN)
+        self._emit(DeviceProbing(name, breaker.failures))
+        return BreakerState.HALF_OPEN
+
+    def record_success(self, name: str) -> None:
+        breaker = self.breaker(name)
+        if breaker.state is BreakerState.CLOSED:
+            breaker.failures = 0
+            return
+
+        with self._lock:
+            failures = breaker.failures
+            breaker.failures = 0
+            breaker.backoff = 0.0
+            self._transition(breaker, BreakerState.CLOSED)
+        self.log.info(f"Устройство {name} снова отвечает")
+        self._emit(DeviceRecovered(name, failures))
+
+    def record_failure(self, name: str) -> None:
+        breaker = self.breaker(name)
+        with self._lock:
+            breaker.failures += 1
+            if breaker.state is BreakerState.CLOSED and breaker.failures < self.failure_threshold:
+                return
+            if breaker.state is BreakerState.OPEN:
+                # Ошибка запроса, начатого до перехода в карантин
+                return
+
+            if breaker.state is BreakerState.HALF_OPEN:
+                breaker.backoff = min(breaker.backoff * 2, self.max_backoff)
+            else:
+                breaker.backoff = self.base_backoff
+            breaker.next_probe = time.monotonic() + breaker.backoff
+            self._transition(breaker, BreakerState.OPEN)
+
+        self.log.warning(f"Устройство {name} в карантине после {breaker.failures} ошибок, "
+                         f"проверка через {breaker.backoff:.1f} с")
+        self._emit(DeviceQuarantined(name, breaker.failures, breaker.backoff))
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        return {name: {"state": breaker.state.value, "failures": breaker.failures, "retry_in": self.retry_in(name)}
+                for name, breaker in list(self._breakers.items())}
+
+    def _transition(self, breaker: CircuitBreaker, state: BreakerState) -> None:
+        breaker.state = state
+        if self.metrics is not None:
+            self.metrics.observe_breaker(breaker.name, state.value)
+
+    def _emit(self, event: DeviceEvent) -> None:
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                self.log.exception(f"Ошибка обработчика события {event}: {e}")
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from register_codec import compile_layout, register_width, RegisterLayout, DEFAULT_WORD_ORDER, DEFAULT_BYTE_ORDER
+from config.registers import registers_sensor_MB210_101, registers_sensor_TPM10, MB210_101_CHANNELS
+from Logger.logger import logged
+
+ACCESS_READ_ONLY = "Только чтение"
+ACCESS_READ_WRITE = "Чтение и запись"
+
+# Каталог сериализованных скомпилированных карт
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".register_map_cache")
+
+# Меняется при изменении формата RegisterField/RegisterMap - старые файлы кэша игнорируются
+CACHE_VERSION = 1
+
+
+class RegisterField:
+    """Поле карты регистров с конкретным адресом канала
+
+    Поддерживает доступ по ключу (field["address"]) для совместимости
+    с кодом, работающим со словарями config/registers.py
+    """
+    __slots__ = ("name", "description", "access", "data_type", "address", "width", "channel", "base_address", "_layout")
+
+    def __init__(self, source: Dict[str, Any], channel: int = 1):
+        self.name: str = source["name"]
+        self.description: str = source.get("description", "")
+        self.access: str = source.get("access", ACCESS_READ_ONLY)
+        self.data_type: str = source["data_type"]
+        self.base_address: int = source["address"]
+        self.channel = channel
+        self.address: int = self.base_address + source.get("stride", 0) * (channel - 1)
+        self.width = register_width(self.data_type)
+        self._layout: Optional[RegisterLayout] = None
+
+    @property
+    def writable(self) -> bool:
+        return self.access == ACCESS_READ_WRITE
+
+    @property
+    def layout(self) -> RegisterLayout:
+        """Скомпилированная раскладка поля (строится при первом обращении)"""
+        if self._layout is None:
+            self._layout = compile_layout(((self.address, 0, self.data_type),))
+        return self._layout
+
+    def decode(self, registers: Sequence[int], word_order: Optional[str] = DEFAULT_WORD_ORDER,
+               byte_order: Optional[str] = DEFAULT_BYTE_ORDER) -> Any:
+        """Значение поля по его регистрам"""
+        if word_order == DEFAULT_WORD_ORDER and byte_order == DEFAULT_BYTE_ORDER:
+            return self.layout.decode(registers)[0]
+        return compile_layout(((self.address, 0, self.data_type),), 0, word_order, byte_order).decode(registers)[0]
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def __getstate__(self):
+        # Скомпилированная раскладка не сериализуется
+        return tuple(getattr(self, slot) for slot in self.__slots__[:-1])
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+        self._layout = None
+
+    def __repr__(self) -> str:
+        return f"RegisterField({self.name!r}, channel={self.channel}, address={self.address}, {self.data_type})"
+
+
+class RegisterMap:
+    """Скомпилированная карта регистров устройства
+
+    Строится один раз: каналы развернуты в конкретные адреса, построены
+    индексы адрес -> поле и (имя, канал) -> поле, проверены ширины и
+    перекрытия полей
+    """
+
+    def __init__(self, name: str, source: Iterable[Dict[str, Any]], channels: int = 1):
+        if channels < 1:
+            raise ValueError(f"channels должен быть не меньше 1, получено: {channels}")
+
+        self.name = name
+        self.channels = channels
+        self.fields: Tuple[RegisterField, ...] = tuple(
+            RegisterField(entry, channel) for channel in range(1, channels + 1) for entry in source
+        )
+        self._by_name: Dict[Tuple[str, int], RegisterField] = {}
+        self._by_address: Dict[int, RegisterField] = {}
+        self._by_channel: Dict[int, Tuple[RegisterField, ...]] = {}
+
+        for field in self.fields:
+            key = (field.name, field.channel)
+            if key in self._by_name:
+                raise ValueError(f"{name}: повторное имя поля {field.name!r} в канале {field.channel}")
+            self._by_name[key] = field
+
+            for address in range(field.address, field.address + field.width):
+                other = self._by_address.get(address)
+                if other is not None:
+                    raise ValueError(f"{name}: поле {field} перекрывается с {other} по адресу {address}")
+                if not 0 <= address <= 65535:
+                    raise ValueError(f"{name}: адрес {address} поля {field} вне диапазона 0-65535")
+                self._by_address[address] = field
+
+        for channel in range(1, channels + 1):
+            self._by_channel[channel] = tuple(field for field in self.fields if field.channel == channel)
+
+    def field(self, name: str, channel: int = 1) -> RegisterField:
+        """Поле по имени и номеру канала"""
+        try:
+            return self._by_name[(name, channel)]
+        except KeyError:
+            raise KeyError(f"{self.name}: нет поля {name!r} в канале {channel}") from None
+
+    def at(self, address: int) -> Optional[RegisterField]:
+        """Поле, занимающее регистр address"""
+        return self._by_address.get(address)
+
+    def channel(self, channel: int) -> Tuple[RegisterField, ...]:
+        """Поля одного канала"""
+        try:
+            return self._by_channel[channel]
+        except KeyError:
+            raise KeyError(f"{self.name}: нет канала {channel}") from None
+
+    def where(self, access: Optional[str] = None, channel: Optional[int] = None) -> List[RegisterField]:
+        """Поля с заданным доступом и/или каналом"""
+        fields = self._by_channel[channel] if channel is not None else self.fields
+        return [field for field in fields if access is None or field.access == access]
+
+    def __iter__(self) -> Iterator[RegisterField]:
+        return iter(self.fields)
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+    def __repr__(self) -> str:
+        return f"RegisterMap({self.name!r}, channels={self.channels}, fields={len(self.fields)})"
+
+
+@logged(name="register_map", level=logging.DEBUG)
+class RegisterMapLoader:
+    """Загрузка скомпилированных карт с кэшированием на диске
+
+    Сериализованная карта хранится в CACHE_DIR под хешем исходной карты,
+    поэтому изменение config/registers.py приводит к перекомпиляции
+    """
+
+    def __init__(self, cache_dir: Optional[str] = CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def load(self, name: str, source: List[Dict[str, Any]], channels: int = 1) -> RegisterMap:
+        digest = hashlib.sha1(
+            json.dumps([CACHE_VERSION, channels, source], sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:16]
+        path = os.path.join(self.cache_dir, f"{name}-{digest}.pickle") if self.cache_dir else None
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    register_map = pickle.load(f)
+                self.log.debug(f"Карта {name} загружена из кэша {path}")
+                return register_map
+            except Exception as e:
+                self.log.warning(f"Не удалось прочитать кэш карты {name}: {e}")
+
+        register_map = RegisterMap(name, source, channels)
+
+        if path:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    pickle.dump(register_map, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                self.log.warning(f"Не удалось сохранить кэш карты {name}: {e}")
+
+        return register_map
+
+
+def load_register_map(name: str, source: List[Dict[str, Any]], channels: int = 1) -> RegisterMap:
+    return RegisterMapLoader().load(name, source, channels)
+
+
+MB210_101 = load_register_map("MB210_101", registers_sensor_MB210_101, MB210_101_CHANNELS)
+TPM10 = load_register_map("TPM10", registers_sensor_TPM10)
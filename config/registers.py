@@ -3,92 +3,108 @@
 
 У меня тип датчика 35 - Pt1000 (α = 0,00385 °С-1)
 
-Регистры приведены для первого канала
+Регистры приведены для первого канала, stride - шаг адреса
+между соседними каналами (адрес канала N = address + stride * (N - 1))
 '''
+
+MB210_101_CHANNELS = 8
+
 registers_sensor_MB210_101 = [
     {
         "name": "Значение (float) на входе",
         "description": "—",
         "access": "Только чтение",
         "data_type": "FLOAT 32",
-        "address": 4000
+        "address": 4000,
+        "stride": 3
     },
     {
         "name": "Циклическое время измерения входа",
         "description": "0...65535 (миллисекунд)",
         "access": "Только чтение",
         "data_type": "UINT 16",
-        "address": 4002
+        "address": 4002,
+        "stride": 3
     },
     {
         "name": "Значение (integer) на входе",
         "description": "—",
         "access": "Только чтение",
         "data_type": "INT 16",
-        "address": 4064
+        "address": 4064,
+        "stride": 1
     },
     {
         "name": "Тип датчика входа",
         "description": "см. таблицу 6.4",
         "access": "Чтение и запись",
         "data_type": "UINT 32",
-        "address": 4100
+        "address": 4100,
+        "stride": 16
     },
     {
         "name": "Полоса фильтра входа",
         "description": "0…100",
         "access": "Чтение и запись",
         "data_type": "UINT 16",
-        "address": 4102
+        "address": 4102,
+        "stride": 16
     },
     {
         "name": "Положение десятичной точки входа",
         "description": "0…7",
         "access": "Чтение и запись",
         "data_type": "UINT 16",
-        "address": 4103
+        "address": 4103,
+        "stride": 16
     },
     {
         "name": "Сдвиг характеристики входа",
         "description": "–10000…10000",
         "access": "Чтение и запись",
         "data_type": "FLOAT 32",
-        "address": 4104
+        "address": 4104,
+        "stride": 16
     },
     {
         "name": "Наклон характеристики входа",
         "description": "–1…10",
         "access": "Чтение и запись",
         "data_type": "FLOAT 32",
-        "address": 4106
+        "address": 4106,
+        "stride": 16
     },
     {
         "name": "AIN.H верхняя граница входа",
         "description": "–10000…10000",
         "access": "Чтение и запись",
         "data_type": "FLOAT 32",
-        "address": 4108
+        "address": 4108,
+        "stride": 16
     },
     {
         "name": "AIN.L нижняя граница входа",
         "description": "–10000…10000",
         "access": "Чтение и запись",
         "data_type": "FLOAT 32",
-        "address": 4110
+        "address": 4110,
+        "stride": 16
     },
     {
         "name": "Постоянная времени фильтра входа",
         "description": "0…65535",
         "access": "Чтение и запись",
         "data_type": "UINT 16",
-        "address": 4112
+        "address": 4112,
+        "stride": 16
     },
     {
         "name": "Период измерения входа",
         "description": "600…10000 (миллисекунд)",
         "access": "Чтение и запись",
         "data_type": "UINT 16",
-        "address": 4113
+        "address": 4113,
+        "stride": 16
     }
 ]
 
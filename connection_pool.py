@@ -0,0 +1,178 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Tuple
+from tcp_client import PyModbusClientTCP
+from bus_scheduler import SerialBusScheduler
+from link_health import LINK_ERRORS
+from adaptive_timeout import DEFAULT_TIMEOUT
+from register_codec import device_data_order
+from Logger.logger import logged
+
+# Время простоя, после которого соединение закрывается, секунды
+DEFAULT_IDLE_TIMEOUT = 60.0
+
+EndpointKey = Tuple[Any, ...]
+
+
+class _PoolEntry:
+    """Соединение пула и его блокировка"""
+    __slots__ = ("client", "lock", "last_used")
+
+    def __init__(self, client):
+        self.client = client
+        self.lock = threading.RLock()
+        self.last_used = time.monotonic()
+
+
+@logged(name="connection_pool", level=logging.DEBUG)
+class ConnectionPool:
+    """Пул долгоживущих соединений
+
+    Одно соединение на TCP-точку (host, port), общее для всех устройств за
+    ним и всех циклов опроса. Последовательным портом владеет планировщик
+    шины SerialBusScheduler - один на порт; его получают все потребители
+    (опрос, запись, диагностика, асинхронный опрос), а транзакции идут
+    через общую очередь с приоритетом записи
+    """
+
+    def __init__(self, idle_timeout: float = DEFAULT_IDLE_TIMEOUT, timeout: float = DEFAULT_TIMEOUT):
+        self.log.info("=== Инициализация объекта ConnectionPool ===")
+        self.idle_timeout = idle_timeout
+        # Таймаут до первого измерения времени ответа; в устройстве задается ключом "timeout"
+        self.timeout = timeout
+        self._entries: Dict[EndpointKey, _PoolEntry] = {}
+        self._buses: Dict[EndpointKey, SerialBusScheduler] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def endpoint_key(device: Dict[str, Any]) -> EndpointKey:
+        """Ключ соединения для устройства из config/devices.py"""
+        if device["type"] == "tcp":
+            return ("tcp", device["ip"], device.get("port", 502))
+        if device["type"] == "rtu":
+            return ("rtu", device["port"], device.get("baudrate", 9600), device.get("bytesize", 8),
+                    device.get("parity", 'N'), device.get("stopbits", 1))
+        raise ValueError(f"Неизвестный тип устройства: {device['type']}")
+
+    @staticmethod
+    def _create_client(key: EndpointKey, timeout: float, pipeline_depth: int = 1):
+        return PyModbusClientTCP(key[1], key[2], pipeline_depth=pipeline_depth, timeout=timeout)
+
+    @contextmanager
+    def lease(self, device: Dict[str, Any]) -> Iterator[Any]:
+        """Выдача подключенного клиента для устройства
+
+        TCP-соединение выдается эксклюзивно; для последовательного порта
+        выдается его запущенный планировщик шины, общий для всех потребителей
+        """
+        key = self.endpoint_key(device)
+        if key[0] == "rtu":
+            yield self.bus(device)
+            return
+
+        entry = self._get_entry(key, device.get("timeout", self.timeout), device.get("pipeline_depth", 1))
+
+        with entry.lock:
+            entry.last_used = time.monotonic()
+            try:
+                if not entry.client.is_connected():
+                    self.log.debug(f"Подключение {key}")
+                    self._close_client(entry.client)
+                    entry.client.connect()
+
+                entry.client.set_data_order(device["device_id"], *device_data_order(device))
+                yield entry.client
+
+            except LINK_ERRORS as e:
+                self.log.warning(f"Ошибка линии {key}, соединение будет пересоздано: {e}")
+                self._close_client(entry.client)
+                raise
+            finally:
+                entry.last_used = time.monotonic()
+
+        self.evict_idle()
+
+    def scheduler(self, device: Dict[str, Any]) -> SerialBusScheduler:
+        """Планировщик шины последовательного порта устройства (без запуска)
+
+        Порт открывается монопольно: планировщик того же порта с другими
+        настройками линии останавливается
+        """
+        key = self.endpoint_key(device)
+        if key[0] != "rtu":
+            raise ValueError(f"Устройство {device.get('name')} не на последовательном порту")
+
+        displaced = []
+        with self._lock:
+            bus = self._buses.get(key)
+            if bus is None:
+                for other_key in [k for k in self._buses if k[1] == key[1]]:
+                    displaced.append((other_key, self._buses.pop(other_key)))
+                bus = self._buses[key] = SerialBusScheduler(*key[1:], timeout=device.get("timeout", self.timeout))
+                self.log.debug(f"Новая шина в пуле: {key}")
+
+        for other_key, other_bus in displaced:
+            self.log.debug(f"Остановка шины пула: {other_key}")
+            other_bus.stop()
+        return bus
+
+    def bus(self, device: Dict[str, Any]) -> SerialBusScheduler:
+        """Запущенный планировщик шины с порядком данных устройства"""
+        bus = self.scheduler(device)
+        bus.start()
+        bus.set_data_order(device["device_id"], *device_data_order(device))
+        return bus
+
+    def _get_entry(self, key: EndpointKey, timeout: float, pipeline_depth: int = 1) -> _PoolEntry:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _PoolEntry(self._create_client(key, timeout, pipeline_depth))
+                self._entries[key] = entry
+                self.log.debug(f"Новое соединение в пуле: {key}")
+        return entry
+
+    def evict_idle(self) -> None:
+        """Закрытие TCP-соединений, простаивающих дольше idle_timeout
+
+        Шины последовательных портов остаются открытыми до close_all
+        """
+        now = time.monotonic()
+        idle = []
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                # Занятое соединение не трогаем, даже если оно давно выдано
+                if now - entry.last_used > self.idle_timeout and entry.lock.acquire(blocking=False):
+                    entry.lock.release()
+                    idle.append((key, self._entries.pop(key)))
+
+        for key, entry in idle:
+            self._close_entry(key, entry)
+
+    def close_all(self) -> None:
+        """Закрытие всех соединений и остановка шин пула"""
+        with self._lock:
+            entries = list(self._entries.items())
+            self._entries.clear()
+            buses = list(self._buses.values())
+            self._buses.clear()
+
+        for key, entry in entries:
+            self._close_entry(key, entry)
+        for bus in buses:
+            bus.stop()
+
+    def _close_entry(self, key: EndpointKey, entry: _PoolEntry) -> None:
+        with entry.lock:
+            self.log.debug(f"Закрытие соединения пула: {key}")
+            self._close_client(entry.client)
+
+    def _close_client(self, client) -> None:
+        if client.client is None:
+            return
+        try:
+            client.disconnect()
+        except Exception as e:
+            self.log.exception(e)
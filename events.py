@@ -0,0 +1,30 @@
+import time
+from typing import Optional
+
+
+class DeviceEvent:
+    """Событие состояния устройства"""
+
+    def __init__(self, device: str, failures: int = 0, retry_in: Optional[float] = None):
+        self.device = device
+        self.failures = failures
+        self.retry_in = retry_in
+        self.timestamp = time.time()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.device!r}, failures={self.failures}, retry_in={self.retry_in})"
+
+
+class DeviceQuarantined(DeviceEvent):
+    """Устройство выведено из опроса после серии ошибок"""
+    pass
+
+
+class DeviceProbing(DeviceEvent):
+    """Пробный запрос к устройству в карантине"""
+    pass
+
+
+class DeviceRecovered(DeviceEvent):
+    """Устройство ответило на пробный запрос и возвращено в опрос"""
+    pass
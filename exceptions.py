@@ -1,8 +1,17 @@
+from typing import Optional
+from pymodbus.exceptions import ModbusException
+
+
 class DeviceDisconnectedError(Exception):
     """Устройство отключено или недоступно"""
     pass
 
 
+class DeviceQuarantinedError(DeviceDisconnectedError):
+    """Устройство в карантине: запросы к нему не отправляются до успешной проверки"""
+    pass
+
+
 class MonitoringStoppedError(Exception):
     """Мониторинг остановлен по команде"""
     pass
@@ -10,4 +19,12 @@ class MonitoringStoppedError(Exception):
 
 class DeviceWorkError(Exception):
     """Ошибка работы с устройством"""
-    pass
\ No newline at end of file
+    pass
+
+
+class ModbusExceptionResponse(ModbusException):
+    """Устройство ответило кодом исключения Modbus"""
+
+    def __init__(self, exception_code: Optional[int], message: str):
+        super().__init__(message)
+        self.exception_code = exception_code
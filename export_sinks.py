@@ -0,0 +1,326 @@
+import csv
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from Logger.logger import logged
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow нужен только для ParquetSink
+    pa = None
+    pq = None
+
+# Емкость очереди каждого приемника, пакетов
+DEFAULT_QUEUE_SIZE = 256
+
+# Число строк в группе строк Parquet
+DEFAULT_ROW_GROUP_SIZE = 65536
+
+# Период повторной попытки передать потоку приемника признак остановки, секунды
+STOP_POLL_INTERVAL = 0.1
+
+# Строка выгрузки: время (time.time), тег, значение
+Row = Tuple[float, str, float]
+
+
+class ExportSink(ABC):
+    """Приемник пакетов строк; open/write/close вызываются из потока приемника"""
+
+    name = "sink"
+
+    def open(self) -> None:
+        pass
+
+    @abstractmethod
+    def write(self, rows: List[Row]) -> None:
+        """Запись пакета строк"""
+
+    def close(self) -> None:
+        pass
+
+
+class CsvSink(ExportSink):
+    """Выгрузка в CSV: timestamp;tag;value"""
+
+    name = "csv"
+
+    def __init__(self, path: str, delimiter: str = ";"):
+        self.name = f"csv:{os.path.basename(path)}"
+        self.path = path
+        self.delimiter = delimiter
+        self._file = None
+        self._writer = None
+
+    def open(self) -> None:
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._file = open(self.path, "a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file, delimiter=self.delimiter)
+        if new_file:
+            self._writer.writerow(("timestamp", "tag", "value"))
+
+    def write(self, rows: List[Row]) -> None:
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SqliteSink(ExportSink):
+    """Выгрузка в SQLite: один пакет - одна транзакция executemany"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, table: str = "samples"):
+        if not table.isidentifier():
+            raise ValueError(f"Некорректное имя таблицы: {table}")
+        self.name = f"sqlite:{os.path.basename(path)}"
+        self.path = path
+        self.table = table
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def open(self) -> None:
+        self._connection = sqlite3.connect(self.path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} (timestamp REAL NOT NULL, tag TEXT NOT NULL, value REAL)"
+        )
+        self._connection.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_tag_time ON {self.table} (tag, timestamp)")
+        self._connection.commit()
+
+    def write(self, rows: List[Row]) -> None:
+        with self._connection:
+            self._connection.executemany(f"INSERT INTO {self.table} VALUES (?, ?, ?)", rows)
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class ParquetSink(ExportSink):
+    """Выгрузка в Parquet: строки копятся до row_group_size и пишутся группой"""
+
+    name = "parquet"
+
+    def __init__(self, path: str, row_group_size: int = DEFAULT_ROW_GROUP_SIZE):
+        if pa is None:
+            raise RuntimeError("Для выгрузки в Parquet нужен pyarrow")
+        self.name = f"parquet:{os.path.basename(path)}"
+        self.path = path
+        self.row_group_size = row_group_size
+        self.schema = pa.schema([("timestamp", pa.float64()), ("tag", pa.string()), ("value", pa.float64())])
+        self._writer = None
+        self._rows: List[Row] = []
+
+    def open(self) -> None:
+        self._writer = pq.ParquetWriter(self.path, self.schema)
+
+    def write(self, rows: List[Row]) -> None:
+        self._rows.extend(rows)
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._flush()
+            self._writer.close()
+            self._writer = None
+
+    def _flush(self) -> None:
+        if not self._rows:
+            return
+        timestamps, tags, values = zip(*self._rows)
+        self._writer.write_table(pa.table([list(timestamps), list(tags), list(values)], schema=self.schema),
+                                 row_group_size=self.row_group_size)
+        self._rows = []
+
+
+class SinkStats:
+    """Счетчики приемника"""
+    __slots__ = ("batches", "rows", "dropped_batches", "dropped_rows", "errors", "busy_time")
+
+    def __init__(self):
+        self.batches = 0
+        self.rows = 0
+        self.dropped_batches = 0
+        self.dropped_rows = 0
+        self.errors = 0
+        self.busy_time = 0.0
+
+
+@logged(name="export_sinks", level=logging.DEBUG)
+class _SinkWorker:
+    """Поток одного приемника с ограниченной очередью пакетов"""
+
+    def __init__(self, sink: ExportSink, maxsize: int):
+        self.sink = sink
+        self.queue: "queue.Queue[Optional[List[Row]]]" = queue.Queue(maxsize)
+        self.stats = SinkStats()
+        # Приемник не открылся: пакеты больше не ставятся в очередь
+        self.failed = False
+        self.thread = threading.Thread(target=self._run, name=f"sink-{sink.name}", daemon=True)
+
+    def stop(self, deadline: Optional[float] = None) -> None:
+        """Передача признака остановки живому потоку, не дольше deadline (time.monotonic)"""
+        while self.thread.is_alive():
+            try:
+                self.queue.put(None, timeout=STOP_POLL_INTERVAL)
+                return
+            except queue.Full:
+                if deadline is not None and time.monotonic() >= deadline:
+                    self.log.warning(f"Очередь приемника {self.sink.name} не освободилась до остановки")
+                    return
+
+    def _run(self) -> None:
+        try:
+            self.sink.open()
+        except Exception as e:
+            self.log.exception(f"Не удалось открыть приемник {self.sink.name}: {e}")
+            self.stats.errors += 1
+            self.failed = True
+            self._discard()
+            return
+
+        try:
+            running = True
+            while running:
+                batch = self.queue.get()
+                if batch is None:
+                    break
+
+                # Накопившиеся в очереди пакеты пишутся одной операцией
+                rows = list(batch)
+                while True:
+                    try:
+                        more = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if more is None:
+                        running = False
+                        break
+                    rows.extend(more)
+
+                started = time.perf_counter()
+                try:
+                    self.sink.write(rows)
+                    self.stats.rows += len(rows)
+                except Exception as e:
+                    self.stats.errors += 1
+                    self.stats.dropped_rows += len(rows)
+                    self.log.exception(f"Ошибка записи в приемник {self.sink.name}: {e}")
+                self.stats.busy_time += time.perf_counter() - started
+        finally:
+            self.sink.close()
+
+    def _discard(self) -> None:
+        """Учет пакетов, оставшихся в очереди неоткрытого приемника, как потерянных"""
+        while True:
+            try:
+                batch = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            if batch is not None:
+                self.stats.dropped_batches += 1
+                self.stats.dropped_rows += len(batch)
+
+
+@logged(name="export_sinks", level=logging.DEBUG)
+class SinkPipeline:
+    """Выгрузка пакетов значений в приемники
+
+    Каждый приемник работает в своем потоке с ограниченной очередью.
+    submit не блокирует цикл опроса: при заполненной очереди пакет
+    отбрасывается и учитывается в статистике, либо (block_timeout > 0)
+    опрос ждет освобождения очереди не дольше block_timeout
+    """
+
+    def __init__(self, sinks: Iterable[ExportSink] = (), maxsize: int = DEFAULT_QUEUE_SIZE, block_timeout: float = 0.0):
+        self.log.info("=== Инициализация объекта SinkPipeline ===")
+        self.maxsize = maxsize
+        self.block_timeout = block_timeout
+        self.workers: List[_SinkWorker] = []
+        self._started = False
+        for sink in sinks:
+            self.add(sink)
+
+    def add(self, sink: ExportSink) -> None:
+        worker = _SinkWorker(sink, self.maxsize)
+        self.workers.append(worker)
+        if self._started:
+            worker.thread.start()
+
+    def start(self) -> None:
+        """Запуск потоков приемников"""
+        if self._started:
+            return
+        self._started = True
+        for worker in self.workers:
+            worker.thread.start()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Дозапись очередей и остановка потоков, всего не дольше timeout"""
+        if not self._started:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for worker in self.workers:
+            worker.stop(deadline)
+        for worker in self.workers:
+            worker.thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+            if worker.failed:
+                # Пакеты, поставленные в очередь одновременно с ошибкой открытия
+                worker._discard()
+        self._started = False
+
+    def submit(self, rows: List[Row]) -> None:
+        """Передача пакета строк во все приемники"""
+        if not rows:
+            return
+        for worker in self.workers:
+            if worker.failed:
+                worker.stats.dropped_batches += 1
+                worker.stats.dropped_rows += len(rows)
+                continue
+            try:
+                if self.block_timeout > 0:
+                    worker.queue.put(rows, timeout=self.block_timeout)
+                else:
+                    worker.queue.put_nowait(rows)
+                worker.stats.batches += 1
+            except queue.Full:
+                worker.stats.dropped_batches += 1
+                worker.stats.dropped_rows += len(rows)
+
+    def submit_values(self, device_name: str, values: Dict[int, Any], timestamp: Optional[float] = None) -> None:
+        """Передача результата опроса устройства {адрес: значение}"""
+        timestamp = time.time() if timestamp is None else timestamp
+        self.submit([(timestamp, f"{device_name}:{address}", value) for address, value in values.items()])
+
+    def submit_samples(self, tag: str, samples: Iterable[Any]) -> None:
+        """Передача отсчетов с полями timestamp и value (например, MedSample)"""
+        self.submit([(sample.timestamp, tag, sample.value) for sample in samples])
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Статистика по приемникам: строки, потери, глубина очереди, строк в секунду"""
+        result = {}
+        for worker in self.workers:
+            stats = worker.stats
+            result[worker.sink.name] = {
+                "batches": stats.batches,
+                "rows": stats.rows,
+                "dropped_batches": stats.dropped_batches,
+                "dropped_rows": stats.dropped_rows,
+                "errors": stats.errors,
+                "queue_depth": worker.queue.qsize(),
+                "rows_per_second": stats.rows / stats.busy_time if stats.busy_time else 0.0,
+            }
+        return result
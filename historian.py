@@ -0,0 +1,398 @@
+import calendar
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from Logger.logger import logged
+
+try:
+    import numpy as np
+except ImportError:  # без NumPy архив пишется, но запросы недоступны
+    np = None
+
+# Каталог архива по умолчанию
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history")
+
+# Период сброса накопленных записей на диск (write + fsync), секунды
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+# Число записей в блоке, на который заводится одна строка индекса
+DEFAULT_CHUNK_RECORDS = 4096
+
+# Предельное число записей в буфере, пока диск недоступен: самые старые вытесняются
+DEFAULT_MAX_PENDING = 1000000
+
+# Качество значения
+QUALITY_GOOD = 192
+QUALITY_UNCERTAIN = 64
+QUALITY_BAD = 0
+
+# Запись: время (с), id тега, качество, значение - 24 байта
+RECORD = struct.Struct("<dIB3xd")
+# Строка индекса: мин. время, макс. время, номер первой записи, число записей
+INDEX = struct.Struct("<ddQQ")
+
+if np is not None:
+    RECORD_DTYPE = np.dtype({"names": ["timestamp", "tag", "quality", "value"],
+                             "formats": ["<f8", "<u4", "u1", "<f8"],
+                             "offsets": [0, 8, 12, 16], "itemsize": RECORD.size})
+    INDEX_DTYPE = np.dtype([("min", "<f8"), ("max", "<f8"), ("start", "<u8"), ("count", "<u8")])
+
+DAY = 86400
+
+
+def segment_day(timestamp: float) -> str:
+    """Имя суточного сегмента (UTC) для метки времени"""
+    return time.strftime("%Y-%m-%d", time.gmtime(timestamp))
+
+
+class _Segment:
+    """Открытый на запись суточный сегмент и незакрытый блок его индекса"""
+    __slots__ = ("day", "data", "index", "records", "chunk_start", "chunk_min", "chunk_max")
+
+    def __init__(self, directory: str, day: str):
+        self.day = day
+        data_path = os.path.join(directory, f"{day}.seg")
+        index_path = os.path.join(directory, f"{day}.idx")
+
+        # Хвост после сбоя (неполная запись или строка индекса) отбрасывается
+        self.data = open(data_path, "ab+")
+        self.records = os.path.getsize(data_path) // RECORD.size
+        self.data.truncate(self.records * RECORD.size)
+        self.index = open(index_path, "ab+")
+        self.index.truncate(os.path.getsize(index_path) // INDEX.size * INDEX.size)
+
+        self.chunk_start = 0
+        if os.path.getsize(index_path):
+            self.index.seek(-INDEX.size, os.SEEK_END)
+            _, _, start, count = INDEX.unpack(self.index.read(INDEX.size))
+            self.chunk_start = start + count
+
+        # Границы времени незакрытого блока восстанавливаются по его записям
+        self.chunk_min = float("inf")
+        self.chunk_max = float("-inf")
+        self.data.seek(self.chunk_start * RECORD.size)
+        for timestamp, _, _, _ in RECORD.iter_unpack(self.data.read()):
+            self.chunk_min = min(self.chunk_min, timestamp)
+            self.chunk_max = max(self.chunk_max, timestamp)
+
+    def write(self, records: List[Tuple[float, int, int, float]], chunk_records: int) -> None:
+        buffer = bytearray(RECORD.size * len(records))
+        index = bytearray()
+        for i, record in enumerate(records):
+            RECORD.pack_into(buffer, i * RECORD.size, *record)
+            timestamp = record[0]
+            if timestamp < self.chunk_min:
+                self.chunk_min = timestamp
+            if timestamp > self.chunk_max:
+                self.chunk_max = timestamp
+            self.records += 1
+            if self.records - self.chunk_start == chunk_records:
+                index += INDEX.pack(self.chunk_min, self.chunk_max, self.chunk_start, chunk_records)
+                self.chunk_start = self.records
+                self.chunk_min = float("inf")
+                self.chunk_max = float("-inf")
+
+        self.data.write(buffer)
+        if index:
+            self.index.write(index)
+
+    def sync(self) -> None:
+        for f in (self.data, self.index):
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self) -> None:
+        self.data.close()
+        self.index.close()
+
+
+@logged(name="historian", level=logging.DEBUG)
+class Historian:
+    """Архив значений тегов на диске
+
+    Записи фиксированной ширины дописываются в суточные сегменты
+    ГГГГ-ММ-ДД.seg; на каждый блок из chunk_records записей в .idx хранится
+    диапазон времени, поэтому запрос отображает в память только нужные
+    сегменты и блоки. append только ставит запись в буфер - запись на диск
+    и fsync выполняет фоновый поток раз в flush_interval
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIR, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 chunk_records: int = DEFAULT_CHUNK_RECORDS, max_pending: int = DEFAULT_MAX_PENDING):
+        self.log.info("=== Инициализация объекта Historian ===")
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.chunk_records = chunk_records
+        self.max_pending = max_pending
+        os.makedirs(directory, exist_ok=True)
+
+        self._tags_path = os.path.join(directory, "tags.json")
+        self.tags: Dict[str, int] = {}
+        if os.path.exists(self._tags_path):
+            with open(self._tags_path, encoding="utf-8") as f:
+                self.tags = json.load(f)
+        self._tags_dirty = False
+
+        self._pending: List[Tuple[float, int, int, float]] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._segments: Dict[str, _Segment] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self.written = 0
+        self.dropped = 0
+
+    def tag_id(self, tag: str) -> int:
+        tag_id = self.tags.get(tag)
+        if tag_id is None:
+            with self._lock:
+                tag_id = self.tags.setdefault(tag, len(self.tags))
+                self._tags_dirty = True
+        return tag_id
+
+    def append(self, tag: str, value: float, timestamp: Optional[float] = None, quality: int = QUALITY_GOOD) -> None:
+        """Постановка значения в буфер записи (без обращения к диску)"""
+        record = (time.time() if timestamp is None else timestamp, self.tag_id(tag), quality, value)
+        with self._lock:
+            self._pending.append(record)
+
+    def record(self, device_name: str, values: Dict[int, Any], timestamp: Optional[float] = None,
+               quality: int = QUALITY_GOOD) -> None:
+        """Запись результата опроса устройства {адрес: значение}"""
+        timestamp = time.time() if timestamp is None else timestamp
+        for address, value in values.items():
+            self.append(f"{device_name}:{address}", value, timestamp, quality)
+
+    def extend(self, tag: str, samples: Iterable[Any], quality: int = QUALITY_GOOD) -> None:
+        """Запись отсчетов с полями timestamp и value (например, MedSample)"""
+        tag_id = self.tag_id(tag)
+        records = [(sample.timestamp, tag_id, quality, sample.value) for sample in samples]
+        with self._lock:
+            self._pending.extend(records)
+
+    def start(self) -> None:
+        """Запуск фонового потока записи"""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="historian", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Остановка потока, сброс буфера и закрытие сегментов"""
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        with self._write_lock:
+            for segment in self._segments.values():
+                segment.close()
+            self._segments.clear()
+
+    def flush(self) -> int:
+        """Запись накопленных значений на диск с fsync; возвращает число записей
+
+        При ошибке диска незаписанные значения возвращаются в буфер и
+        пишутся следующим сбросом, ошибка передается вызывающему
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            tags = dict(self.tags) if self._tags_dirty else None
+            self._tags_dirty = False
+
+        if not pending and tags is None:
+            return 0
+
+        by_day: Dict[str, List[Tuple[float, int, int, float]]] = {}
+        for record in pending:
+            by_day.setdefault(segment_day(record[0]), []).append(record)
+
+        written = 0
+        with self._write_lock:
+            try:
+                if tags is not None:
+                    tmp_path = f"{self._tags_path}.tmp"
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        json.dump(tags, f, ensure_ascii=False)
+                    os.replace(tmp_path, self._tags_path)
+                    tags = None
+
+                for day, records in list(by_day.items()):
+                    segment = self._segments.get(day)
+                    if segment is None:
+                        segment = self._segments[day] = _Segment(self.directory, day)
+                    before = segment.records
+                    try:
+                        segment.write(records, self.chunk_records)
+                        segment.sync()
+                    except OSError:
+                        # Сегмент переоткрывается следующим сбросом, неполная запись отбрасывается
+                        self._segments.pop(day)
+                        stored = self._abandon(segment, before)
+                        written += stored
+                        by_day[day] = records[stored:]
+                        raise
+                    written += len(records)
+                    del by_day[day]
+
+            except OSError:
+                self._requeue([record for records in by_day.values() for record in records], tags is not None)
+                raise
+
+            finally:
+                self.written += written
+
+            # Сегменты прошедших суток закрываются
+            today = segment_day(time.time())
+            for day in [day for day in self._segments if day < today and day not in by_day]:
+                self._segments.pop(day).close()
+
+        return written
+
+    @staticmethod
+    def _abandon(segment: _Segment, before: int) -> int:
+        """Закрытие сегмента после ошибки записи; число записей пакета, попавших на диск"""
+        path = segment.data.name
+        for f in (segment.data, segment.index):
+            try:
+                f.close()
+            except OSError:
+                pass
+        try:
+            return max(0, os.path.getsize(path) // RECORD.size - before)
+        except OSError:
+            return 0
+
+    def _requeue(self, records: List[Tuple[float, int, int, float]], tags_dirty: bool) -> None:
+        """Возврат незаписанных значений в начало буфера с ограничением max_pending"""
+        with self._lock:
+            self._pending[:0] = records
+            self._tags_dirty = self._tags_dirty or tags_dirty
+            overflow = len(self._pending) - self.max_pending
+            if overflow > 0:
+                del self._pending[:overflow]
+                self.dropped += overflow
+                self.log.warning(f"Буфер архива переполнен, отброшено записей: {overflow}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"written": self.written, "pending": len(self._pending), "dropped": self.dropped}
+
+    def query(self, tag: str, start: float, end: float) -> Tuple[Any, Any, Any]:
+        """Значения тега за интервал [start, end): массивы времени, значений и качества"""
+        if np is None:
+            raise RuntimeError("Для запросов к архиву нужен NumPy")
+
+        tag_id = self.tags.get(tag)
+        parts = []
+        if tag_id is not None:
+            day_start = int(start // DAY) * DAY
+            for day_time in range(day_start, int(end) + 1, DAY):
+                records = self._segment_records(segment_day(day_time), start, end)
+                for block in records:
+                    mask = (block["tag"] == tag_id) & (block["timestamp"] >= start) & (block["timestamp"] < end)
+                    if mask.any():
+                        parts.append(block[mask])
+
+        if not parts:
+            empty = np.empty(0, dtype=RECORD_DTYPE)
+            return empty["timestamp"], empty["value"], empty["quality"]
+
+        result = np.concatenate(parts)
+        result = result[np.argsort(result["timestamp"], kind="stable")]
+        return result["timestamp"], result["value"], result["quality"]
+
+    def compact(self, older_than: float = DAY, retention: Optional[float] = None) -> List[str]:
+        """Уплотнение закрытых сегментов
+
+        Сегменты старше older_than секунд сортируются по времени, очищаются
+        от повторов и получают индекс заново; сегменты старше retention
+        удаляются. Возвращает имена обработанных сегментов
+        """
+        if np is None:
+            raise RuntimeError("Для уплотнения архива нужен NumPy")
+
+        now = time.time()
+        compacted = []
+        for day in self.segments():
+            day_end = calendar.timegm(time.strptime(day, "%Y-%m-%d")) + DAY
+            if day_end > now - older_than or day in self._segments:
+                continue
+
+            data_path = os.path.join(self.directory, f"{day}.seg")
+            index_path = os.path.join(self.directory, f"{day}.idx")
+
+            if retention is not None and day_end < now - retention:
+                os.remove(data_path)
+                if os.path.exists(index_path):
+                    os.remove(index_path)
+                compacted.append(day)
+                continue
+
+            records = np.fromfile(data_path, dtype=RECORD_DTYPE)
+            order = np.lexsort((records["tag"], records["timestamp"]))
+            records = records[order]
+            if len(records) > 1:
+                keep = np.ones(len(records), dtype=bool)
+                keep[1:] = (records["timestamp"][1:] != records["timestamp"][:-1]) | \
+                           (records["tag"][1:] != records["tag"][:-1])
+                records = records[keep]
+
+            starts = np.arange(0, len(records), self.chunk_records)
+            index = np.empty(len(starts), dtype=INDEX_DTYPE)
+            for i, chunk_start in enumerate(starts):
+                chunk = records["timestamp"][chunk_start:chunk_start + self.chunk_records]
+                index[i] = (chunk.min(), chunk.max(), chunk_start, len(chunk))
+
+            for path, array in ((data_path, records), (index_path, index)):
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    array.tofile(f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            compacted.append(day)
+
+        self.log.debug(f"Уплотнено сегментов: {len(compacted)}")
+        return compacted
+
+    def segments(self) -> List[str]:
+        return sorted(name[:-4] for name in os.listdir(self.directory) if name.endswith(".seg"))
+
+    def _segment_records(self, day: str, start: float, end: float) -> List[Any]:
+        """Блоки сегмента, пересекающиеся с [start, end), отображенные в память"""
+        data_path = os.path.join(self.directory, f"{day}.seg")
+        if not os.path.exists(data_path):
+            return []
+
+        count = os.path.getsize(data_path) // RECORD.size
+        if not count:
+            return []
+        records = np.memmap(data_path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+
+        index_path = os.path.join(self.directory, f"{day}.idx")
+        index_size = os.path.getsize(index_path) // INDEX.size if os.path.exists(index_path) else 0
+        if not index_size:
+            return [records]
+
+        index = np.fromfile(index_path, dtype=INDEX_DTYPE, count=index_size)
+        blocks = [records[entry["start"]:entry["start"] + entry["count"]]
+                  for entry in index if entry["max"] >= start and entry["min"] < end]
+
+        # Записи после последнего полного блока индексом не покрыты
+        tail = int(index[-1]["start"] + index[-1]["count"])
+        if tail < count:
+            blocks.append(records[tail:])
+        return blocks
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                self.log.exception(f"Ошибка записи архива: {e}")
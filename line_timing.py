@@ -0,0 +1,44 @@
+# Время реакции устройства между приемом запроса и началом ответа, секунды
+DEFAULT_TURNAROUND = 0.005
+
+
+class LineTiming:
+    """Временные параметры линии RS-485 по настройкам порта
+
+    Для скоростей выше 19200 бод спецификация Modbus RTU фиксирует
+    интервалы t1.5 = 750 мкс и t3.5 = 1750 мкс
+    """
+    __slots__ = ("char_time", "t15", "t35", "turnaround")
+
+    def __init__(self, baudrate: int = 9600, bytesize: int = 8, parity: str = 'N', stopbits: float = 1,
+                 turnaround: float = DEFAULT_TURNAROUND):
+        if baudrate <= 0:
+            raise ValueError(f"baudrate должен быть положительным, получено: {baudrate}")
+
+        bits = 1 + bytesize + (0 if parity == 'N' else 1) + stopbits
+        self.char_time = bits / baudrate
+        if baudrate > 19200:
+            self.t15 = 0.00075
+            self.t35 = 0.00175
+        else:
+            self.t15 = 1.5 * self.char_time
+            self.t35 = 3.5 * self.char_time
+        self.turnaround = turnaround
+
+    def frame_time(self, size: int) -> float:
+        """Время передачи кадра из size байт"""
+        return size * self.char_time
+
+    def wire_time(self, function_code: int, count: int) -> float:
+        """Время передачи запроса и ответа функции 03 или 16 без реакции устройства"""
+        if function_code == 16:
+            return self.frame_time(9 + 2 * count) + self.frame_time(8)
+        return self.frame_time(8) + self.frame_time(5 + 2 * count)
+
+    def read_time(self, count: int) -> float:
+        """Ожидаемое время транзакции функции 03: запрос 8 байт, ответ 5 + 2N"""
+        return self.wire_time(3, count) + self.turnaround
+
+    def write_time(self, count: int) -> float:
+        """Ожидаемое время транзакции функции 16: запрос 9 + 2N байт, ответ 8"""
+        return self.wire_time(16, count) + self.turnaround
@@ -0,0 +1,95 @@
+import logging
+import threading
+import time
+from enum import Enum
+from typing import Optional
+from pymodbus.exceptions import ModbusIOException
+import serial
+from Logger.logger import logged
+
+# Интервал простоя, после которого состояние линии подтверждается явным запросом
+DEFAULT_HEARTBEAT_INTERVAL = 5.0
+
+# Число подряд неудачных транзакций, после которого линия считается потерянной
+DEFAULT_DOWN_AFTER = 3
+
+# Ошибки линии: соединение или порт закрывается и открывается заново
+LINK_ERRORS = (ConnectionError, ModbusIOException, serial.SerialException, OSError)
+
+
+class LinkState(Enum):
+    """Состояние линии связи"""
+    CONNECTED = "connected"
+    DEGRADED = "degraded"
+    DOWN = "down"
+
+
+@logged(name="link_health", level=logging.DEBUG)
+class LinkHealth:
+    """Пассивный контроль состояния линии связи
+
+    Состояние вычисляется по результатам и времени реальных транзакций,
+    явный запрос (heartbeat) нужен только после простоя линии
+    """
+
+    def __init__(self, heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL, down_after: int = DEFAULT_DOWN_AFTER):
+        if heartbeat_interval <= 0:
+            raise ValueError(f"heartbeat_interval должен быть положительным, получено: {heartbeat_interval}")
+        if down_after < 1:
+            raise ValueError(f"down_after должен быть не меньше 1, получено: {down_after}")
+
+        self.heartbeat_interval = heartbeat_interval
+        self.down_after = down_after
+        self._lock = threading.Lock()
+        self._state = LinkState.CONNECTED
+        self._failures = 0
+        self._last_activity = time.monotonic()
+        self._last_slave_id: Optional[int] = None
+
+    @property
+    def state(self) -> LinkState:
+        return self._state
+
+    @property
+    def consecutive_failures(self) -> int:
+        return self._failures
+
+    @property
+    def last_slave_id(self) -> Optional[int]:
+        """Последнее устройство, ответившее на линии"""
+        return self._last_slave_id
+
+    def idle_time(self) -> float:
+        """Время с последней транзакции, секунды"""
+        return time.monotonic() - self._last_activity
+
+    def needs_heartbeat(self) -> bool:
+        return self.idle_time() >= self.heartbeat_interval
+
+    def record_success(self, slave_id: Optional[int] = None) -> None:
+        """Устройство ответило (в том числе кодом исключения Modbus)"""
+        with self._lock:
+            self._last_activity = time.monotonic()
+            self._failures = 0
+            if slave_id is not None:
+                self._last_slave_id = slave_id
+            if self._state is not LinkState.CONNECTED:
+                self.log.info(f"Линия восстановлена: {self._state.value} -> connected")
+                self._state = LinkState.CONNECTED
+
+    def record_failure(self) -> None:
+        """Транзакция завершилась без ответа"""
+        with self._lock:
+            self._last_activity = time.monotonic()
+            self._failures += 1
+            state = LinkState.DOWN if self._failures >= self.down_after else LinkState.DEGRADED
+            if state is not self._state:
+                self.log.warning(f"Состояние линии: {self._state.value} -> {state.value} (ошибок подряд: {self._failures})")
+                self._state = state
+
+    def reset(self) -> None:
+        """Сброс после нового подключения"""
+        with self._lock:
+            self._state = LinkState.CONNECTED
+            self._failures = 0
+            self._last_activity = time.monotonic()
@@ -0,0 +1,190 @@
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+import serial
+from exceptions import DeviceDisconnectedError
+from Logger.logger import logged
+
+# Емкость очереди отсчетов: при переполнении вытесняются самые старые
+DEFAULT_QUEUE_SIZE = 4096
+
+# Период отсчетов динамометра, если в устройстве не задан ключ "sample_period", секунды
+DEFAULT_SAMPLE_PERIOD = 0.01
+
+# Размер блока чтения из порта, байт
+READ_CHUNK = 4096
+
+# Предельная длина строки отсчета, байт: более длинный хвост без перевода
+# строки отбрасывается, прием продолжается со следующей строки
+MAX_LINE_LENGTH = 256
+
+
+class MedSample:
+    """Отсчет динамометра: значение и время приема (time.time)"""
+    __slots__ = ("value", "timestamp")
+
+    def __init__(self, value: float, timestamp: float):
+        self.value = value
+        self.timestamp = timestamp
+
+    def __repr__(self) -> str:
+        return f"MedSample({self.value}, {self.timestamp:.3f})"
+
+
+@logged(name="med_stream", level=logging.DEBUG)
+class MedStreamReader:
+    """Потоковое чтение НПО 'МЭД' по RS-232
+
+    Порт открывается один раз, фоновый поток читает все поступающие байты,
+    делит их на строки и кладет отсчеты с меткой времени в ограниченную
+    очередь. Потребители забирают отсчеты через get/drain или итерацией
+    """
+
+    def __init__(self, port: str, baudrate: int = 9600, bytesize: int = 8, parity: str = 'N', stopbits: int = 1,
+                 maxsize: int = DEFAULT_QUEUE_SIZE):
+        self.log.info(f"=== Инициализация объекта MedStreamReader ({port}) ===")
+        self.port = port
+        self.baudrate = baudrate
+        self.bytesize = bytesize
+        self.parity = parity
+        self.stopbits = stopbits
+        self.samples: "queue.Queue[MedSample]" = queue.Queue(maxsize)
+        self.latest: Optional[MedSample] = None
+        self.received = 0
+        self.dropped = 0
+        self.malformed = 0
+        self.error: Optional[Exception] = None
+        self._serial: Optional[serial.Serial] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = threading.Event()
+
+    def start(self) -> None:
+        """Открытие порта и запуск потока чтения"""
+        if self._thread is not None:
+            return
+
+        try:
+            self._serial = serial.Serial(self.port, self.baudrate, bytesize=self.bytesize, parity=self.parity,
+                                         stopbits=self.stopbits, timeout=0.1)
+        except serial.SerialException as e:
+            self.log.exception(f"Ошибка при открытии порта {self.port}: {e}")
+            raise DeviceDisconnectedError(f"Ошибка при открытии порта {self.port}: {e}") from e
+
+        self.error = None
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name=f"med-{self.port}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Остановка потока и закрытие порта"""
+        if self._thread is None:
+            return
+
+        self._running.clear()
+        self._thread.join(timeout)
+        self._thread = None
+        if self._serial is not None:
+            self._serial.close()
+            self._serial = None
+
+    def get(self, timeout: Optional[float] = None) -> MedSample:
+        """Следующий отсчет; DeviceDisconnectedError, если данных нет timeout секунд"""
+        try:
+            return self.samples.get(timeout=timeout)
+        except queue.Empty:
+            self._raise_if_failed()
+            raise DeviceDisconnectedError(f"Нет данных из порта {self.port} за {timeout} с") from None
+
+    def drain(self, timeout: Optional[float] = None) -> List[MedSample]:
+        """Все накопленные отсчеты; ожидание первого не дольше timeout"""
+        batch = [self.get(timeout)]
+        while True:
+            try:
+                batch.append(self.samples.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def stats(self) -> Dict[str, int]:
+        return {"received": self.received, "dropped": self.dropped, "malformed": self.malformed,
+                "queued": self.samples.qsize()}
+
+    def __iter__(self) -> Iterator[MedSample]:
+        while self._running.is_set() or not self.samples.empty():
+            try:
+                yield self.samples.get(timeout=0.1)
+            except queue.Empty:
+                self._raise_if_failed()
+
+    def __enter__(self) -> "MedStreamReader":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def _raise_if_failed(self) -> None:
+        if self.error is not None:
+            raise DeviceDisconnectedError(f"Устройство на порту {self.port} отключено: {self.error}") from self.error
+
+    def _run(self) -> None:
+        buffer = bytearray()
+        resync = False
+        ser = self._serial
+
+        while self._running.is_set():
+            try:
+                chunk = ser.read(min(max(ser.in_waiting, 1), READ_CHUNK))
+            except serial.SerialException as e:
+                self.log.exception(f"Ошибка при работе с портом {self.port}: {e}")
+                self.error = e
+                self._running.clear()
+                break
+
+            if not chunk:
+                continue
+
+            stamp = time.time()
+            buffer += chunk
+            end = buffer.rfind(b"\n")
+            if end >= 0:
+                lines = buffer[:end].split(b"\n")
+                del buffer[:end + 1]
+                # После сброса первая строка - окончание отброшенной, она пропускается
+                for line in (lines[1:] if resync else lines):
+                    self._push(line, stamp)
+                resync = False
+
+            if len(buffer) > MAX_LINE_LENGTH:
+                # Поток без перевода строки (неверная скорость порта, помехи)
+                self.malformed += 1
+                self.log.warning(f"Строка из порта {self.port} длиннее {MAX_LINE_LENGTH} байт, буфер сброшен")
+                buffer.clear()
+                resync = True
+
+    def _push(self, line: bytearray, stamp: float) -> None:
+        line = line.strip()
+        if not line:
+            return
+
+        try:
+            sample = MedSample(float(line), stamp)
+        except ValueError:
+            self.malformed += 1
+            self.log.debug(f"Некорректная строка из порта {self.port}: {bytes(line)!r}")
+            return
+
+        self.received += 1
+        self.latest = sample
+        while True:
+            try:
+                self.samples.put_nowait(sample)
+                return
+            except queue.Full:
+                # Потребитель не успевает: вытесняется самый старый отсчет
+                try:
+                    self.samples.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
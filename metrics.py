@@ -0,0 +1,295 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from Logger.logger import logged
+
+# Границы корзин гистограммы времени транзакции, секунды
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Адрес HTTP-экспортера по умолчанию
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 9108
+
+# Служебные байты кадра: MBAP (7) для TCP, адрес и CRC (3) для RTU
+TCP_FRAME_OVERHEAD = 7
+RTU_FRAME_OVERHEAD = 3
+
+OUTCOME_OK = "ok"
+OUTCOME_EXCEPTION = "exception"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_ERROR = "error"
+
+MetricKey = Tuple[str, int, int]
+
+
+def pdu_sizes(function_code: int, count: int, exception: bool = False) -> Tuple[int, int]:
+    """Размер PDU запроса и ответа для функций 03 и 16"""
+    if function_code == 16:
+        request, response = 6 + 2 * count, 5
+    else:
+        request, response = 5, 2 + 2 * count
+    return request, 2 if exception else response
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами
+
+    Обновление - поиск корзины и три инкремента без блокировок: под GIL
+    отдельное наблюдение может потеряться только при одновременной записи
+    из нескольких потоков в одну гистограмму, что допустимо для метрик
+    """
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Накопленные значения корзин в формате Prometheus (le -> count)"""
+        result, total = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Оценка квантиля по верхней границе корзины"""
+        if not self.count:
+            return None
+        rank, total = q * self.count, 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            if total >= rank:
+                return bound
+        return float("inf")
+
+
+class DeviceMetrics:
+    """Счетчики одного устройства и кода функции"""
+    __slots__ = ("requests", "outcomes", "exception_codes", "bytes_sent", "bytes_received", "latency")
+
+    def __init__(self):
+        self.requests = 0
+        self.outcomes: Dict[str, int] = {}
+        self.exception_codes: Dict[int, int] = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = Histogram()
+
+
+class MetricsRegistry:
+    """Метрики транзакций Modbus по устройствам, кодам функций и шинам"""
+
+    def __init__(self):
+        self.devices: Dict[MetricKey, DeviceMetrics] = {}
+        self.bus_busy: Dict[str, float] = {}
+        self.shared_reads: Dict[Tuple[str, int], List[float]] = {}
+        self.breaker_states: Dict[str, str] = {}
+        self.breaker_transitions: Dict[Tuple[str, str], int] = {}
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint: str, slave_id: int, function_code: int, latency: float,
+                bytes_sent: int, bytes_received: int, outcome: str = OUTCOME_OK,
+                exception_code: Optional[int] = None, bus: Optional[str] = None) -> None:
+        """Учет одной транзакции; bus - имя последовательного порта для загрузки шины"""
+        key = (endpoint, slave_id, function_code)
+        metrics = self.devices.get(key)
+        if metrics is None:
+            with self._lock:
+                metrics = self.devices.setdefault(key, DeviceMetrics())
+
+        metrics.requests += 1
+        metrics.outcomes[outcome] = metrics.outcomes.get(outcome, 0) + 1
+        if exception_code is not None:
+            metrics.exception_codes[exception_code] = metrics.exception_codes.get(exception_code, 0) + 1
+        metrics.bytes_sent += bytes_sent
+        metrics.bytes_received += bytes_received
+        metrics.latency.observe(latency)
+
+        if bus is not None:
+            self.bus_busy[bus] = self.bus_busy.get(bus, 0.0) + latency
+
+    def observe_shared(self, endpoint: str, slave_id: int, reads: int, saved_seconds: float) -> None:
+        """Учет чтений, получивших результат уже выполняемой транзакции"""
+        with self._lock:
+            counters = self.shared_reads.setdefault((endpoint, slave_id), [0, 0.0])
+            counters[0] += reads
+            counters[1] += saved_seconds
+
+    def observe_breaker(self, device: str, state: str) -> None:
+        """Переход предохранителя устройства (closed / open / half_open)"""
+        with self._lock:
+            self.breaker_states[device] = state
+            key = (device, state)
+            self.breaker_transitions[key] = self.breaker_transitions.get(key, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Снимок всех метрик в виде словаря"""
+        uptime = time.monotonic() - self.started
+        devices = []
+        for (endpoint, slave_id, function_code), metrics in list(self.devices.items()):
+            devices.append({
+                "endpoint": endpoint,
+                "slave_id": slave_id,
+                "function_code": function_code,
+                "requests": metrics.requests,
+                "outcomes": dict(metrics.outcomes),
+                "exception_codes": dict(metrics.exception_codes),
+                "bytes_sent": metrics.bytes_sent,
+                "bytes_received": metrics.bytes_received,
+                "latency_sum": metrics.latency.sum,
+                "latency_p50": metrics.latency.quantile(0.5),
+                "latency_p99": metrics.latency.quantile(0.99),
+                "busy_share": metrics.latency.sum / uptime if uptime else 0.0,
+            })
+        buses = {port: {"busy_seconds": busy, "utilization": busy / uptime if uptime else 0.0}
+                 for port, busy in list(self.bus_busy.items())}
+        shared = [{"endpoint": endpoint, "slave_id": slave_id, "reads": reads, "saved_seconds": saved}
+                  for (endpoint, slave_id), (reads, saved) in list(self.shared_reads.items())]
+        breakers = {device: {"state": state,
+                             "transitions": {s: n for (d, s), n in list(self.breaker_transitions.items()) if d == device}}
+                    for device, state in list(self.breaker_states.items())}
+        return {"uptime": uptime, "devices": devices, "buses": buses, "shared_reads": shared, "breakers": breakers}
+
+    def render_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus"""
+        lines = []
+
+        def header(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        items = sorted(self.devices.items())
+
+        header("modbus_requests_total", "counter", "Modbus transactions")
+        for key, metrics in items:
+            lines.append(f"modbus_requests_total{{{_labels(key)}}} {metrics.requests}")
+
+        header("modbus_responses_total", "counter", "Modbus transactions by outcome")
+        for key, metrics in items:
+            for outcome, count in sorted(metrics.outcomes.items()):
+                lines.append(f'modbus_responses_total{{{_labels(key)},outcome="{outcome}"}} {count}')
+
+        header("modbus_exception_codes_total", "counter", "Modbus exception responses by code")
+        for key, metrics in items:
+            for code, count in sorted(metrics.exception_codes.items()):
+                lines.append(f'modbus_exception_codes_total{{{_labels(key)},code="{code}"}} {count}')
+
+        header("modbus_bytes_total", "counter", "Bytes on the wire including framing")
+        for key, metrics in items:
+            lines.append(f'modbus_bytes_total{{{_labels(key)},direction="tx"}} {metrics.bytes_sent}')
+            lines.append(f'modbus_bytes_total{{{_labels(key)},direction="rx"}} {metrics.bytes_received}')
+
+        header("modbus_request_duration_seconds", "histogram", "Modbus transaction latency")
+        for key, metrics in items:
+            labels = _labels(key)
+            for bound, count in metrics.latency.cumulative():
+                lines.append(f'modbus_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"modbus_request_duration_seconds_sum{{{labels}}} {metrics.latency.sum}")
+            lines.append(f"modbus_request_duration_seconds_count{{{labels}}} {metrics.latency.count}")
+
+        shared = sorted(self.shared_reads.items())
+        header("modbus_shared_reads_total", "counter", "Reads answered by an identical in-flight transaction")
+        for (endpoint, slave_id), (reads, _) in shared:
+            lines.append(f'modbus_shared_reads_total{{endpoint="{_escape(endpoint)}",slave="{slave_id}"}} {reads}')
+        header("modbus_shared_reads_saved_seconds_total", "counter", "Transaction time saved by shared reads")
+        for (endpoint, slave_id), (_, saved) in shared:
+            lines.append(f'modbus_shared_reads_saved_seconds_total{{endpoint="{_escape(endpoint)}",slave="{slave_id}"}} {saved}')
+
+        header("modbus_device_quarantined", "gauge", "1 while the device is quarantined by its circuit breaker")
+        for device, state in sorted(self.breaker_states.items()):
+            lines.append(f'modbus_device_quarantined{{device="{_escape(device)}"}} {0 if state == "closed" else 1}')
+        header("modbus_breaker_transitions_total", "counter", "Circuit breaker transitions by target state")
+        for (device, state), count in sorted(self.breaker_transitions.items()):
+            lines.append(f'modbus_breaker_transitions_total{{device="{_escape(device)}",state="{state}"}} {count}')
+
+        uptime = time.monotonic() - self.started
+        header("modbus_bus_busy_seconds_total", "counter", "Time the serial bus spent in transactions")
+        for port, busy in sorted(self.bus_busy.items()):
+            lines.append(f'modbus_bus_busy_seconds_total{{port="{_escape(port)}"}} {busy}')
+        header("modbus_bus_utilization", "gauge", "Share of time the serial bus was busy since start")
+        for port, busy in sorted(self.bus_busy.items()):
+            lines.append(f'modbus_bus_utilization{{port="{_escape(port)}"}} {busy / uptime if uptime else 0.0}')
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self.devices.clear()
+            self.bus_busy.clear()
+            self.shared_reads.clear()
+            self.breaker_states.clear()
+            self.breaker_transitions.clear()
+            self.started = time.monotonic()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(key: MetricKey) -> str:
+    endpoint, slave_id, function_code = key
+    return f'endpoint="{_escape(endpoint)}",slave="{slave_id}",function="{function_code}"'
+
+
+# Реестр, в который пишут все клиенты по умолчанию
+REGISTRY = MetricsRegistry()
+
+
+@logged(name="metrics", level=logging.DEBUG)
+class MetricsServer:
+    """HTTP-экспортер метрик: GET /metrics в формате Prometheus"""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._server is not None:
+            return
+
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        self.log.info(f"Метрики доступны на http://{self.host}:{self.port}/metrics")
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
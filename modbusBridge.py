@@ -2,10 +2,25 @@ from system_info import SystemInfo
 from config.devices import devices
 from readers.mb210101_reader import InfoReaderMB210101
 from readers.tpm10_reader import InfoReaderTPM10
-from tcp_client import PyModbusClientTCP
-from rtu_client import PyModbusClientRTU
+from connection_pool import ConnectionPool
+from med_stream import MedStreamReader, DEFAULT_SAMPLE_PERIOD
+from tag_history import TagHistory
+from historian import Historian
+from export_sinks import SinkPipeline
+from profiling import CycleProfiler
+from metrics import MetricsServer
+from bridge_server import BridgeServer
+from rtu_gateway import RtuGateway
+from circuit_breaker import DeviceBreakers, BreakerState
+from change_filter import ChangeFilter
+from async_poller import AsyncPollingEngine, PollTarget
+from tag_scheduler import TagScheduler, Tag
+from config.register_map import MB210_101, TPM10, ACCESS_READ_ONLY, RegisterField
+from write_batch import WriteBatch, WriteResult
+import asyncio
+import signal
 import serial.tools.list_ports
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional
 import time
 import sys
 import msvcrt
@@ -13,6 +28,61 @@ from exceptions import DeviceWorkError, DeviceDisconnectedError
 import logging
 from Logger.logger import log_function_call
 
+# Соединения переиспользуются всеми устройствами и циклами опроса
+pool = ConnectionPool()
+
+# Недавняя история значений по тегам - источник данных вместо повторного опроса;
+# емкость буфера тега - глубина истории, деленная на период опроса тега
+history = TagHistory()
+
+# Долговременный архив на диске, запись в фоновом потоке
+historian = Historian()
+
+# Выгрузка значений: приемники добавляются через exporter.add(CsvSink(...)/SqliteSink(...)/ParquetSink(...))
+exporter = SinkPipeline()
+
+# Профилирование циклов опроса по запросу: SIGUSR1 или файл profiles/profile.request
+profiler = CycleProfiler()
+
+# Метрики транзакций в формате Prometheus: http://127.0.0.1:9108/metrics
+metrics_server = MetricsServer()
+
+def forward_write(device: Dict[str, Any], field: RegisterField, value: Any) -> None:
+    """Запись значения, пришедшего в сервер моста, в полевое устройство"""
+    with pool.lease(device) as client:
+        result = WriteBatch(client, device["device_id"]).set_field(field, value).commit()[field.address]
+    if not result.ok:
+        raise result.error
+
+@log_function_call(name="modbusBridge", level=logging.DEBUG)
+def configure_device(device: Dict[str, Any], settings: Dict[str, Any], channels: Iterable[int] = (1,),
+                     verify: bool = True) -> Dict[int, WriteResult]:
+    """Пакетная запись настроек {имя поля: значение} в каждый из каналов с проверкой обратным чтением"""
+    register_map = MB210_101 if device["type"] == "tcp" else TPM10
+    with pool.lease(device) as client:
+        batch = WriteBatch(client, device["device_id"], register_map)
+        for channel in channels:
+            for name, value in settings.items():
+                batch.set(name, value, channel)
+        results = batch.commit(verify)
+
+    for result in results.values():
+        if not result.ok:
+            print(f" {result}")
+    print(f" {device['name']}: записано {sum(result.ok for result in results.values())} из {len(results)} полей")
+    return results
+
+# Карантин неотвечающих устройств: пропуск при опросе и проверка с растущей паузой
+breakers = DeviceBreakers()
+breakers.subscribe(lambda event: print(f"\n {event}"))
+
+# Передача по изменению: потребители получают значения, вышедшие за зону нечувствительности,
+# и каждое значение не реже раза в минуту; зоны тегов - changes.set_deadband("устройство[:адрес]", ...)
+changes = ChangeFilter(absolute=0.05)
+
+# Сервер Modbus TCP с последними значениями опроса: python modbusBridge.py --bridge
+bridge = BridgeServer(forward_write)
+
 @log_function_call(name="modbusBridge", level=logging.DEBUG)
 def read_all_system_info() -> None:
     """Чтение системных данных"""
@@ -36,40 +106,177 @@ def read_all_devices() -> None:
         print(f"{'=' * 50}")
 
         if name == "AnalogInputModul_TCP_Room1":
-            read_mb210_101(device)
+            read_modbus_device(device, read_mb210_101)
         elif name == "MeasureModuleMicroprocessor_RTU_Slave1":
-            read_tpm10(device)
+            read_modbus_device(device, read_tpm10)
         elif name == "ElectroDynamometer":
             constant_read_med(device)
         else:
             print(f"Для устройства {name} логика еще не прописана")
 
+@log_function_call(name="modbusBridge", level=logging.DEBUG)
+def read_modbus_device(device: Dict[str, Any], read) -> None:
+    """Чтение устройства через карантин: пропуск, пробный запрос или обычное чтение"""
+    name = device["name"]
+    state = breakers.check(name)
+    if state is BreakerState.OPEN:
+        print(f" Устройство в карантине, проверка через {breakers.retry_in(name):.1f} с")
+        return
+
+    try:
+        if state is BreakerState.HALF_OPEN:
+            probe_device(device)
+            breakers.record_success(name)
+        read(device)
+        breakers.record_success(name)
+    except Exception as e:
+        breakers.record_failure(name)
+        print(e)
+
+@log_function_call(name="modbusBridge", level=logging.DEBUG)
+def probe_device(device: Dict[str, Any]) -> None:
+    """Пробный запрос: один регистр первого опрашиваемого поля в обход кэша"""
+    register_map = MB210_101 if device["type"] == "tcp" else TPM10
+    address = min(field.address for field in register_map)
+    with pool.lease(device) as client:
+        client._read_registers(device["device_id"], address, 1, use_cache=False)
+
+def build_poll_targets() -> List[PollTarget]:
+    """Опрашиваемые поля Modbus-устройств из config/devices.py"""
+    targets = []
+    for device in devices:
+        name = device.get('name', 'Unknown')
+        if name == "AnalogInputModul_TCP_Room1":
+            targets.append(PollTarget(device, MB210_101.where(ACCESS_READ_ONLY)))
+        elif name == "MeasureModuleMicroprocessor_RTU_Slave1":
+            targets.append(PollTarget(device, TPM10.fields[0:3]))
+    return targets
+
+def publish_values(name: str, values: Dict[int, Any]) -> None:
+    """Передача результата опроса устройства истории, архиву, выгрузке и серверу моста"""
+    history.record(name, values)
+    historian.record(name, values)
+    exporter.submit_values(name, values)
+    bridge.update(name, values)
+
+@log_function_call(name="modbusBridge", level=logging.DEBUG)
+def poll_tags(duration: Optional[float] = None) -> None:
+    """Опрос с периодом каждого регистра: python modbusBridge.py --tags
+
+    Измеряемые значения MB210-101 читаются не чаще периода измерения своего
+    канала (регистр "Период измерения входа"), настройки - раз в минуту
+    """
+    print("\n Опрос регистров с индивидуальным периодом...")
+    scheduler = TagScheduler()
+    for target in build_poll_targets():
+        device = target.device
+        if device["type"] != "tcp":
+            scheduler.add_fields(device, target.fields)
+            continue
+
+        scheduler.add_fields(device, MB210_101)
+        period_fields = [MB210_101.field("Период измерения входа", channel)
+                         for channel in range(1, MB210_101.channels + 1)]
+        try:
+            with pool.lease(device) as client:
+                periods = scheduler.autotune(client, device, period_fields)
+            print(f" {device['name']}: периоды измерения по каналам, с: {periods}")
+        except Exception as e:
+            print(f" {device['name']}: период измерения не прочитан: {e}")
+
+    for tag in scheduler.tags:
+        history.set_period(tag.name, tag.period)
+
+    def on_update(tags: List[Tag]) -> None:
+        by_device: Dict[str, Dict[int, Any]] = {}
+        for tag in tags:
+            by_device.setdefault(tag.device["name"], {})[tag.address] = tag.value
+        for name, values in by_device.items():
+            publish_values(name, values)
+            print(f" {name}: {values}")
+
+    scheduler.run(pool.lease, on_update, duration)
+
+@log_function_call(name="modbusBridge", level=logging.DEBUG)
+def poll_devices_async(cycles: Optional[int] = 1, interval: float = 1.0) -> None:
+    """Асинхронный опрос: TCP-устройства одновременно, каждый COM-порт отдельной линией"""
+
+    print("\n Асинхронный опрос устройств...")
+
+    def print_cycle(results: Dict[str, Any]) -> None:
+        for name, values in results.items():
+            if not isinstance(values, Exception):
+                publish_values(name, values)
+            print(f" {name}: {values}")
+
+    targets = build_poll_targets()
+    for target in targets:
+        history.set_period(target.device["name"], interval)
+
+    async def run() -> None:
+        engine = AsyncPollingEngine(targets, breakers=breakers, changes=changes, pool=pool)
+        try:
+            await engine.run(interval, cycles, print_cycle, profiler)
+        finally:
+            await engine.close()
+
+    asyncio.run(run())
+
+@log_function_call(name="modbusBridge", level=logging.DEBUG)
+def serve_bridge(interval: float = 1.0) -> None:
+    """Режим моста: непрерывный опрос и выдача значений как Modbus TCP slave
+
+    Каждое устройство из build_poll_targets доступно под своим unit ID;
+    чтения клиентов обслуживаются из памяти и не нагружают полевую шину
+    """
+    for target in build_poll_targets():
+        register_map = MB210_101 if target.device["type"] == "tcp" else TPM10
+        unit_id = bridge.add_device(target.device, register_map)
+        print(f" {target.device['name']}: unit ID {unit_id}")
+
+    bridge.start()
+    print(f"\n Сервер моста: {bridge.host}:{bridge.port}")
+    try:
+        poll_devices_async(cycles=None, interval=interval)
+    finally:
+        bridge.stop()
+
+@log_function_call(name="modbusBridge", level=logging.DEBUG)
+def serve_gateway() -> None:
+    """Режим шлюза: запросы клиентов Modbus TCP передаются на шины RTU по unit ID"""
+    gateway = RtuGateway((target.device for target in build_poll_targets()), pool=pool)
+    gateway.start()
+    print(f"\n Шлюз TCP-RTU: {gateway.host}:{gateway.port}, Enter - остановка")
+    try:
+        while not _stop_process():
+            time.sleep(0.2)
+    finally:
+        gateway.stop()
+        print(f" Статистика шлюза: {gateway.stats()}")
+
 @log_function_call(name="modbusBridge", level=logging.DEBUG)
 def read_mb210_101(device: Dict[str, Any]) -> None:
     """Логика для работы с MB210-101, он работает только по tcp"""
 
-    client = None
     try:
-        client = PyModbusClientTCP(device["ip"], device["port"])
-        if client.connect():
+        with pool.lease(device) as client:
+            # Тип датчика и прочие настройки каналов читаются из кэша
+            client.enable_cache().cache_fields(device["device_id"], MB210_101)
+
             info_reader = InfoReaderMB210101(client)
             for channel in range(1, 9):
                 info_reader.get_sensor_info(channel, device["device_id"])
 
     except Exception as e:
         raise DeviceWorkError(f"Ошибка работы с устройством {device["name"]}") from e
-    finally:
-        if client:
-            client.disconnect()
 
 @log_function_call(name="modbusBridge", level=logging.DEBUG)
 def read_tpm10(device: Dict[str, Any]) -> None:
     """Логика для работы с TPM10, он работает только по rtu, rs 485"""
 
-    client = None
     try:
-        client = PyModbusClientRTU(device["port"], device.get("baudrate", 9600), timeout=1)
-        if client.connect():
+        with pool.lease(device) as client:
+            client.enable_cache().cache_fields(device["device_id"], TPM10)
             registers = client._read_registers(device["device_id"], 1, 2)
             print(registers)
             info_reader = InfoReaderTPM10(client)
@@ -77,40 +284,50 @@ def read_tpm10(device: Dict[str, Any]) -> None:
 
     except Exception as e:
         raise DeviceWorkError(f"Ошибка работы с устройством {device["name"]}") from e
-    finally:
-        if client:
-            client.disconnect()
 
 @log_function_call(name="modbusBridge", level=logging.DEBUG)
 def constant_read_med(device: Dict[str, Any]) -> None:
-    """Логика постоянного отслеживания данных НПО 'МЭД'"""
+    """Логика постоянного отслеживания данных НПО 'МЭД', он работает по rs 232"""
 
-    while True:
-        if _stop_process():
-            print()
-            break
+    name = device["name"]
+    reader = MedStreamReader(device["port"], device["baudrate"], device["bytesize"], device["parity"], device["stopbits"])
+    history.set_period(name, device.get("sample_period", DEFAULT_SAMPLE_PERIOD))
+    try:
+        while True:
+            if _stop_process():
+                print()
+                break
 
-        data = _read_med(device)
-        if data:
-            print(f"Значение: {data}", end=" ")
-        else:
-            raise DeviceDisconnectedError(f"Устройство {device["name"]} отключено")
+            # Пропавший динамометр не прерывает мониторинг: порт переоткрывается при проверках
+            if breakers.check(name) is BreakerState.OPEN:
+                time.sleep(0.1)
+                continue
 
-        time.sleep(0.1)
-        _clean_stdout()
+            try:
+                reader.start()
+                with profiler.cycle():
+                    # Отсчеты копятся в очереди потока чтения, на экран выводится последний
+                    samples = reader.drain(timeout=1)
+                    history.extend(name, samples)
+                    historian.extend(name, samples)
+                    exporter.submit_samples(name, samples)
+                    print(f"Значение: {samples[-1].value}", end=" ")
+                breakers.record_success(name)
+            except DeviceDisconnectedError as e:
+                breakers.record_failure(name)
+                print(f"\n{e}")
+                if reader.error is not None:
+                    reader.stop()
+                continue
 
-@log_function_call(name="modbusBridge", level=logging.DEBUG)
-def _read_med(device: Dict[str, Any]) -> str | None:
-    """Внутренняя функция: Логика для работы с НПО 'МЭД', он работает по rs 232"""
+            time.sleep(0.1)
+            _clean_stdout()
+    finally:
+        reader.stop()
 
-    try:
-        with serial.Serial(device["port"], device["baudrate"], timeout=1) as ser:
-            data = str(ser.readline()).strip("b'rn\\")
-            return data if data else None
-    except serial.SerialTimeoutException:
-        raise serial.SerialTimeoutException(f"Таймаут при чтении из порта {device["port"]}")
-    except serial.SerialException as e:
-        raise serial.SerialException(f"Ошибка при работе с портом {device["port"]}: {e}")
+    stats = reader.stats()
+    if stats["dropped"] or stats["malformed"]:
+        print(f"Потеряно отсчетов: {stats['dropped']}, некорректных строк: {stats['malformed']}")
 
 @log_function_call(name="modbusBridge", level=logging.DEBUG)
 def _stop_process() -> bool:
@@ -132,13 +349,33 @@ def main():
     print(" === Программа для работы по протоколам Modbus TCP/RTU === ")
     print("=" * 60)
 
+    historian.start()
+    exporter.start()
+    if hasattr(signal, "SIGUSR1"):
+        profiler.install_signal(signal.SIGUSR1)
     try:
-        read_all_system_info()
-        read_all_devices()
+        metrics_server.start()
+    except OSError as e:
+        print(f"Экспортер метрик не запущен: {e}")
+    try:
+        if "--bridge" in sys.argv[1:]:
+            serve_bridge()
+        elif "--gateway" in sys.argv[1:]:
+            serve_gateway()
+        elif "--tags" in sys.argv[1:]:
+            poll_tags()
+        else:
+            read_all_system_info()
+            read_all_devices()
     except Exception as e:
         print(e)
     except KeyboardInterrupt:
         print(f"\n\nЧтение прервано (Ctrl+C)")
+    finally:
+        pool.close_all()
+        historian.close()
+        exporter.close()
+        metrics_server.stop()
 
     print("\n == Программа успешно завершилась == ")
 
@@ -0,0 +1,248 @@
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Optional
+from Logger.logger import logged
+
+# Каталог результатов профилирования
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+
+# Управляющий файл: строка "<режим> [число циклов]", например "sample 20"
+DEFAULT_CONTROL_FILE = os.path.join(DEFAULT_DIR, "profile.request")
+
+# Период проверки управляющего файла, секунды
+DEFAULT_CHECK_INTERVAL = 1.0
+
+# Период снятия стека в режиме sample, секунды
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+DEFAULT_CYCLES = 10
+
+MODE_CPROFILE = "cprofile"
+MODE_SAMPLE = "sample"
+MODE_TRACEMALLOC = "tracemalloc"
+MODES = (MODE_CPROFILE, MODE_SAMPLE, MODE_TRACEMALLOC)
+
+# Число строк разницы снимков памяти в отчете
+TRACEMALLOC_TOP = 25
+
+
+class _NullCycle:
+    """Контекст цикла при выключенном профилировании"""
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_CYCLE = _NullCycle()
+
+
+class _Sampler(threading.Thread):
+    """Выборочный профилировщик: стек потока опроса раз в interval"""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="profiler-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.sampling = False
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            if not self.sampling:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+@logged(name="profiling", level=logging.DEBUG)
+class _Session:
+    """Профилирование заданного числа циклов одним способом"""
+
+    def __init__(self, mode: str, cycles: int, output_dir: str, sample_interval: float):
+        self.mode = mode
+        self.remaining = cycles
+        self.prefix = os.path.join(output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{mode}")
+        self.profile: Optional[cProfile.Profile] = None
+        self.sampler: Optional[_Sampler] = None
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.started_tracemalloc = False
+        self.cycle = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+        if mode == MODE_CPROFILE:
+            self.profile = cProfile.Profile()
+        elif mode == MODE_SAMPLE:
+            self.sampler = _Sampler(threading.get_ident(), sample_interval)
+            self.sampler.start()
+        elif mode == MODE_TRACEMALLOC:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(10)
+                self.started_tracemalloc = True
+            self.snapshot = tracemalloc.take_snapshot()
+
+    def begin(self) -> None:
+        if self.profile is not None:
+            self.profile.enable()
+        elif self.sampler is not None:
+            self.sampler.sampling = True
+
+    def end(self) -> bool:
+        """Конец цикла; True, если сеанс завершен"""
+        if self.profile is not None:
+            self.profile.disable()
+        elif self.sampler is not None:
+            self.sampler.sampling = False
+        elif self.snapshot is not None:
+            self._write_memory_diff()
+
+        self.cycle += 1
+        self.remaining -= 1
+        if self.remaining > 0:
+            return False
+
+        self.finish()
+        return True
+
+    def finish(self) -> None:
+        if self.profile is not None:
+            self.profile.dump_stats(f"{self.prefix}.pstats")
+            self.log.info(f"Профиль записан: {self.prefix}.pstats")
+        elif self.sampler is not None:
+            self.sampler.stop()
+            with open(f"{self.prefix}.collapsed", "w", encoding="utf-8") as f:
+                for stack, count in self.sampler.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            self.log.info(f"Профиль записан: {self.prefix}.collapsed")
+        elif self.started_tracemalloc:
+            tracemalloc.stop()
+
+    def _write_memory_diff(self) -> None:
+        snapshot = tracemalloc.take_snapshot()
+        diff = snapshot.compare_to(self.snapshot, "lineno")
+        self.snapshot = snapshot
+
+        current, peak = tracemalloc.get_traced_memory()
+        with open(f"{self.prefix}.txt", "a", encoding="utf-8") as f:
+            f.write(f"=== Цикл {self.cycle + 1}: {current / 1024:.1f} КиБ, пик {peak / 1024:.1f} КиБ ===\n")
+            for stat in diff[:TRACEMALLOC_TOP]:
+                f.write(f"{stat}\n")
+
+
+class _ProfiledCycle:
+    def __init__(self, profiler: "CycleProfiler"):
+        self.profiler = profiler
+
+    def __enter__(self):
+        self.profiler._session.begin()
+        return self.profiler._session
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.profiler._session.end():
+            self.profiler._session = None
+        return False
+
+
+@logged(name="profiling", level=logging.DEBUG)
+class CycleProfiler:
+    """Профилирование циклов опроса по запросу
+
+    Цикл оборачивается в `with profiler.cycle():`. Запрос на профилирование
+    следующих N циклов подается сигналом (install_signal), управляющим
+    файлом или методом request. Режимы: cprofile (файл .pstats), sample
+    (свернутые стеки .collapsed для flame graph), tracemalloc (разница
+    снимков памяти между циклами, .txt). Без запроса cycle() возвращает
+    пустой контекст, управляющий файл проверяется не чаще check_interval
+    """
+
+    def __init__(self, output_dir: str = DEFAULT_DIR, control_file: Optional[str] = DEFAULT_CONTROL_FILE,
+                 check_interval: float = DEFAULT_CHECK_INTERVAL, sample_interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.output_dir = output_dir
+        self.control_file = control_file
+        self.check_interval = check_interval
+        self.sample_interval = sample_interval
+        self._session: Optional[_Session] = None
+        self._requested: Optional[tuple] = None
+        self._next_check = 0.0
+        self._context = _ProfiledCycle(self)
+
+    def request(self, mode: str = MODE_CPROFILE, cycles: int = DEFAULT_CYCLES) -> None:
+        """Профилирование следующих cycles циклов"""
+        if mode not in MODES:
+            raise ValueError(f"Неизвестный режим профилирования: {mode}")
+        if cycles < 1:
+            raise ValueError(f"cycles должен быть не меньше 1, получено: {cycles}")
+        self._requested = (mode, cycles)
+
+    def install_signal(self, signum: int, mode: str = MODE_CPROFILE, cycles: int = DEFAULT_CYCLES) -> None:
+        """Запрос профилирования по сигналу (например, signal.SIGUSR1)"""
+        import signal
+        signal.signal(signum, lambda *_: self.request(mode, cycles))
+
+    @property
+    def active(self) -> bool:
+        return self._session is not None
+
+    def cycle(self):
+        """Контекст одного цикла опроса"""
+        if self._session is None:
+            if self._requested is None and not self._check_control_file():
+                return _NULL_CYCLE
+
+            mode, cycles = self._requested
+            self._requested = None
+            self.log.info(f"Профилирование {mode}: {cycles} циклов")
+            self._session = _Session(mode, cycles, self.output_dir, self.sample_interval)
+
+        return self._context
+
+    def stop(self) -> None:
+        """Досрочное завершение сеанса с записью результатов"""
+        if self._session is not None:
+            self._session.finish()
+            self._session = None
+
+    def _check_control_file(self) -> bool:
+        if self.control_file is None:
+            return False
+
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.check_interval
+
+        try:
+            with open(self.control_file, encoding="utf-8") as f:
+                words = f.read().split()
+            os.remove(self.control_file)
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            self.log.warning(f"Не удалось прочитать {self.control_file}: {e}")
+            return False
+
+        try:
+            self.request(words[0] if words else MODE_CPROFILE, int(words[1]) if len(words) > 1 else DEFAULT_CYCLES)
+        except ValueError as e:
+            self.log.warning(f"Некорректный запрос профилирования {words}: {e}")
+            return False
+        return True
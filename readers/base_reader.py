@@ -1,4 +1,6 @@
 import logging
+from typing import Any, Dict, Iterable, Optional
+from readers.read_planner import ReadPlanner
 from Logger.logger import logged
 
 @logged(name="base_reader", level=logging.DEBUG)
@@ -6,19 +8,36 @@ class InfoReader:
     def __init__(self, slave_client):
         self.log.info("=== Инициализация объекта InfoReader ===")
         self.slave = slave_client
+        self.planner = ReadPlanner(slave_client)
 
     def _read_sensor_parameter(self, address: int, data_type: str, device_id: int, count: int) -> None:
         """Чтение параметра датчика"""
         try:
-            self.log.debug(f"Чтение параметра: address={address}, type={data_type}, device={device_id}")
+            self.log.debug("Чтение параметра: address=%s, type=%s, device=%s", address, data_type, device_id)
 
             if data_type == "float":
                 value = self.slave.read_float(device_id, address, count=count)
             else:
                 value = self.slave.read_int(device_id, address, count=count)
 
-            self.log.debug(f"Из {address} прочитано значение: {value}")
+            self.log.debug("Из %s прочитано значение: %s", address, value)
             print(f"  {address}: {value}")
 
         except Exception as e:
             self.log.exception(e)
+
+    def _read_sensor_parameters(self, fields: Iterable[Dict[str, Any]], device_id: int, offset: int = 0) -> Optional[Dict[int, Any]]:
+        """Блочное чтение параметров датчика"""
+        try:
+            self.log.debug("Блочное чтение параметров: device=%s, offset=%s", device_id, offset)
+
+            values = self.planner.read(device_id, fields, offset)
+            for address, value in values.items():
+                self.log.debug("Из %s прочитано значение: %s", address, value)
+                print(f"  {address}: {value}")
+
+            return values
+
+        except Exception as e:
+            self.log.exception(e)
+            return None
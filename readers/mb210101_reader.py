@@ -1,19 +1,21 @@
 import logging
 from readers.base_reader import InfoReader
-from config.registers import registers_sensor_MB210_101
+from config.register_map import MB210_101, ACCESS_READ_ONLY
 from Logger.logger import logged
 
 @logged(name="mb210101_reader", level=logging.DEBUG)
 class InfoReaderMB210101(InfoReader):
     """Класс для чтения информации с устройств"""
-    def __init__(self):
+    def __init__(self, slave_client):
+        super().__init__(slave_client)
         self.log.info("=== Инициализация объекта InfoReaderMB210101 ===")
 
     def get_sensor_info(self, channel: int, device_id: int) -> bool:
         """Получение информации с датчика по каналу"""
         self.log.debug(f"Получение информации с устройтсва {device_id} по каналу {channel}")
 
-        value_type = self.slave.read_int(device_id, registers_sensor_MB210_101[3]["address"] + 3 * (channel - 1), count=2)
+        sensor_type = MB210_101.field("Тип датчика входа", channel)
+        value_type = self.planner.read(device_id, [sensor_type]).get(sensor_type.address)
 
         if value_type is None or value_type > 40:
             print(f" - Тип датчика по каналу {channel} не установлен - ")
@@ -24,8 +26,6 @@ class InfoReaderMB210101(InfoReader):
 
         self.log.debug(f"Чтение данных с регистров датчика {value_type}")
         # Всегда можно добавить читаемые регистры
-        self._read_sensor_parameter(registers_sensor_MB210_101[0]["address"] + 3 * (channel - 1), "float", device_id, 2)
-        self._read_sensor_parameter(registers_sensor_MB210_101[1]["address"] + 3 * (channel - 1), "int", device_id, 1)
-        self._read_sensor_parameter(registers_sensor_MB210_101[2]["address"] + 3 * (channel - 1), "int", device_id, 1)
+        self._read_sensor_parameters(MB210_101.where(ACCESS_READ_ONLY, channel), device_id)
 
-        return True
\ No newline at end of file
+        return True
@@ -0,0 +1,109 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from register_codec import compile_layout, register_width, RegisterLayout, DEFAULT_WORD_ORDER, DEFAULT_BYTE_ORDER
+from Logger.logger import logged
+
+# Ограничение функции 03 (Read Holding Registers) по спецификации Modbus
+MAX_READ_COUNT = 125
+
+# Промежуток из неиспользуемых регистров, который выгоднее прочитать,
+# чем отправлять еще одну транзакцию
+DEFAULT_MAX_GAP = 8
+
+
+class ReadSpan:
+    """Непрерывный блок регистров, читаемый одной транзакцией"""
+    __slots__ = ("address", "count", "fields", "_layouts")
+
+    def __init__(self, address: int, count: int, fields: List[Tuple[int, str]]):
+        self.address = address
+        self.count = count
+        self.fields = fields
+        self._layouts: Dict[Tuple[Optional[str], Optional[str]], RegisterLayout] = {}
+
+    def layout(self, word_order: Optional[str] = DEFAULT_WORD_ORDER, byte_order: Optional[str] = DEFAULT_BYTE_ORDER) -> RegisterLayout:
+        """Скомпилированная раскладка блока: ключ поля - его адрес"""
+        layout = self._layouts.get((word_order, byte_order))
+        if layout is None:
+            specs = tuple((address, address - self.address, data_type) for address, data_type in self.fields)
+            layout = compile_layout(specs, self.count, word_order, byte_order)
+            self._layouts[(word_order, byte_order)] = layout
+        return layout
+
+    def __repr__(self) -> str:
+        return f"ReadSpan(address={self.address}, count={self.count}, fields={len(self.fields)})"
+
+
+@logged(name="read_planner", level=logging.DEBUG)
+class ReadPlanner:
+    """Планировщик блочного чтения регистров
+
+    Объединяет поля из карт config/registers.py в минимальное число
+    непрерывных блоков и читает каждый блок одной транзакцией
+    """
+
+    def __init__(self, slave_client, max_gap: int = DEFAULT_MAX_GAP, max_count: int = MAX_READ_COUNT):
+        if not 1 <= max_count <= MAX_READ_COUNT:
+            raise ValueError(f"max_count должен быть в диапазоне 1-{MAX_READ_COUNT}, получено: {max_count}")
+        if max_gap < 0:
+            raise ValueError(f"max_gap не может быть отрицательным, получено: {max_gap}")
+
+        self.slave = slave_client
+        self.max_gap = max_gap
+        self.max_count = max_count
+
+    def plan(self, fields: Iterable[Dict[str, Any]], offset: int = 0) -> List[ReadSpan]:
+        """Разбиение полей на непрерывные блоки чтения"""
+        wanted = sorted({(field["address"] + offset, field["data_type"]) for field in fields})
+
+        spans: List[ReadSpan] = []
+        current = None
+        for address, data_type in wanted:
+            width = register_width(data_type)
+            end = address + width
+
+            if current is not None:
+                current_end = current.address + current.count
+                new_count = max(current_end, end) - current.address
+                if address - current_end <= self.max_gap and new_count <= self.max_count:
+                    current.count = new_count
+                    current.fields.append((address, data_type))
+                    continue
+
+            current = ReadSpan(address, width, [(address, data_type)])
+            spans.append(current)
+
+        self.log.debug("План чтения: %s полей -> %s транзакций", len(wanted), len(spans))
+        return spans
+
+    def decode(self, span: ReadSpan, registers: List[int], data_order: Optional[Tuple[Optional[str], Optional[str]]] = None) -> Dict[int, Any]:
+        """Разбор полей из прочитанного блока, результат: адрес -> значение"""
+        if registers is None or len(registers) < span.count:
+            self.log.exception(f"Неполный ответ для блока {span}")
+            raise ValueError(f"Неполный ответ для блока {span}")
+
+        return span.layout(*(data_order or (DEFAULT_WORD_ORDER, DEFAULT_BYTE_ORDER))).decode_dict(registers)
+
+    def read(self, device_id: int, fields: Iterable[Dict[str, Any]], offset: int = 0) -> Dict[int, Any]:
+        """Блочное чтение полей, результат: адрес -> значение
+
+        Если клиент ведет конвейер (pipeline_depth > 1), все блоки
+        отправляются одним пакетом read_batch
+        """
+        values: Dict[int, Any] = {}
+        data_order = self.slave.data_order(device_id) if hasattr(self.slave, "data_order") else None
+        spans = self.plan(fields, offset)
+
+        if getattr(self.slave, "pipeline_depth", 1) > 1 and len(spans) > 1:
+            replies = self.slave.read_batch([(device_id, span.address, span.count) for span in spans])
+            for span, registers in zip(spans, replies):
+                if isinstance(registers, Exception):
+                    raise registers
+                values.update(self.decode(span, registers, data_order))
+            return values
+
+        for span in spans:
+            registers = self.slave._read_registers(device_id, span.address, span.count)
+            values.update(self.decode(span, registers, data_order))
+
+        return values
@@ -0,0 +1,92 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from register_codec import register_width
+from Logger.logger import logged
+
+ACCESS_READ_WRITE = "Чтение и запись"
+
+# Время жизни закэшированного значения, секунды
+DEFAULT_TTL = 60.0
+
+
+@logged(name="register_cache", level=logging.DEBUG)
+class RegisterCache:
+    """Кэш регистров настройки с записью насквозь
+
+    Кэшируются только регистры, помеченные через cache_fields (по умолчанию
+    с доступом «Чтение и запись»). Чтение отдается из памяти, пока не истек
+    ttl; успешная запись обновляет кэш
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._lock = threading.Lock()
+        self._cacheable: Dict[int, Set[int]] = {}
+        self._values: Dict[Tuple[int, int], Tuple[int, float]] = {}
+
+    def cache_fields(self, slave_id: int, fields: Iterable[Dict[str, Any]], offset: int = 0,
+                     access: Optional[str] = ACCESS_READ_WRITE) -> None:
+        """Пометка полей карты регистров как кэшируемых (access=None - все поля)"""
+        with self._lock:
+            addresses = self._cacheable.setdefault(slave_id, set())
+            for field in fields:
+                if access is None or field.get("access") == access:
+                    start = field["address"] + offset
+                    addresses.update(range(start, start + register_width(field["data_type"])))
+
+    def is_cacheable(self, slave_id: int, address: int, count: int) -> bool:
+        addresses = self._cacheable.get(slave_id)
+        return bool(addresses) and all(a in addresses for a in range(address, address + count))
+
+    def get(self, slave_id: int, address: int, count: int) -> Optional[List[int]]:
+        """Регистры из кэша или None, если блок нужно читать с устройства"""
+        with self._lock:
+            if not self.is_cacheable(slave_id, address, count):
+                self.bypassed += 1
+                return None
+
+            now = time.monotonic()
+            registers = []
+            for a in range(address, address + count):
+                entry = self._values.get((slave_id, a))
+                if entry is None or entry[1] < now:
+                    self.misses += 1
+                    return None
+                registers.append(entry[0])
+
+            self.hits += 1
+            return registers
+
+    def put(self, slave_id: int, address: int, registers: List[int]) -> None:
+        """Сохранение прочитанных или записанных регистров"""
+        with self._lock:
+            addresses = self._cacheable.get(slave_id)
+            if not addresses:
+                return
+
+            expires = time.monotonic() + self.ttl
+            for a, value in enumerate(registers, start=address):
+                if a in addresses:
+                    self._values[(slave_id, a)] = (value, expires)
+
+    def invalidate(self, slave_id: int, address: int, count: int = 1) -> None:
+        with self._lock:
+            for a in range(address, address + count):
+                self._values.pop((slave_id, a), None)
+
+    def flush(self, slave_id: Optional[int] = None) -> None:
+        """Сброс кэша устройства (или всего кэша)"""
+        with self._lock:
+            if slave_id is None:
+                self._values.clear()
+            else:
+                for key in [k for k in self._values if k[0] == slave_id]:
+                    del self._values[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "bypassed": self.bypassed, "size": len(self._values)}
@@ -0,0 +1,214 @@
+import struct
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy нужен только для decode_many
+    np = None
+
+# Порядок слов и байт 32-битных значений по умолчанию (None) - исходный порядок
+# каждого типа, см. BASELINE_ORDERS. Порядок, заданный устройству, применяется
+# ко всем 32-битным типам
+DEFAULT_WORD_ORDER = None
+DEFAULT_BYTE_ORDER = None
+
+# Исходный порядок типа (на x86): float - старшее слово первым, байты младшим
+# вперед (BADC), как в read_float/write_float; целые - младшее слово первым
+# (CDAB), read_int отдавал младший регистр как значение
+BASELINE_ORDERS = {
+    "FLOAT 32": ("big", "little"),
+    "UINT 32": ("little", "big"),
+    "INT 32": ("little", "big"),
+}
+
+# Тип данных карты регистров -> (формат struct, число регистров)
+DATA_TYPES = {
+    "FLOAT 32": ("f", 2),
+    "UINT 32": ("I", 2),
+    "INT 32": ("i", 2),
+    "UINT 16": ("H", 1),
+    "INT 16": ("h", 1),
+}
+
+# Формат struct -> тип элемента NumPy (без порядка байт)
+NUMPY_TYPES = {"f": "f4", "I": "u4", "i": "i4", "H": "u2", "h": "i2"}
+
+_ORDERS = ("big", "little")
+
+FieldSpec = Tuple[Hashable, int, str]
+
+
+def register_width(data_type: str) -> int:
+    """Количество регистров, занимаемых типом данных"""
+    try:
+        return DATA_TYPES[data_type][1]
+    except KeyError:
+        raise ValueError(f"Неизвестный тип данных: {data_type}") from None
+
+
+def _struct_orders(word_order: Optional[str], byte_order: Optional[str]) -> Tuple[str, Dict[str, str]]:
+    """Порядок упаковки регистров в байты и порядок разбора каждого типа
+
+    Если регистры упаковать в байты с порядком pack, поля блока читаются
+    форматом с порядком своего типа, без перестановки слов. 16-битное
+    поле - это сам регистр, оно всегда читается с порядком pack
+    """
+    if word_order is None and byte_order is None:
+        baseline = {data_type: _struct_orders(*order) for data_type, order in BASELINE_ORDERS.items()}
+        # Исходные порядки float и целых упаковывают регистры одинаково
+        pack = baseline["FLOAT 32"][0]
+        orders = {data_type: pack for data_type in DATA_TYPES}
+        orders.update((data_type, type_orders[data_type]) for data_type, (_, type_orders) in baseline.items())
+        return pack, orders
+
+    if word_order not in _ORDERS or byte_order not in _ORDERS:
+        raise ValueError(f"Порядок должен быть 'big' или 'little', получено: {word_order}/{byte_order}")
+
+    unpack = '>' if word_order == "big" else '<'
+    pack = '>' if word_order == byte_order else '<'
+    return pack, {data_type: unpack if width == 2 else pack for data_type, (_, width) in DATA_TYPES.items()}
+
+
+def _block_format(order: str, fields: Sequence[Tuple[int, str]], count: int) -> str:
+    """Формат struct блока из count регистров с полями (смещение, тип); остальное - пропуск"""
+    fmt = [order]
+    position = 0
+    for offset, data_type in fields:
+        if offset > position:
+            fmt.append(f"{2 * (offset - position)}x")
+        code, width = DATA_TYPES[data_type]
+        fmt.append(code)
+        position = offset + width
+    if count > position:
+        fmt.append(f"{2 * (count - position)}x")
+    return "".join(fmt)
+
+
+class RegisterLayout:
+    """Скомпилированная раскладка блока регистров
+
+    Блок из count регистров упаковывается в байты одним вызовом struct и
+    разбирается заранее скомпилированными форматами - без цикла по
+    значениям на уровне Python. При перестановке байт в словах (BADC,
+    DCBA) 16-битные поля, а в исходном порядке - целые, разбираются вторым
+    форматом, поэтому keys упорядочены: сначала поля с порядком float,
+    затем остальные. Перекрывающиеся
+    поля (один регистр в двух толкованиях) разбираются по отдельности
+    """
+    __slots__ = ("count", "keys", "offsets", "data_types", "_registers", "_values", "_parts", "_dtype")
+
+    def __init__(self, fields: Iterable[FieldSpec], count: int = 0,
+                 word_order: Optional[str] = DEFAULT_WORD_ORDER, byte_order: Optional[str] = DEFAULT_BYTE_ORDER):
+        ordered = sorted(fields, key=lambda field: field[1])
+        pack, orders = _struct_orders(word_order, byte_order)
+
+        position = 0
+        overlapped = False
+        for key, offset, data_type in ordered:
+            if data_type not in DATA_TYPES:
+                raise ValueError(f"Неизвестный тип данных: {data_type}")
+            if offset < 0:
+                raise ValueError(f"Отрицательное смещение поля {key}: {offset}")
+            if offset < position:
+                overlapped = True
+            position = max(position, offset + DATA_TYPES[data_type][1])
+        self.count = max(count, position)
+
+        # Порядок разбора поля по его типу
+        def order(data_type: str) -> str:
+            return orders[data_type]
+
+        # Первая группа - поля с порядком float, вторая - с противоположным
+        primary = orders["FLOAT 32"]
+        secondary = '<' if primary == '>' else '>'
+        groups = [[field for field in ordered if order(field[2]) == primary],
+                  [field for field in ordered if order(field[2]) != primary]]
+        grouped = groups[0] + groups[1]
+
+        self.keys = tuple(field[0] for field in grouped)
+        self.offsets = tuple(field[1] for field in grouped)
+        self.data_types = tuple(field[2] for field in grouped)
+        self._registers = struct.Struct(f"{pack}{self.count}H")
+        self._values = None if overlapped else tuple(
+            struct.Struct(_block_format(group_order, [(offset, t) for _, offset, t in group], self.count))
+            for index, (group_order, group) in enumerate(zip((primary, secondary), groups)) if group or index == 0)
+        self._parts = tuple((struct.Struct(order(t) + DATA_TYPES[t][0]), 2 * offset)
+                            for offset, t in zip(self.offsets, self.data_types))
+        self._dtype = None
+        if np is not None:
+            self._dtype = np.dtype({
+                "names": [str(key) for key in self.keys],
+                "formats": [order(t) + NUMPY_TYPES[DATA_TYPES[t][0]] for t in self.data_types],
+                "offsets": [2 * offset for offset in self.offsets],
+                "itemsize": 2 * self.count,
+            })
+
+    def decode(self, registers: Sequence[int]) -> Tuple[Any, ...]:
+        """Значения полей блока в порядке keys"""
+        data = self._registers.pack(*registers[:self.count])
+        if self._values is None:
+            return tuple(part.unpack_from(data, offset)[0] for part, offset in self._parts)
+        if len(self._values) == 1:
+            return self._values[0].unpack(data)
+        return self._values[0].unpack(data) + self._values[1].unpack(data)
+
+    def decode_dict(self, registers: Sequence[int]) -> Dict[Hashable, Any]:
+        return dict(zip(self.keys, self.decode(registers)))
+
+    def decode_many(self, blocks) -> Any:
+        """Разбор множества блоков (двумерный массив n x count)
+
+        С NumPy возвращает структурированный массив с колонкой на поле,
+        без NumPy - список кортежей значений
+        """
+        if np is not None:
+            words = np.ascontiguousarray(blocks, dtype=self._registers.format[0] + "u2")
+            if words.ndim != 2 or words.shape[1] < self.count:
+                raise ValueError(f"Ожидается массив n x {self.count}, получено: {words.shape}")
+            return np.frombuffer(words[:, :self.count].tobytes(), dtype=self._dtype)
+
+        if self._values is None or len(self._values) > 1:
+            return [self.decode(block) for block in blocks]
+        data = b"".join(self._registers.pack(*block[:self.count]) for block in blocks)
+        return list(self._values[0].iter_unpack(data))
+
+    def encode(self, values: Sequence[Any]) -> List[int]:
+        """Регистры блока по значениям полей (в порядке keys); промежутки - нули"""
+        if self._values is not None and len(self._values) == 1:
+            return list(self._registers.unpack(self._values[0].pack(*values)))
+
+        data = bytearray(2 * self.count)
+        for (part, offset), value in zip(self._parts, values):
+            part.pack_into(data, offset, value)
+        return list(self._registers.unpack(data))
+
+
+def device_data_order(device: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """Порядок слов и байт устройства: ключи "word_order" и "byte_order" в config/devices.py
+
+    Без ключей - исходный порядок каждого типа; недостающий ключ берется из порядка float
+    """
+    if "word_order" not in device and "byte_order" not in device:
+        return DEFAULT_WORD_ORDER, DEFAULT_BYTE_ORDER
+    word_order, byte_order = BASELINE_ORDERS["FLOAT 32"]
+    return device.get("word_order", word_order), device.get("byte_order", byte_order)
+
+
+@lru_cache(maxsize=1024)
+def compile_layout(fields: Tuple[FieldSpec, ...], count: int = 0,
+                   word_order: Optional[str] = DEFAULT_WORD_ORDER, byte_order: Optional[str] = DEFAULT_BYTE_ORDER) -> RegisterLayout:
+    """Скомпилированная раскладка (с кэшированием одинаковых раскладок)"""
+    return RegisterLayout(fields, count, word_order, byte_order)
+
+
+def decode_value(data_type: str, registers: Sequence[int],
+                 word_order: Optional[str] = DEFAULT_WORD_ORDER, byte_order: Optional[str] = DEFAULT_BYTE_ORDER) -> Any:
+    """Значение одного поля по его регистрам"""
+    return compile_layout(((0, 0, data_type),), 0, word_order, byte_order).decode(registers)[0]
+
+
+def encode_value(data_type: str, value: Any,
+                 word_order: Optional[str] = DEFAULT_WORD_ORDER, byte_order: Optional[str] = DEFAULT_BYTE_ORDER) -> List[int]:
+    """Регистры для записи одного значения"""
+    return compile_layout(((0, 0, data_type),), 0, word_order, byte_order).encode((value,))
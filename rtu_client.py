@@ -1,9 +1,12 @@
 from base import ModbusBaseClient
+from link_health import DEFAULT_HEARTBEAT_INTERVAL
+from adaptive_timeout import DEFAULT_TIMEOUT, DEFAULT_TIMEOUT_FLOOR, DEFAULT_TIMEOUT_CEILING
+from line_timing import LineTiming
 from pymodbus.client import ModbusSerialClient
 from pymodbus.exceptions import ModbusException
 import serial
-import struct
-from config.devices import devices
+from register_codec import decode_value, encode_value
+from metrics import RTU_FRAME_OVERHEAD
 import logging
 from Logger.logger import logged
 
@@ -12,14 +15,28 @@ from Logger.logger import logged
 class PyModbusClientRTU(ModbusBaseClient):
     """Клиент Modbus RTU"""
 
-    def __init__(self, port="COM4", baudrate=9600, bytesize=8, parity='N', stopbits=1):
+    frame_overhead = RTU_FRAME_OVERHEAD
+
+    def __init__(self, port="COM4", baudrate=9600, bytesize=8, parity='N', stopbits=1,
+                 heartbeat_interval=DEFAULT_HEARTBEAT_INTERVAL, timeout=DEFAULT_TIMEOUT,
+                 timeout_floor=DEFAULT_TIMEOUT_FLOOR, timeout_ceiling=DEFAULT_TIMEOUT_CEILING):
+        super().__init__(heartbeat_interval, timeout, timeout_floor, timeout_ceiling)
         self.log.info("=== Инициализация объекта PyModbusClientRTU ===")
         self.port = port
         self.baudrate = baudrate
         self.bytesize = bytesize
         self.parity = parity
         self.stopbits = stopbits
-        self.client = None
+        self.timing = LineTiming(baudrate, bytesize, parity, stopbits)
+
+    def _endpoint(self) -> str:
+        return self.port
+
+    def _serial_bus(self) -> str:
+        return self.port
+
+    def _wire_time(self, function_code: int, count: int) -> float:
+        return self.timing.wire_time(function_code, count)
 
     def connect(self):
         """Установка соединения"""
@@ -31,7 +48,10 @@ class PyModbusClientRTU(ModbusBaseClient):
                 baudrate=self.baudrate,
                 bytesize=self.bytesize,
                 parity=self.parity,
-                stopbits=self.stopbits
+                stopbits=self.stopbits,
+                timeout=self.timeouts.initial,
+                # Повторы отключены: потерянный ответ стоит один адаптивный таймаут
+                retries=0
             )
 
             result = self.client.connect()
@@ -39,6 +59,7 @@ class PyModbusClientRTU(ModbusBaseClient):
                 self.log.exception(f"Ошибка подключения к порту {self.port}")
                 raise serial.SerialException(f"Ошибка подключения к порту {self.port}")
 
+            self.link.reset()
             print(f"Успешное подключение по {self.port}")
             self.log.debug(f"connect: успешное подключение по {self.port}")
 
@@ -49,25 +70,6 @@ class PyModbusClientRTU(ModbusBaseClient):
             self.log.exception(f"Ошибка подключения: {e}")
             raise ModbusException(f"Ошибка подключения: {e}") from e
 
-    def is_connected(self) -> bool:
-        """Проверка соединения"""
-        self.log.debug("Проверка соединения")
-
-        if self.client is None:
-            return False
-
-        try:
-            result = self.client.read_holding_registers(
-                address=1,
-                count=1,
-                device_id=devices[0]["device_id"]
-            )
-            self.log.debug(f"Соединение: {not result.isError()}")
-            return not result.isError()
-        except Exception as e:
-            self.log.exception(f"Ошибка соединения: {e}")
-            return False
-
 
     def read_int(self, slave_id: int, address: int, count: int = 1) -> int:
         """Чтение целочисленного значения"""
@@ -79,7 +81,7 @@ class PyModbusClientRTU(ModbusBaseClient):
             self.log.exception("Данные не получены с устройства")
             raise ValueError("Данные не получены с устройства")
 
-        self.log.debug(f"read_int: данные получены: {registers[0]}")
+        self.log.debug("read_int: данные получены: %s", registers[0])
         return registers[0]
 
     def read_float(self, slave_id: int, address: int, count: int = 2) -> float:
@@ -92,9 +94,9 @@ class PyModbusClientRTU(ModbusBaseClient):
             self.log.exception("Данные не получены с устройства")
             raise ValueError("Данные не получены с устройства")
 
-        value_float = struct.unpack('f', struct.pack('>HH', registers[1], registers[0]))[0]
+        value_float = decode_value("FLOAT 32", registers, *self.data_order(slave_id))
 
-        self.log.debug(f"read_float: данные получены: {value_float}")
+        self.log.debug("read_float: данные получены: %s", value_float)
         return value_float
 
     def write_int(self, slave_id: int, address: int, value_int: int) -> bool:
@@ -105,7 +107,7 @@ class PyModbusClientRTU(ModbusBaseClient):
         result = self._write_registers(slave_id, address, registers)
 
         if result:
-            self.log.debug(f"write_int: успешная запись значения {value_int} в регистр {address} устройства {slave_id}")
+            self.log.debug("write_int: успешная запись значения %s в регистр %s устройства %s", value_int, address, slave_id)
         else:
             self.log.exception(f"write_int: ошибка записи значения {value_int} в регистр {address} устройства {slave_id}")
 
@@ -115,15 +117,11 @@ class PyModbusClientRTU(ModbusBaseClient):
         """Запись значения с плавающей точкой"""
         self.log.debug("Запись значения с плавающей точкой")
 
-        float_bytes = struct.pack('f', value_float)
-        registers = [
-            struct.unpack('>H', float_bytes[2:4])[0],
-            struct.unpack('>H', float_bytes[0:2])[0]
-        ]
+        registers = encode_value("FLOAT 32", value_float, *self.data_order(slave_id))
         result = self._write_registers(slave_id, address, registers)
 
         if result:
-            self.log.debug(f"write_float: успешная запись значения {value_float} в регистр {address} устройства {slave_id}")
+            self.log.debug("write_float: успешная запись значения %s в регистр %s устройства %s", value_float, address, slave_id)
         else:
             self.log.exception(f"write_float: ошибка записи значения {value_float} в регистр {address} устройства {slave_id}")
 
@@ -0,0 +1,390 @@
+import asyncio
+import logging
+import struct
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+from pymodbus.exceptions import ModbusException, ModbusIOException
+import serial
+from bus_scheduler import SerialBusScheduler, DEFAULT_RECONNECT_DELAY, MAX_RECONNECT_DELAY
+from connection_pool import ConnectionPool
+from bridge_server import ILLEGAL_FUNCTION, ILLEGAL_DATA_VALUE, SERVER_DEVICE_FAILURE, GATEWAY_TARGET_FAILED
+from exceptions import ModbusExceptionResponse
+from Logger.logger import logged
+
+# Порт шлюза по умолчанию
+DEFAULT_PORT = 5021
+
+# Окно, в течение которого одинаковые и перекрывающиеся чтения объединяются, секунды
+DEFAULT_COALESCE_WINDOW = 0.005
+
+# Максимум ожидающих запросов одного клиента
+DEFAULT_MAX_PENDING = 32
+
+# Максимум регистров в одном объединенном чтении
+MAX_READ_COUNT = 125
+
+SERVER_DEVICE_BUSY = 0x06
+GATEWAY_PATH_UNAVAILABLE = 0x0A
+
+_MBAP = struct.Struct(">HHHB")
+
+BusKey = Tuple[Any, ...]
+
+
+class _GatewayError(Exception):
+    def __init__(self, code: int):
+        super().__init__(code)
+        self.code = code
+
+
+class _Request:
+    """Запрос клиента шлюза"""
+    __slots__ = ("client", "unit_id", "function_code", "address", "count", "values", "arrived", "future", "alone")
+
+    def __init__(self, client: int, unit_id: int, function_code: int, address: int, count: int,
+                 values: Optional[List[int]], future: asyncio.Future):
+        self.client = client
+        self.unit_id = unit_id
+        self.function_code = function_code
+        self.address = address
+        self.count = count
+        self.values = values
+        self.arrived = time.monotonic()
+        self.future = future
+        # Запрос выполняется отдельной транзакцией, без объединения
+        self.alone = False
+
+    @property
+    def is_read(self) -> bool:
+        return self.values is None
+
+
+class _Bus:
+    """Очереди запросов одной последовательной шины по клиентам"""
+
+    def __init__(self, scheduler: SerialBusScheduler):
+        self.scheduler = scheduler
+        # Поток шины запущен; потерю порта после запуска обрабатывает планировщик
+        self.available = False
+        self.queues: "OrderedDict[int, Deque[_Request]]" = OrderedDict()
+        self.wakeup: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def next_request(self) -> Optional[_Request]:
+        """Головной запрос следующего по кругу клиента"""
+        for client, queue in self.queues.items():
+            if queue:
+                self.queues.move_to_end(client)
+                return queue[0]
+        return None
+
+    def riders(self, lead: _Request) -> Tuple[int, int, List[_Request]]:
+        """Чтения из очередей всех клиентов, покрываемые одной транзакцией с lead
+
+        В очереди клиента просматриваются только чтения до его первой
+        записи, чтобы не менять порядок собственных запросов клиента
+        """
+        start, end = lead.address, lead.address + lead.count
+        taken = {id(lead)}
+        riders = [lead]
+        grown = not lead.alone
+        while grown:
+            grown = False
+            for queue in self.queues.values():
+                for request in queue:
+                    if not request.is_read:
+                        break
+                    if id(request) in taken or request.alone or request.unit_id != lead.unit_id \
+                            or request.function_code != lead.function_code:
+                        continue
+                    if request.address > end or request.address + request.count < start:
+                        continue
+                    new_start = min(start, request.address)
+                    new_end = max(end, request.address + request.count)
+                    if new_end - new_start > MAX_READ_COUNT:
+                        continue
+                    start, end = new_start, new_end
+                    taken.add(id(request))
+                    riders.append(request)
+                    grown = True
+
+        for client in list(self.queues):
+            self.queues[client] = deque(request for request in self.queues[client] if id(request) not in taken)
+        return start, end - start, riders
+
+    def split(self, riders: List[_Request]) -> None:
+        """Возврат запросов неудачного объединенного чтения в начало очередей клиентов
+
+        Каждый запрос затем выполняется отдельной транзакцией: код исключения
+        объединенного блока может относиться к регистрам другого клиента.
+        Головной запрос (riders[0]) повторяется первым
+        """
+        for request in reversed(riders):
+            queue = self.queues.get(request.client)
+            if queue is None or request.future.done():
+                continue
+            request.alone = True
+            queue.appendleft(request)
+        if riders[0].client in self.queues:
+            self.queues.move_to_end(riders[0].client, last=False)
+
+
+@logged(name="rtu_gateway", level=logging.DEBUG)
+class RtuGateway:
+    """Сквозной шлюз Modbus TCP - RTU
+
+    Запросы клиентов TCP направляются по unit ID на последовательную шину
+    устройства из config/devices.py. У каждой шины свои очереди по клиентам,
+    обслуживаемые по кругу: один запрос клиента за ход. Одинаковые и
+    перекрывающиеся чтения, пришедшие в течение coalesce_window, выполняются
+    одной транзакцией RTU, ответ раздается всем ожидающим клиентам.
+    Планировщики шин берутся из pool: с общим пулом шлюз делит порт и
+    совместные чтения с опросом, записью и диагностикой
+    """
+
+    def __init__(self, devices: Iterable[Dict[str, Any]], host: str = "0.0.0.0", port: int = DEFAULT_PORT,
+                 coalesce_window: float = DEFAULT_COALESCE_WINDOW, max_pending: int = DEFAULT_MAX_PENDING,
+                 pool: Optional[ConnectionPool] = None):
+        self.log.info("=== Инициализация объекта RtuGateway ===")
+        # Без общего пула шины принадлежат шлюзу и останавливаются в stop
+        self.pool = pool if pool is not None else ConnectionPool()
+        self._own_pool = pool is None
+        self.host = host
+        self.port = port
+        self.coalesce_window = coalesce_window
+        self.max_pending = max_pending
+        self.buses: Dict[BusKey, _Bus] = {}
+        self.routes: Dict[int, _Bus] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._clients = 0
+        self.requests = 0
+        self.transactions = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+        for device in devices:
+            if device["type"] != "rtu":
+                continue
+            key = (device["port"], device.get("baudrate", 9600), device.get("bytesize", 8),
+                   device.get("parity", 'N'), device.get("stopbits", 1))
+            unit_id = device["device_id"]
+            if unit_id in self.routes:
+                raise ValueError(f"unit ID {unit_id} ({device.get('name')}) уже занят другим устройством шлюза")
+            if key not in self.buses:
+                if any(other[0] == key[0] for other in self.buses):
+                    raise ValueError(f"Порт {key[0]} указан с разными настройками линии")
+                self.buses[key] = _Bus(self.pool.scheduler(device))
+            self.routes[unit_id] = self.buses[key]
+
+    def start(self) -> None:
+        """Открытие портов и запуск сервера в отдельном потоке"""
+        if self._thread is not None:
+            return
+
+        for key, bus in self.buses.items():
+            try:
+                bus.scheduler.start()
+                bus.available = True
+            except (ConnectionError, ModbusException, serial.SerialException, OSError) as e:
+                self.log.warning(f"Шина {key[0]} недоступна, порт будет открываться повторно: {e}")
+
+        self._thread = threading.Thread(target=self._run, name="rtu-gateway", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        self.log.info(f"Шлюз TCP-RTU слушает {self.host}:{self.port}")
+
+    def stop(self) -> None:
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+            self._thread.join(5)
+            self._thread = None
+            self._loop = None
+
+        for bus in self.buses.values():
+            # Шины общего пула продолжают работать для остальных потребителей
+            if self._own_pool:
+                bus.scheduler.stop(timeout=2)
+            bus.available = False
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, "transactions": self.transactions,
+                "coalesced": self.coalesced, "rejected": self.rejected}
+
+    async def _shutdown(self) -> None:
+        self._server.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop.stop()
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        for key, bus in self.buses.items():
+            bus.wakeup = asyncio.Event()
+            bus.task = self._loop.create_task(self._serve_bus(bus))
+            if not bus.available:
+                self._loop.create_task(self._open_bus(key, bus))
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._serve_client, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._clients += 1
+        client = self._clients
+        peer = writer.get_extra_info("peername")
+        self.log.debug(f"Подключен клиент {peer}")
+        try:
+            while True:
+                header = await reader.readexactly(_MBAP.size)
+                transaction_id, protocol_id, length, unit_id = _MBAP.unpack(header)
+                if protocol_id != 0 or not 2 <= length <= 254:
+                    break
+                pdu = await reader.readexactly(length - 1)
+                self.requests += 1
+                asyncio.ensure_future(self._answer(client, transaction_id, unit_id, pdu, writer))
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            for bus in self.buses.values():
+                for request in bus.queues.pop(client, ()):
+                    request.future.cancel()
+            writer.close()
+            self.log.debug(f"Клиент {peer} отключен")
+
+    async def _answer(self, client: int, transaction_id: int, unit_id: int, pdu: bytes,
+                      writer: asyncio.StreamWriter) -> None:
+        try:
+            response = await self._handle(client, unit_id, pdu)
+        except asyncio.CancelledError:
+            return
+        except _GatewayError as e:
+            response = struct.pack(">BB", pdu[0] | 0x80, e.code)
+        if writer.is_closing():
+            return
+        writer.write(_MBAP.pack(transaction_id, 0, len(response) + 1, unit_id) + response)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _handle(self, client: int, unit_id: int, pdu: bytes) -> bytes:
+        bus = self.routes.get(unit_id)
+        if bus is None or not bus.available:
+            raise _GatewayError(GATEWAY_PATH_UNAVAILABLE)
+
+        function_code = pdu[0]
+        try:
+            if function_code == 3:
+                address, count = struct.unpack_from(">HH", pdu, 1)
+                if not 1 <= count <= MAX_READ_COUNT:
+                    raise _GatewayError(ILLEGAL_DATA_VALUE)
+                registers = await self._enqueue(bus, client, unit_id, function_code, address, count, None)
+                return struct.pack(f">BB{count}H", function_code, 2 * count, *registers)
+
+            if function_code == 6:
+                address, value = struct.unpack_from(">HH", pdu, 1)
+                await self._enqueue(bus, client, unit_id, function_code, address, 1, [value])
+                return pdu[:5]
+
+            if function_code == 16:
+                address, count, byte_count = struct.unpack_from(">HHB", pdu, 1)
+                if not 1 <= count <= 123 or byte_count != 2 * count or len(pdu) != 6 + byte_count:
+                    raise _GatewayError(ILLEGAL_DATA_VALUE)
+                values = list(struct.unpack_from(f">{count}H", pdu, 6))
+                await self._enqueue(bus, client, unit_id, function_code, address, count, values)
+                return struct.pack(">BHH", function_code, address, count)
+        except struct.error:
+            raise _GatewayError(ILLEGAL_DATA_VALUE) from None
+
+        raise _GatewayError(ILLEGAL_FUNCTION)
+
+    async def _enqueue(self, bus: _Bus, client: int, unit_id: int, function_code: int, address: int,
+                       count: int, values: Optional[List[int]]) -> Any:
+        queue = bus.queues.setdefault(client, deque())
+        if len(queue) >= self.max_pending:
+            self.rejected += 1
+            raise _GatewayError(SERVER_DEVICE_BUSY)
+
+        request = _Request(client, unit_id, function_code, address, count, values, self._loop.create_future())
+        queue.append(request)
+        bus.wakeup.set()
+        return await request.future
+
+    async def _open_bus(self, key: BusKey, bus: _Bus) -> None:
+        """Повторное открытие порта шины, недоступной при запуске, с растущей паузой"""
+        delay = DEFAULT_RECONNECT_DELAY
+        while not bus.available:
+            await asyncio.sleep(delay)
+            try:
+                await self._loop.run_in_executor(None, bus.scheduler.start)
+            except (ConnectionError, ModbusException, serial.SerialException, OSError) as e:
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+                self.log.debug(f"Шина {key[0]} недоступна, повтор через {delay:.1f} с: {e}")
+                continue
+            bus.available = True
+            self.log.info(f"Шина {key[0]} доступна")
+
+    async def _serve_bus(self, bus: _Bus) -> None:
+        """Очередь шины: по кругу по клиентам, одна транзакция RTU за раз"""
+        while True:
+            lead = bus.next_request()
+            if lead is None:
+                bus.wakeup.clear()
+                await bus.wakeup.wait()
+                continue
+
+            if lead.is_read:
+                # Окно объединения отсчитывается от прихода головного запроса
+                delay = lead.arrived + self.coalesce_window - time.monotonic()
+                if delay > 0 and not lead.alone:
+                    await asyncio.sleep(delay)
+                address, count, riders = bus.riders(lead)
+                future = bus.scheduler.submit_read(lead.unit_id, address, count)
+            else:
+                bus.queues[lead.client].popleft()
+                address, count, riders = lead.address, lead.count, [lead]
+                future = bus.scheduler.submit_write(lead.unit_id, lead.address, lead.values)
+
+            self.transactions += 1
+            self.coalesced += len(riders) - 1
+            try:
+                result = await asyncio.wrap_future(future)
+            except Exception as e:
+                code = _exception_code(e)
+                self.log.debug("Транзакция unit %s, адрес %s: код %s (%s)", lead.unit_id, address, code, e)
+                if len(riders) > 1 and isinstance(e, ModbusExceptionResponse):
+                    self.coalesced -= len(riders) - 1
+                    bus.split(riders)
+                    continue
+                for request in riders:
+                    if not request.future.done():
+                        request.future.set_exception(_GatewayError(code))
+                continue
+
+            for request in riders:
+                if request.future.done():
+                    continue
+                if request.is_read:
+                    offset = request.address - address
+                    request.future.set_result(result[offset:offset + request.count])
+                else:
+                    request.future.set_result(None)
+
+
+def _exception_code(error: Exception) -> int:
+    """Код исключения Modbus для клиента по ошибке транзакции RTU"""
+    if isinstance(error, ModbusExceptionResponse) and error.exception_code:
+        return error.exception_code
+    if isinstance(error, ModbusIOException):
+        return GATEWAY_TARGET_FAILED
+    if isinstance(error, (ConnectionError, serial.SerialException)):
+        return GATEWAY_PATH_UNAVAILABLE
+    return SERVER_DEVICE_FAILURE
@@ -0,0 +1,107 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+# Уведомление о совместном чтении: (slave_id, число ожидавших, длительность транзакции)
+SharedCallback = Callable[[int, int, float], None]
+
+
+class _Flight:
+    """Чтение, поставленное в очередь или выполняемое в данный момент"""
+    __slots__ = ("address", "count", "future", "started", "waiters")
+
+    def __init__(self, address: int, count: int):
+        self.address = address
+        self.count = count
+        self.future: Optional[Future] = None
+        self.started = time.perf_counter()
+        self.waiters = 0
+
+    def covers(self, address: int, count: int) -> bool:
+        return self.address <= address and address + count <= self.address + self.count
+
+
+class SingleFlight:
+    """Объединение одновременных одинаковых чтений
+
+    Стоит перед очередью транзакций: если чтение, покрывающее запрошенные
+    регистры того же устройства, уже ждет в очереди или выполняется,
+    вызывающий получает его результат вместо новой транзакции. Ошибка
+    транзакции передается всем ожидающим
+    """
+
+    def __init__(self, on_shared: Optional[SharedCallback] = None):
+        self.on_shared = on_shared
+        self._lock = threading.Lock()
+        self._flights: Dict[int, List[_Flight]] = {}
+        self.leaders = 0
+        self.hits = 0
+        self.saved_seconds = 0.0
+
+    def submit(self, slave_id: int, address: int, count: int, start: Callable[[], Future]) -> Future:
+        """Future с регистрами [address, address + count); start ставит транзакцию в очередь
+
+        Каждый вызывающий получает свой Future: его отмена не отменяет
+        транзакцию остальных ожидающих
+        """
+        with self._lock:
+            for flight in self._flights.get(slave_id, ()):
+                if flight.covers(address, count):
+                    flight.waiters += 1
+                    self.hits += 1
+                    return _share(flight.future, address - flight.address, count)
+
+            flight = _Flight(address, count)
+            flight.future = start()
+            self._flights.setdefault(slave_id, []).append(flight)
+            self.leaders += 1
+
+        flight.future.add_done_callback(lambda _: self._land(slave_id, flight))
+        return _share(flight.future, 0, count)
+
+    def forget(self, slave_id: int, address: int, count: int) -> None:
+        """Запрет присоединяться к чтениям, перекрывающим записываемые регистры"""
+        with self._lock:
+            flights = self._flights.get(slave_id, [])
+            flights[:] = [flight for flight in flights
+                          if flight.address + flight.count <= address or address + count <= flight.address]
+
+    def _land(self, slave_id: int, flight: _Flight) -> None:
+        elapsed = time.perf_counter() - flight.started
+        with self._lock:
+            flights = self._flights.get(slave_id, [])
+            if flight in flights:
+                flights.remove(flight)
+            if not flights:
+                self._flights.pop(slave_id, None)
+            # Каждый ожидающий сэкономил одну транзакцию длительностью как у ведущего
+            self.saved_seconds += flight.waiters * elapsed
+        if flight.waiters and self.on_shared is not None:
+            self.on_shared(slave_id, flight.waiters, elapsed)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(len(flights) for flights in self._flights.values())
+
+    def stats(self) -> Dict[str, float]:
+        return {"leaders": self.leaders, "hits": self.hits, "saved_seconds": self.saved_seconds}
+
+
+def _share(source: Future, offset: int, count: int) -> Future:
+    """Future с частью результата source"""
+    target: Future = Future()
+
+    def copy(done: Future) -> None:
+        if done.cancelled():
+            target.cancel()
+            return
+        if not target.set_running_or_notify_cancel():
+            return
+        if done.exception() is not None:
+            target.set_exception(done.exception())
+        else:
+            target.set_result(done.result()[offset:offset + count])
+
+    source.add_done_callback(copy)
+    return target
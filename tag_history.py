@@ -0,0 +1,169 @@
+import math
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # без NumPy буферы строятся на array('d')
+    np = None
+
+# Глубина хранимой истории тега, секунды
+DEFAULT_RETENTION = 600.0
+
+# Период поступления отсчетов тега, пока он не задан через set_period, секунды
+DEFAULT_PERIOD = 1.0
+
+# Предельная емкость буфера одного тега (около 3 МБ)
+MAX_CAPACITY = 100000
+
+
+def capacity_for(period: float, retention: float = DEFAULT_RETENTION) -> int:
+    """Число отсчетов, покрывающее retention секунд при периоде period"""
+    if period <= 0 or retention <= 0:
+        raise ValueError(f"period и retention должны быть положительными, получено: {period}, {retention}")
+    return max(1, min(MAX_CAPACITY, math.ceil(retention / period)))
+
+
+# Емкость буфера при периоде и глубине по умолчанию
+DEFAULT_CAPACITY = capacity_for(DEFAULT_PERIOD)
+
+
+class RingBuffer:
+    """Кольцевой буфер отсчетов (время, значение) фиксированной емкости
+
+    Каждый отсчет записывается дважды - по индексу i и i + capacity, поэтому
+    последние n отсчетов всегда лежат в памяти подряд и отдаются срезом без
+    копирования (NumPy-массив или memoryview). Добавление - O(1), память
+    не растет со временем работы
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError(f"capacity должен быть не меньше 1, получено: {capacity}")
+
+        self.capacity = capacity
+        if np is not None:
+            self._times = np.zeros(2 * capacity)
+            self._values = np.zeros(2 * capacity)
+        else:
+            self._times = memoryview(array("d", bytes(16 * capacity)))
+            self._values = memoryview(array("d", bytes(16 * capacity)))
+        self._next = 0
+        self.count = 0
+
+    def append(self, timestamp: float, value: float) -> None:
+        i = self._next
+        self._times[i] = self._times[i + self.capacity] = timestamp
+        self._values[i] = self._values[i + self.capacity] = value
+        self._next = i + 1 if i + 1 < self.capacity else 0
+        if self.count < self.capacity:
+            self.count += 1
+
+    def last(self, n: Optional[int] = None) -> Tuple[Any, Any]:
+        """Последние n отсчетов (все при n=None): срезы времени и значений"""
+        n = self.count if n is None else max(0, min(n, self.count))
+        end = self._next + self.capacity
+        return self._times[end - n:end], self._values[end - n:end]
+
+    def since(self, timestamp: float) -> Tuple[Any, Any]:
+        """Отсчеты с меткой времени не раньше timestamp"""
+        times, values = self.last()
+        start = int(np.searchsorted(times, timestamp)) if np is not None else bisect_left(times, timestamp)
+        return times[start:], values[start:]
+
+    def latest(self) -> Optional[Tuple[float, float]]:
+        if not self.count:
+            return None
+        i = self._next + self.capacity - 1
+        return float(self._times[i]), float(self._values[i])
+
+    def clear(self) -> None:
+        self._next = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class TagHistory:
+    """Недавняя история значений по тегам в памяти
+
+    Тег - имя устройства и адрес регистра ("Имя:адрес") или имя потока.
+    Емкость буфера тега рассчитывается по периоду поступления его отсчетов
+    и глубине retention. Запись в тег ведет один поток; чтение отдает срезы
+    без копирования, которые действительны до следующего оборота буфера
+    """
+
+    def __init__(self, retention: float = DEFAULT_RETENTION, period: float = DEFAULT_PERIOD):
+        capacity_for(period, retention)
+        self.retention = retention
+        self.period = period
+        self.periods: Dict[str, float] = {}
+        self.buffers: Dict[str, RingBuffer] = {}
+        self._lock = threading.Lock()
+
+    def set_period(self, tag: str, period: float) -> None:
+        """Период отсчетов тега "устройство:адрес" или всех тегов устройства (tag - имя устройства)
+
+        Буферы, уже созданные с другой емкостью, пересоздаются с сохранением последних отсчетов
+        """
+        capacity_for(period, self.retention)
+        with self._lock:
+            self.periods[tag] = period
+            for name, buffer in list(self.buffers.items()):
+                capacity = self.capacity(name)
+                if buffer.capacity != capacity:
+                    resized = RingBuffer(capacity)
+                    for timestamp, value in zip(*buffer.last(capacity)):
+                        resized.append(float(timestamp), float(value))
+                    self.buffers[name] = resized
+
+    def capacity(self, tag: str) -> int:
+        """Емкость буфера тега по его периоду (или периоду устройства)"""
+        period = self.periods.get(tag) or self.periods.get(tag.rsplit(":", 1)[0]) or self.period
+        return capacity_for(period, self.retention)
+
+    @staticmethod
+    def tag_name(device_name: str, address: Optional[int] = None) -> str:
+        return device_name if address is None else f"{device_name}:{address}"
+
+    def buffer(self, tag: str) -> RingBuffer:
+        buffer = self.buffers.get(tag)
+        if buffer is None:
+            with self._lock:
+                buffer = self.buffers.get(tag)
+                if buffer is None:
+                    buffer = self.buffers[tag] = RingBuffer(self.capacity(tag))
+        return buffer
+
+    def append(self, tag: str, value: float, timestamp: Optional[float] = None) -> None:
+        self.buffer(tag).append(time.time() if timestamp is None else timestamp, value)
+
+    def record(self, device_name: str, values: Dict[int, Any], timestamp: Optional[float] = None) -> None:
+        """Запись результата опроса устройства {адрес: значение}"""
+        timestamp = time.time() if timestamp is None else timestamp
+        for address, value in values.items():
+            self.buffer(self.tag_name(device_name, address)).append(timestamp, value)
+
+    def extend(self, tag: str, samples: Iterable[Any]) -> None:
+        """Запись отсчетов с полями timestamp и value (например, MedSample)"""
+        buffer = self.buffer(tag)
+        for sample in samples:
+            buffer.append(sample.timestamp, sample.value)
+
+    def last(self, tag: str, n: Optional[int] = None) -> Tuple[Any, Any]:
+        return self.buffer(tag).last(n)
+
+    def window(self, tag: str, seconds: float, now: Optional[float] = None) -> Tuple[Any, Any]:
+        """Отсчеты за последние seconds секунд"""
+        return self.buffer(tag).since((time.time() if now is None else now) - seconds)
+
+    def latest(self, tag: str) -> Optional[Tuple[float, float]]:
+        buffer = self.buffers.get(tag)
+        return buffer.latest() if buffer is not None else None
+
+    def tags(self) -> List[str]:
+        return list(self.buffers)
@@ -0,0 +1,171 @@
+import logging
+import time
+from typing import Any, Callable, ContextManager, Dict, Iterable, List, Optional, Tuple
+from readers.read_planner import ReadPlanner, DEFAULT_MAX_GAP, MAX_READ_COUNT
+from config.register_map import ACCESS_READ_ONLY, ACCESS_READ_WRITE
+from Logger.logger import logged
+
+# Периоды опроса по умолчанию, секунды: измеряемые значения и параметры настройки
+DEFAULT_FAST_PERIOD = 1.0
+DEFAULT_SLOW_PERIOD = 60.0
+
+DeviceKey = Tuple[str, int]
+
+
+class Tag:
+    """Опрашиваемый регистр устройства со своим периодом"""
+    __slots__ = ("device", "field", "address", "base_period", "period", "next_due", "value", "timestamp")
+
+    def __init__(self, device: Dict[str, Any], field: Dict[str, Any], address: int, period: float):
+        self.device = device
+        self.field = field
+        self.address = address
+        # Заданный период; действующий period может быть увеличен autotune
+        self.base_period = period
+        self.period = period
+        self.next_due = 0.0
+        self.value: Any = None
+        self.timestamp: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.device.get('name', 'Unknown')}:{self.address}"
+
+    @property
+    def channel(self) -> int:
+        return self.field.get("channel", 1)
+
+    def __repr__(self) -> str:
+        return f"Tag({self.name}, period={self.period}, value={self.value})"
+
+
+@logged(name="tag_scheduler", level=logging.DEBUG)
+class TagScheduler:
+    """Опрос регистров с индивидуальным периодом
+
+    Период задается для каждого регистра, по умолчанию - по классу доступа.
+    Регистры одного устройства, чей срок наступил в одном такте, читаются
+    общими блоками через ReadPlanner
+    """
+
+    def __init__(self, fast_period: float = DEFAULT_FAST_PERIOD, slow_period: float = DEFAULT_SLOW_PERIOD,
+                 max_gap: int = DEFAULT_MAX_GAP):
+        self.log.info("=== Инициализация объекта TagScheduler ===")
+        self.fast_period = fast_period
+        self.slow_period = slow_period
+        self.planner = ReadPlanner(None, max_gap=max_gap)
+        self.tags: List[Tag] = []
+
+    def default_period(self, field: Dict[str, Any]) -> float:
+        """Период по классу доступа: измеряемые значения - часто, настройки - редко"""
+        return self.slow_period if field.get("access") == ACCESS_READ_WRITE else self.fast_period
+
+    def add_tag(self, device: Dict[str, Any], field: Dict[str, Any], offset: int = 0,
+                period: Optional[float] = None) -> Tag:
+        """Добавление регистра из карты config/registers.py"""
+        tag = Tag(device, field, field["address"] + offset, period or self.default_period(field))
+        self.tags.append(tag)
+        return tag
+
+    def add_fields(self, device: Dict[str, Any], fields: Iterable[Dict[str, Any]], offset: int = 0) -> List[Tag]:
+        return [self.add_tag(device, field, offset) for field in fields]
+
+    def autotune(self, client, device: Dict[str, Any], period_fields: Iterable[Dict[str, Any]]) -> Dict[int, float]:
+        """Подстройка под период измерения каждого канала прибора
+
+        period_fields - регистры периода обновления в миллисекундах по одному
+        на канал (например, MB210_101.field("Период измерения входа", channel)).
+        Измеряемые регистры канала не опрашиваются чаще его периода.
+        Результат: канал -> период, секунды
+        """
+        period_fields = list(period_fields)
+        channels = {field["address"]: field.get("channel", 1) for field in period_fields}
+        periods: Dict[int, float] = {}
+        # Регистры периода каналов разнесены по карте - читаются одним блоком вместе с промежутками
+        planner = ReadPlanner(None, max_gap=MAX_READ_COUNT)
+        try:
+            data_order = client.data_order(device["device_id"]) if hasattr(client, "data_order") else None
+            for span in planner.plan(period_fields):
+                registers = client._read_registers(device["device_id"], span.address, span.count)
+                for address, period_ms in planner.decode(span, registers, data_order).items():
+                    if period_ms:
+                        periods[channels[address]] = period_ms / 1000
+        except Exception as e:
+            self.log.exception(f"Не удалось прочитать период измерения {device.get('name')}: {e}")
+            return {}
+
+        for tag in self.tags:
+            if tag.device is device and tag.field.get("access") == ACCESS_READ_ONLY and tag.channel in periods:
+                tag.period = max(tag.base_period, periods[tag.channel])
+
+        self.log.debug(f"Периоды измерения {device.get('name')} по каналам: {periods}")
+        return periods
+
+    def next_deadline(self) -> float:
+        """Ближайший срок опроса (time.monotonic)"""
+        return min((tag.next_due for tag in self.tags), default=time.monotonic())
+
+    def due(self, now: Optional[float] = None) -> Dict[DeviceKey, List[Tag]]:
+        """Регистры, чей срок наступил, сгруппированные по устройству"""
+        now = time.monotonic() if now is None else now
+        groups: Dict[DeviceKey, List[Tag]] = {}
+        for tag in self.tags:
+            if tag.next_due <= now:
+                key = (tag.device.get("name", "Unknown"), tag.device["device_id"])
+                groups.setdefault(key, []).append(tag)
+        return groups
+
+    def poll(self, lease: Callable[[Dict[str, Any]], ContextManager[Any]], now: Optional[float] = None) -> List[Tag]:
+        """Один такт: чтение всех регистров, чей срок наступил
+
+        lease - выдача клиента для устройства, например ConnectionPool.lease
+        """
+        now = time.monotonic() if now is None else now
+        updated: List[Tag] = []
+
+        for tags in self.due(now).values():
+            device = tags[0].device
+            by_address: Dict[int, List[Tag]] = {}
+            for tag in tags:
+                by_address.setdefault(tag.address, []).append(tag)
+
+            fields = [{"address": tag.address, "data_type": tag.field["data_type"]} for tag in tags]
+            try:
+                with lease(device) as client:
+                    data_order = client.data_order(device["device_id"]) if hasattr(client, "data_order") else None
+                    for span in self.planner.plan(fields):
+                        registers = client._read_registers(device["device_id"], span.address, span.count)
+                        stamp = time.time()
+                        for address, value in self.planner.decode(span, registers, data_order).items():
+                            for tag in by_address[address]:
+                                tag.value = value
+                                tag.timestamp = stamp
+                                updated.append(tag)
+            except Exception as e:
+                self.log.exception(f"Ошибка опроса {device.get('name')}: {e}")
+            finally:
+                for tag in tags:
+                    self._reschedule(tag, now)
+
+        return updated
+
+    def run(self, lease: Callable[[Dict[str, Any]], ContextManager[Any]],
+            on_update: Optional[Callable[[List[Tag]], None]] = None, duration: Optional[float] = None) -> None:
+        """Опрос до истечения duration (или бесконечно)"""
+        stop_at = None if duration is None else time.monotonic() + duration
+        while stop_at is None or time.monotonic() < stop_at:
+            delay = self.next_deadline() - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            updated = self.poll(lease)
+            if updated and on_update is not None:
+                on_update(updated)
+
+    @staticmethod
+    def _reschedule(tag: Tag, now: float) -> None:
+        # Срок сдвигается от предыдущего, чтобы регистры с одинаковым
+        # периодом оставались в фазе и читались одним запросом
+        tag.next_due = tag.next_due + tag.period if tag.next_due else now + tag.period
+        if tag.next_due <= now:
+            tag.next_due = now + tag.period
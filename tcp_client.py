@@ -1,32 +1,46 @@
 from base import ModbusBaseClient
+from link_health import DEFAULT_HEARTBEAT_INTERVAL
+from adaptive_timeout import DEFAULT_TIMEOUT, DEFAULT_TIMEOUT_FLOOR, DEFAULT_TIMEOUT_CEILING
 from pymodbus.client import ModbusTcpClient
-from pymodbus.exceptions import ModbusException
-import struct
+from pymodbus.exceptions import ModbusException, ModbusIOException
+from register_codec import decode_value, encode_value
+from tcp_pipeline import ModbusTcpPipeline, PipelineRequest, DEFAULT_REQUEST_TIMEOUT
+from typing import Any, List, Sequence, Tuple
 import logging
+import time
 from Logger.logger import logged
 
 @logged(name="tcp_client", level=logging.DEBUG)
 class PyModbusClientTCP(ModbusBaseClient):
     """Клиент Modbus TCP"""
 
-    def __init__(self, host, port=502):
+    def __init__(self, host, port=502, heartbeat_interval=DEFAULT_HEARTBEAT_INTERVAL, pipeline_depth=1,
+                 timeout=DEFAULT_TIMEOUT, timeout_floor=DEFAULT_TIMEOUT_FLOOR, timeout_ceiling=DEFAULT_TIMEOUT_CEILING):
+        super().__init__(heartbeat_interval, timeout, timeout_floor, timeout_ceiling)
         self.log.info("=== Инициализация объекта PyModbusClientTCP ===")
         self.host = host
         self.port = port
-        self.client = None
+        # Число запросов в полете для read_batch; 1 - без конвейера
+        self.pipeline_depth = pipeline_depth
+        self.pipeline = None
+
+    def _endpoint(self) -> str:
+        return f"{self.host}:{self.port}"
 
     def connect(self):
         """Установка соединения"""
         try:
             self.log.debug("Установка соединения")
 
-            self.client = ModbusTcpClient(host=self.host, port=self.port)
+            # Повторы отключены: потерянный ответ стоит один адаптивный таймаут
+            self.client = ModbusTcpClient(host=self.host, port=self.port, timeout=self.timeouts.initial, retries=0)
             result = self.client.connect()
 
             if not result:
                 self.log.exception(f"Не удалось подключиться к {self.host}:{self.port}")
                 raise ModbusException(f"Не удалось подключиться к {self.host}:{self.port}")
 
+            self.link.reset()
             print(f"Успешное подключение к {self.host}:{self.port}")
             self.log.debug(f"Успешное подключение к {self.host}:{self.port}")
 
@@ -37,20 +51,6 @@ class PyModbusClientTCP(ModbusBaseClient):
             self.log.exception(f"Ошибка подключения: {e}")
             raise ModbusException(f"Ошибка подключения: {e}") from e
 
-    def is_connected(self) -> bool:
-        """Проверка соединения"""
-        self.log.debug("Проверка соединения")
-
-        if self.client is None:
-            return False
-
-        try:
-            self.log.debug(f"Соединение: {self.client.is_socket_open()}")
-            return self.client.is_socket_open()
-        except Exception as e:
-            self.log.exception(e)
-            return False
-
     def read_int(self, slave_id: int, address: int, count: int = 1) -> int:
         """Чтение целочисленного значения"""
         self.log.debug("Чтение целочисленного значения")
@@ -61,7 +61,7 @@ class PyModbusClientTCP(ModbusBaseClient):
             self.log.exception("Данные с устройства не получены")
             raise ValueError("Данные с устройства не получены")
 
-        self.log.info(f"read_int: данные получены: {registers[0]}")
+        self.log.info("read_int: данные получены: %s", registers[0])
         return registers[0]
 
     def read_float(self, slave_id: int, address: int, count: int = 2) -> float:
@@ -74,8 +74,8 @@ class PyModbusClientTCP(ModbusBaseClient):
             self.log.exception("Данные с устройства не получены")
             raise ValueError("Даные с устройства не получены")
 
-        value_float = struct.unpack('f', struct.pack('>HH', registers[1], registers[0]))[0]
-        self.log.info(f"read_float: данные получены: {value_float}")
+        value_float = decode_value("FLOAT 32", registers, *self.data_order(slave_id))
+        self.log.info("read_float: данные получены: %s", value_float)
         return value_float
 
     def write_int(self, slave_id: int, address: int, value_int: int) -> bool:
@@ -86,7 +86,7 @@ class PyModbusClientTCP(ModbusBaseClient):
         result = self._write_registers(slave_id, address, registers)
 
         if result:
-            self.log.info(f"write_int: успешная запись значения {value_int} в регистр {address} устройства {slave_id}")
+            self.log.info("write_int: успешная запись значения %s в регистр %s устройства %s", value_int, address, slave_id)
         else:
             self.log.exception(f"write_int: ошибка записи значения {value_int} в регистр {address} устройства {slave_id}")
 
@@ -96,26 +96,117 @@ class PyModbusClientTCP(ModbusBaseClient):
         """Запись значения с плавающей точкой"""
         self.log.debug("Запись значения с плавающей точкой")
 
-        float_bytes = struct.pack('f', value_float)
-        registers = [
-            struct.unpack('>H', float_bytes[2:4])[0],
-            struct.unpack('>H', float_bytes[0:2])[0]
-        ]
+        registers = encode_value("FLOAT 32", value_float, *self.data_order(slave_id))
         result = self._write_registers(slave_id, address, registers)
 
         if result:
-            self.log.info(f"write_int: успешная запись значения {value_float} в регистр {address} устройства {slave_id}")
+            self.log.info("write_int: успешная запись значения %s в регистр %s устройства %s", value_float, address, slave_id)
         else:
             self.log.exception(f"write_int: ошибка записи значения {value_float} в регистр {address} устройства {slave_id}")
 
         return result
 
+    def read_batch(self, requests: Sequence[Tuple[int, int, int]], use_cache: bool = True) -> List[Any]:
+        """Пакетное чтение регистров
+
+        requests - последовательность (slave_id, address, count). Результат
+        в том же порядке: список регистров или исключение по запросу.
+        При pipeline_depth > 1 запросы идут конвейером по отдельному сокету
+        с адаптивным таймаутом каждого устройства; кэш, контроль линии,
+        время ответа и метрики учитываются так же, как в _read_registers
+        """
+        if self.pipeline_depth <= 1:
+            return [self._read_or_error(*request, use_cache=use_cache) for request in requests]
+
+        results: List[Any] = [None] * len(requests)
+        batch: List[PipelineRequest] = []
+        indexes: List[int] = []
+        for index, (slave_id, address, count) in enumerate(requests):
+            try:
+                valid_slave_id = self._validate_slave_id(slave_id)
+                valid_address = self._validate_address(address)
+            except ValueError as e:
+                results[index] = e
+                continue
+
+            if self.cache is not None and use_cache:
+                cached = self.cache.get(valid_slave_id, valid_address, count)
+                if cached is not None:
+                    results[index] = cached
+                    continue
+
+            batch.append(PipelineRequest(valid_slave_id, valid_address, count,
+                                         timeout=self.timeouts.timeout(valid_slave_id)))
+            indexes.append(index)
+
+        if not batch:
+            return results
+
+        started = time.perf_counter()
+        try:
+            if self.pipeline is None:
+                self.pipeline = ModbusTcpPipeline(self.host, self.port, self.pipeline_depth, DEFAULT_REQUEST_TIMEOUT)
+            replies = self.pipeline.execute(batch)
+        except ConnectionError as e:
+            self._disable_pipeline(f"соединение разорвано при конвейерной передаче: {e}")
+            replies = [ModbusIOException(str(e))] * len(batch)
+
+        timed_out = False
+        for index, request, reply in zip(indexes, batch, replies):
+            self._record_pipelined(request, reply, started)
+            if isinstance(reply, ModbusIOException):
+                timed_out = True
+            elif self.cache is not None and isinstance(reply, list):
+                self.cache.put(request.slave_id, request.address, reply)
+            results[index] = reply
+
+        # Устройство, которое теряет запросы в очереди, переводится на глубину 1,
+        # а запросы без ответа повторяются последовательно
+        if timed_out:
+            if self.pipeline_depth > 1:
+                self._disable_pipeline("часть запросов осталась без ответа")
+            for index, reply in enumerate(results):
+                if isinstance(reply, ModbusIOException):
+                    results[index] = self._read_or_error(*requests[index], use_cache=use_cache)
+
+        return results
+
+    def _record_pipelined(self, request: PipelineRequest, reply: Any, started: float) -> None:
+        """Учет транзакции конвейера: линия, время ответа и метрики"""
+        if isinstance(reply, ModbusIOException):
+            self.link.record_failure()
+            self.timeouts.on_timeout(request.slave_id)
+            self._record_metrics(request.slave_id, 3, request.count, started, error=reply)
+            return
+
+        self.link.record_success(request.slave_id)
+        self.timeouts.observe(request.slave_id, request.elapsed)
+        self._record_metrics(request.slave_id, 3, request.count, time.perf_counter() - request.elapsed,
+                             error=reply if isinstance(reply, Exception) else None)
+
+    def _read_or_error(self, slave_id: int, address: int, count: int, use_cache: bool = True) -> Any:
+        try:
+            return self._read_registers(slave_id, address, count, use_cache)
+        except Exception as e:
+            return e
+
+    def _disable_pipeline(self, reason: str) -> None:
+        self.log.warning(f"Конвейер {self.host}:{self.port} отключен ({reason}), глубина 1")
+        self.pipeline_depth = 1
+        self._close_pipeline()
+
+    def _close_pipeline(self) -> None:
+        if self.pipeline is not None:
+            self.pipeline.close()
+            self.pipeline = None
+
     def disconnect(self):
         """Закрытие соединения"""
         self.log.debug("Закрытие соединения")
 
         try:
-            if self.client():
+            self._close_pipeline()
+            if self.client:
                 self.client.close()
                 print(f"Соединение с {self.host}:{self.port} закрыто")
                 self.log.info(f"Соединение с {self.host}:{self.port} закрыто")
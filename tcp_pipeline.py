@@ -0,0 +1,201 @@
+import logging
+import select
+import socket
+import struct
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from pymodbus.exceptions import ModbusException, ModbusIOException
+from exceptions import ModbusExceptionResponse
+from Logger.logger import logged
+
+# Число одновременно ожидающих ответа запросов по умолчанию
+DEFAULT_PIPELINE_DEPTH = 8
+
+# Таймаут ответа на отдельный запрос, секунды
+DEFAULT_REQUEST_TIMEOUT = 1.0
+
+FC_READ_HOLDING_REGISTERS = 0x03
+FC_WRITE_MULTIPLE_REGISTERS = 0x10
+
+_MBAP = struct.Struct(">HHHB")
+
+
+class PipelineRequest:
+    """Запрос пакета: чтение (count) или запись (values) регистров"""
+    __slots__ = ("slave_id", "address", "count", "values", "timeout", "elapsed")
+
+    def __init__(self, slave_id: int, address: int, count: int = 0, values: Optional[Sequence[int]] = None,
+                 timeout: Optional[float] = None):
+        self.slave_id = slave_id
+        self.address = address
+        self.count = count
+        self.values = values
+        # Таймаут ответа устройства; None - таймаут конвейера
+        self.timeout = timeout
+        # Время обслуживания запроса устройством, заполняется при получении ответа
+        self.elapsed: Optional[float] = None
+
+    @property
+    def function_code(self) -> int:
+        return FC_WRITE_MULTIPLE_REGISTERS if self.values is not None else FC_READ_HOLDING_REGISTERS
+
+    def pdu(self) -> bytes:
+        if self.values is None:
+            return struct.pack(">BHH", FC_READ_HOLDING_REGISTERS, self.address, self.count)
+        return struct.pack(f">BHHB{len(self.values)}H", FC_WRITE_MULTIPLE_REGISTERS, self.address,
+                           len(self.values), 2 * len(self.values), *self.values)
+
+    def parse(self, pdu: bytes) -> Optional[List[int]]:
+        """Разбор ответа: регистры для чтения, None для записи"""
+        function_code = pdu[0]
+        if function_code == self.function_code | 0x80:
+            raise ModbusExceptionResponse(pdu[1], f"Устройство {self.slave_id} вернуло код исключения {pdu[1]} "
+                                            f"(функция {self.function_code}, адрес {self.address})")
+        if function_code != self.function_code:
+            raise ModbusException(f"Неожиданный код функции в ответе: {function_code}")
+
+        if self.values is not None:
+            return None
+
+        byte_count = pdu[1]
+        if byte_count != 2 * self.count or len(pdu) < 2 + byte_count:
+            raise ModbusException(f"Неполный ответ: ожидалось {2 * self.count} байт, получено {byte_count}")
+        return list(struct.unpack_from(f">{self.count}H", pdu, 2))
+
+    def __repr__(self) -> str:
+        return f"PipelineRequest(fc={self.function_code}, slave={self.slave_id}, address={self.address})"
+
+
+@logged(name="tcp_pipeline", level=logging.DEBUG)
+class ModbusTcpPipeline:
+    """Конвейер транзакций Modbus TCP
+
+    Держит до depth запросов в полете на одном сокете и сопоставляет
+    ответы по идентификатору транзакции MBAP: ответы могут приходить в
+    любом порядке, у каждого запроса свой таймаут. Устройство обслуживает
+    запросы по очереди, поэтому срок ответа растет с числом запросов
+    впереди, а время обслуживания (elapsed) отсчитывается от отправки или
+    от предыдущего ответа, если он пришел позже
+    """
+
+    def __init__(self, host: str, port: int = 502, depth: int = DEFAULT_PIPELINE_DEPTH,
+                 timeout: float = DEFAULT_REQUEST_TIMEOUT):
+        if depth < 1:
+            raise ValueError(f"depth должен быть не меньше 1, получено: {depth}")
+
+        self.host = host
+        self.port = port
+        self.depth = depth
+        self.timeout = timeout
+        self.sock: Optional[socket.socket] = None
+        self._transaction_id = 0
+        self._buffer = bytearray()
+
+    def connect(self) -> None:
+        if self.sock is not None:
+            return
+        try:
+            self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.sock.setblocking(False)
+            self._buffer.clear()
+        except OSError as e:
+            self.log.exception(f"Не удалось подключиться к {self.host}:{self.port}: {e}")
+            raise ConnectionError(f"Не удалось подключиться к {self.host}:{self.port}: {e}") from e
+
+    def close(self) -> None:
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            finally:
+                self.sock = None
+                self._buffer.clear()
+
+    def execute(self, requests: Sequence[PipelineRequest]) -> List[Any]:
+        """Выполнение пакета запросов
+
+        Результат в порядке запросов: регистры, None (запись) или исключение
+        """
+        self.connect()
+
+        results: List[Any] = [None] * len(requests)
+        # Транзакция -> (индекс запроса, время отправки, срок ответа)
+        pending: Dict[int, Tuple[int, float, float]] = {}
+        next_index = 0
+        last_reply = 0.0
+
+        try:
+            while next_index < len(requests) or pending:
+                while next_index < len(requests) and len(pending) < self.depth:
+                    request = requests[next_index]
+                    transaction_id = self._send(request)
+                    sent = time.monotonic()
+                    timeout = (request.timeout or self.timeout) * (len(pending) + 1)
+                    pending[transaction_id] = (next_index, sent, sent + timeout)
+                    next_index += 1
+
+                for transaction_id, pdu in self._receive(min(entry[2] for entry in pending.values())):
+                    entry = pending.pop(transaction_id, None)
+                    if entry is None:
+                        # Ответ на запрос, по которому уже истек таймаут
+                        self.log.debug(f"Отброшен запоздавший ответ, транзакция {transaction_id}")
+                        continue
+                    index, sent, _ = entry
+                    now = time.monotonic()
+                    requests[index].elapsed = now - max(sent, last_reply)
+                    last_reply = now
+                    try:
+                        results[index] = requests[index].parse(pdu)
+                    except ModbusException as e:
+                        results[index] = e
+
+                now = time.monotonic()
+                for transaction_id, (index, sent, deadline) in list(pending.items()):
+                    if deadline <= now:
+                        del pending[transaction_id]
+                        results[index] = ModbusIOException(
+                            f"Нет ответа на {requests[index]} за {deadline - sent:.3f} с")
+
+        except (OSError, ConnectionError) as e:
+            self.close()
+            self.log.exception(f"Соединение с {self.host}:{self.port} разорвано: {e}")
+            raise ConnectionError(f"Соединение с {self.host}:{self.port} разорвано: {e}") from e
+
+        return results
+
+    def _send(self, request: PipelineRequest) -> int:
+        self._transaction_id = (self._transaction_id + 1) & 0xFFFF
+        pdu = request.pdu()
+        frame = _MBAP.pack(self._transaction_id, 0, len(pdu) + 1, request.slave_id) + pdu
+
+        view = memoryview(frame)
+        while view:
+            _, writable, _ = select.select([], [self.sock], [], self.timeout)
+            if not writable:
+                raise ConnectionError("Таймаут отправки запроса")
+            sent = self.sock.send(view)
+            view = view[sent:]
+        return self._transaction_id
+
+    def _receive(self, deadline: float) -> List[Tuple[int, bytes]]:
+        """Прием всех готовых кадров; ожидание не дольше deadline"""
+        readable, _, _ = select.select([self.sock], [], [], max(0.0, deadline - time.monotonic()))
+        if not readable:
+            return []
+
+        chunk = self.sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("Соединение закрыто устройством")
+        self._buffer += chunk
+
+        frames = []
+        while len(self._buffer) >= _MBAP.size:
+            transaction_id, protocol_id, length, _ = _MBAP.unpack_from(self._buffer)
+            if protocol_id != 0 or length < 2:
+                raise ConnectionError(f"Некорректный заголовок MBAP: протокол {protocol_id}, длина {length}")
+            end = _MBAP.size + length - 1
+            if len(self._buffer) < end:
+                break
+            frames.append((transaction_id, bytes(self._buffer[_MBAP.size:end])))
+            del self._buffer[:end]
+        return frames
@@ -0,0 +1,65 @@
+import unittest
+from adaptive_timeout import AdaptiveTimeout, RttEstimator, MAX_BACKOFF, RTT_GRANULARITY
+
+
+class RttEstimatorTest(unittest.TestCase):
+
+    def test_first_sample(self):
+        estimator = RttEstimator()
+        self.assertIsNone(estimator.rto())
+        estimator.observe(0.1)
+        self.assertAlmostEqual(estimator.srtt, 0.1)
+        self.assertAlmostEqual(estimator.rttvar, 0.05)
+        self.assertAlmostEqual(estimator.rto(), 0.3)
+
+    def test_smoothing(self):
+        estimator = RttEstimator()
+        estimator.observe(0.1)
+        estimator.observe(0.2)
+        self.assertAlmostEqual(estimator.srtt, 0.875 * 0.1 + 0.125 * 0.2)
+        self.assertAlmostEqual(estimator.rttvar, 0.75 * 0.05 + 0.25 * 0.1)
+
+    def test_granularity_for_stable_device(self):
+        estimator = RttEstimator()
+        for _ in range(100):
+            estimator.observe(0.01)
+        self.assertAlmostEqual(estimator.rto(), 0.01 + RTT_GRANULARITY, places=4)
+
+    def test_backoff_until_next_answer(self):
+        estimator = RttEstimator()
+        estimator.observe(0.1)
+        for _ in range(10):
+            estimator.on_timeout()
+        self.assertEqual(estimator.backoff, MAX_BACKOFF)
+        estimator.observe(0.1)
+        self.assertEqual(estimator.backoff, 1)
+
+
+class AdaptiveTimeoutTest(unittest.TestCase):
+
+    def test_initial_until_first_answer(self):
+        timeouts = AdaptiveTimeout(initial=0.5)
+        self.assertEqual(timeouts.timeout(1), 0.5)
+        timeouts.on_timeout(1)
+        self.assertEqual(timeouts.timeout(1), 1.0)
+
+    def test_wire_time_excluded_from_sample(self):
+        timeouts = AdaptiveTimeout(floor=0.001)
+        timeouts.observe(1, 0.11, wire_time=0.1)
+        self.assertAlmostEqual(timeouts.snapshot()[1]["srtt"], 0.01)
+        self.assertAlmostEqual(timeouts.timeout(1, wire_time=0.1), 0.13)
+
+    def test_floor_and_ceiling(self):
+        timeouts = AdaptiveTimeout(floor=0.02, ceiling=0.5)
+        timeouts.observe(1, 0.001)
+        timeouts.observe(2, 1.0)
+        self.assertEqual(timeouts.timeout(1), 0.02)
+        self.assertEqual(timeouts.timeout(2), 0.5)
+
+    def test_invalid_bounds(self):
+        with self.assertRaises(ValueError):
+            AdaptiveTimeout(floor=1.0, ceiling=0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
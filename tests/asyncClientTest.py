@@ -0,0 +1,40 @@
+import asyncio
+import unittest
+from async_client import AsyncModbusClient, AsyncPyModbusClientTCP
+from benchmarks.simulators import TcpDeviceSimulator, Faults
+
+
+class AsyncClientTest(unittest.TestCase):
+
+    def test_base_class_is_abstract(self):
+        with self.assertRaises(TypeError):
+            AsyncModbusClient()
+
+    def test_reads_update_adaptive_timeout(self):
+        faults = Faults()
+        simulator = TcpDeviceSimulator(faults).start()
+        self.addCleanup(simulator.stop)
+
+        async def run():
+            client = AsyncPyModbusClientTCP(simulator.host, simulator.port, timeout=0.5)
+            client.metrics = None
+            await client.connect()
+            try:
+                for _ in range(5):
+                    await client._read_registers(1, 4000, 2)
+                samples = client.timeouts.snapshot()[1]["samples"]
+
+                faults.drop_rate = 1.0
+                with self.assertRaises(Exception):
+                    await client._read_registers(1, 4000, 2)
+                return samples, client.timeouts.snapshot()[1]["backoff"]
+            finally:
+                await client.disconnect()
+
+        samples, backoff = asyncio.run(run())
+        self.assertEqual(samples, 5)
+        self.assertEqual(backoff, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
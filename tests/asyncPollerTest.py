@@ -0,0 +1,91 @@
+import asyncio
+import unittest
+from pymodbus.exceptions import ModbusIOException
+from async_poller import AsyncPollingEngine, PollTarget
+from benchmarks.simulators import RtuDeviceSimulator
+from change_filter import ChangeFilter
+from connection_pool import ConnectionPool
+from register_codec import encode_value
+
+FIELDS = [{"address": 4000, "data_type": "FLOAT 32"}, {"address": 4064, "data_type": "INT 16"}]
+
+
+class _FakeClient:
+    """Асинхронный клиент с регистрами в памяти; чтение блока с адреса fail_at не отвечает"""
+
+    def __init__(self):
+        self.words = {4064: 7}
+        self.set_float(4000, 23.5)
+        self.fail_at = None
+
+    def set_float(self, address, value):
+        self.words[address], self.words[address + 1] = encode_value("FLOAT 32", value)
+
+    def is_connected(self):
+        return True
+
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    def set_data_order(self, slave_id, word_order, byte_order):
+        pass
+
+    def data_order(self, slave_id):
+        return ("big", "little")
+
+    async def _read_registers(self, slave_id, address, count=2):
+        if address == self.fail_at:
+            raise ModbusIOException("Нет ответа")
+        return [self.words.get(address + i, 0) for i in range(count)]
+
+
+class _Engine(AsyncPollingEngine):
+    def _create_clients(self, device):
+        return [_FakeClient()]
+
+
+class AsyncPollerTest(unittest.TestCase):
+
+    def test_failed_poll_does_not_consume_changes(self):
+        device = {"name": "dev", "type": "tcp", "ip": "test", "device_id": 1}
+        engine = _Engine([PollTarget(device, FIELDS)], changes=ChangeFilter(absolute=0.05))
+        client = engine.lanes[engine.lane_key(device)].clients[0]
+
+        self.assertEqual(set(asyncio.run(engine.poll_cycle())["dev"]), {4000, 4064})
+
+        # Первый блок изменился, второй не ответил: опрос не удался целиком
+        client.set_float(4000, 30.0)
+        client.fail_at = 4064
+        self.assertIsInstance(asyncio.run(engine.poll_cycle())["dev"], ModbusIOException)
+
+        client.fail_at = None
+        self.assertEqual(set(asyncio.run(engine.poll_cycle())["dev"]), {4000})
+
+    def test_serial_lane_uses_pool_bus(self):
+        simulator = RtuDeviceSimulator(baudrate=115200).start()
+        self.addCleanup(simulator.stop)
+        pool = ConnectionPool(timeout=0.5)
+        self.addCleanup(pool.close_all)
+        device = {"name": "rtu", "type": "rtu", "port": simulator.port, "baudrate": 115200, "device_id": 1}
+        engine = AsyncPollingEngine([PollTarget(device, FIELDS)], pool=pool)
+
+        async def run():
+            values = await engine.poll_cycle()
+            # Запись через пул идет в ту же шину, пока движок держит порт
+            with pool.lease(device) as bus:
+                bus.write_int(1, 4064, 9)
+            values.update(await engine.poll_cycle())
+            await engine.close()
+            return values
+
+        values = asyncio.run(run())
+        self.assertEqual(values["rtu"][4064], 9)
+        self.assertIs(engine.lanes[engine.lane_key(device)].clients[0].bus, None)
+        self.assertTrue(pool.bus(device).is_connected())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+from pymodbus.client import ModbusTcpClient
+from async_poller import AsyncPollingEngine, PollTarget
+from benchmarks.simulators import RtuDeviceSimulator
+from bridge_server import BridgeServer, ILLEGAL_DATA_ADDRESS, SERVER_DEVICE_FAILURE, GATEWAY_TARGET_FAILED
+from config.register_map import TPM10
+from connection_pool import ConnectionPool
+from register_codec import decode_value, encode_value
+from write_batch import WriteBatch
+
+DEVICE = {"name": "tpm", "type": "rtu", "device_id": 1}
+
+# Поле «Верхний порог предупреждения»: FLOAT 32, чтение и запись
+THRESHOLD = TPM10.at(11)
+
+
+class BridgeServerTest(unittest.TestCase):
+
+    def _server(self, writer, device=DEVICE):
+        server = BridgeServer(writer, host="127.0.0.1", port=0)
+        self.unit_id = server.add_device(device, TPM10)
+        server.start()
+        self.addCleanup(server.stop)
+        client = ModbusTcpClient("127.0.0.1", port=server.port, timeout=2)
+        client.connect()
+        self.addCleanup(client.close)
+        return server, client
+
+    def test_reads_are_served_from_image(self):
+        server, client = self._server(lambda device, field, value: None)
+        stale = client.read_holding_registers(0, count=2, device_id=self.unit_id)
+        self.assertEqual(stale.exception_code, GATEWAY_TARGET_FAILED)
+
+        server.update("tpm", {0: 21.5, 4: 3})
+        registers = client.read_holding_registers(0, count=5, device_id=self.unit_id).registers
+        self.assertEqual(decode_value("FLOAT 32", registers[:2]), 21.5)
+        self.assertEqual(registers[4], 3)
+
+        self.assertEqual(client.read_holding_registers(0, count=2, device_id=9).exception_code, GATEWAY_TARGET_FAILED)
+        self.assertEqual(client.read_holding_registers(500, count=2, device_id=self.unit_id).exception_code,
+                         ILLEGAL_DATA_ADDRESS)
+
+    def test_write_is_split_into_fields(self):
+        writes = []
+        server, client = self._server(lambda device, field, value: writes.append((field.address, value)))
+        server.update("tpm", {})
+
+        self.assertFalse(client.write_registers(11, encode_value("FLOAT 32", 42.5), device_id=self.unit_id).isError())
+        self.assertFalse(client.write_register(13, 2, device_id=self.unit_id).isError())
+        self.assertEqual(writes, [(11, 42.5), (13, 2)])
+        registers = client.read_holding_registers(11, count=2, device_id=self.unit_id).registers
+        self.assertEqual(decode_value("FLOAT 32", registers), 42.5)
+
+        # Поле только для чтения и половина поля не записываются
+        self.assertEqual(client.write_registers(0, [0, 0], device_id=self.unit_id).exception_code, ILLEGAL_DATA_ADDRESS)
+        self.assertEqual(client.write_register(11, 0, device_id=self.unit_id).exception_code, ILLEGAL_DATA_ADDRESS)
+        self.assertEqual(len(writes), 2)
+
+    def test_device_write_error(self):
+        def writer(device, field, value):
+            raise ConnectionError("нет связи")
+
+        _, client = self._server(writer)
+        self.assertEqual(client.write_register(13, 2, device_id=self.unit_id).exception_code, SERVER_DEVICE_FAILURE)
+
+    def test_write_shares_bus_with_polling(self):
+        simulator = RtuDeviceSimulator(baudrate=115200).start()
+        self.addCleanup(simulator.stop)
+        pool = ConnectionPool(timeout=0.5)
+        self.addCleanup(pool.close_all)
+        device = dict(DEVICE, port=simulator.port, baudrate=115200)
+
+        def forward_write(device, field, value):
+            with pool.lease(device) as bus:
+                result = WriteBatch(bus, device["device_id"]).set_field(field, value).commit()[field.address]
+            if not result.ok:
+                raise result.error
+
+        engine = AsyncPollingEngine([PollTarget(device, TPM10.fields[0:3])], pool=pool)
+        _, client = self._server(forward_write, device)
+
+        async def run():
+            # Движок держит порт, запись из сервера моста идет через ту же шину
+            await engine.poll_cycle()
+            reply = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: client.write_registers(THRESHOLD.address, encode_value("FLOAT 32", 42.5),
+                                                     device_id=self.unit_id))
+            values = await engine.poll_cycle()
+            await engine.close()
+            return reply, values
+
+        reply, values = asyncio.run(run())
+        self.assertFalse(reply.isError())
+        words = [simulator.registers[THRESHOLD.address], simulator.registers[THRESHOLD.address + 1]]
+        self.assertEqual(decode_value("FLOAT 32", words), 42.5)
+        self.assertEqual(set(values["tpm"]), {0, 2, 4})
+
+
+if __name__ == "__main__":
+    unittest.main()
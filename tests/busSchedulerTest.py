@@ -0,0 +1,141 @@
+import threading
+import time
+import unittest
+import serial
+from pymodbus.exceptions import ModbusIOException
+from bus_scheduler import SerialBusScheduler, LINK_TIMEOUTS
+
+
+class _FlakyPort:
+    """Клиент порта, который можно «отключить» и «подключить» обратно"""
+
+    def __init__(self):
+        self.port = "COM_TEST"
+        self.plugged = True
+        self.open = False
+        self.connects = 0
+        self.timeout = False
+        self.reads = 0
+        # Пока сброшен, чтение «висит» на линии
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def connect(self):
+        self.connects += 1
+        if not self.plugged:
+            raise serial.SerialException("Порт не найден")
+        self.open = True
+
+    def disconnect(self):
+        self.open = False
+
+    def _transport_open(self):
+        return self.open
+
+    def _read_registers(self, slave_id, address, count=2, use_cache=True):
+        self.reads += 1
+        self.gate.wait(5)
+        if not self.plugged:
+            raise serial.SerialException("Устройство отключено")
+        if self.timeout:
+            raise ModbusIOException("Нет ответа")
+        return [address] * count
+
+    def _write_registers(self, slave_id, address, registers):
+        return True
+
+    def data_order(self, slave_id):
+        return ("big", "little")
+
+
+class BusSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = SerialBusScheduler("COM_TEST", baudrate=115200, reconnect_delay=0.05)
+        self.port = _FlakyPort()
+        self.scheduler.client = self.port
+        self.scheduler.start()
+        self.addCleanup(self.scheduler.stop, 1)
+
+    def test_reconnects_after_port_loss(self):
+        self.assertEqual(self.scheduler._read_registers(1, 10, 1), [10])
+
+        self.port.plugged = False
+        with self.assertRaises(serial.SerialException):
+            self.scheduler._read_registers(1, 10, 1)
+        self.assertFalse(self.scheduler.available)
+        # Пока порта нет, задания завершаются сразу
+        with self.assertRaises(ConnectionError):
+            self.scheduler._read_registers(1, 10, 1)
+
+        self.port.plugged = True
+        time.sleep(0.5)
+        self.assertEqual(self.scheduler._read_registers(1, 11, 1), [11])
+        self.assertTrue(self.scheduler.available)
+        self.assertTrue(self.port.open)
+
+    def test_single_timeout_keeps_port_open(self):
+        self.port.timeout = True
+        for _ in range(LINK_TIMEOUTS - 1):
+            with self.assertRaises(ModbusIOException):
+                self.scheduler._read_registers(1, 10, 1)
+        self.assertTrue(self.scheduler.available)
+        self.assertEqual(self.port.connects, 1)
+
+        with self.assertRaises(ModbusIOException):
+            self.scheduler._read_registers(1, 10, 1)
+        self.assertFalse(self.port.open)
+
+        self.port.timeout = False
+        self.assertEqual(self.scheduler._read_registers(1, 12, 1), [12])
+        self.assertEqual(self.port.connects, 2)
+
+
+    def test_concurrent_readers_share_one_transaction(self):
+        self.port.gate.clear()
+        results = {}
+
+        def read(name, address, count):
+            results[name] = self.scheduler._read_registers(1, address, count)
+
+        readers = [threading.Thread(target=read, args=("block", 10, 4)),
+                   threading.Thread(target=read, args=("part", 11, 2))]
+        readers[0].start()
+        time.sleep(0.1)
+        readers[1].start()
+        time.sleep(0.1)
+        self.port.gate.set()
+        for reader in readers:
+            reader.join(5)
+
+        self.assertEqual(self.port.reads, 1)
+        self.assertEqual(results, {"block": [10] * 4, "part": [10] * 2})
+        self.assertEqual(self.scheduler.single_flight.stats()["hits"], 1)
+
+    def test_write_stops_sharing_earlier_read(self):
+        self.port.gate.clear()
+        before = self.scheduler.submit_read(1, 10, 2)
+        time.sleep(0.1)
+        self.scheduler.submit_write(1, 10, [0])
+        after = self.scheduler.submit_read(1, 10, 2)
+        self.port.gate.set()
+
+        before.result(5)
+        after.result(5)
+        self.assertEqual(self.port.reads, 2)
+
+    def test_uncached_read_does_not_join_earlier_read(self):
+        self.port.gate.clear()
+        earlier = self.scheduler.submit_read(1, 10, 2)
+        time.sleep(0.1)
+        fresh = self.scheduler.submit_read(1, 10, 2, use_cache=False)
+        self.port.gate.set()
+
+        earlier.result(5)
+        fresh.result(5)
+        self.assertEqual(self.port.reads, 2)
+        self.assertEqual(self.scheduler.single_flight.stats()["hits"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from change_filter import ChangeFilter, Deadband
+from readers.read_planner import ReadSpan
+
+
+class DeadbandTest(unittest.TestCase):
+
+    def test_absolute_and_percent(self):
+        deadband = Deadband(absolute=0.5, percent=10.0)
+        self.assertFalse(deadband.exceeded(100.0, 105.0))
+        self.assertTrue(deadband.exceeded(100.0, 112.0))
+        self.assertFalse(deadband.exceeded(1.4, 1.0))
+        self.assertTrue(deadband.exceeded(1.6, 1.0))
+
+    def test_nan_and_zero_band(self):
+        nan = float("nan")
+        self.assertFalse(Deadband().exceeded(nan, nan))
+        self.assertTrue(Deadband().exceeded(1.0, nan))
+        self.assertTrue(Deadband().exceeded(1.0001, 1.0))
+
+    def test_negative_band_rejected(self):
+        with self.assertRaises(ValueError):
+            Deadband(absolute=-1.0)
+
+
+class ChangeFilterTest(unittest.TestCase):
+
+    def test_changed_and_max_silence(self):
+        changes = ChangeFilter(absolute=0.5, max_silence=10.0)
+        self.assertTrue(changes.changed("dev", 4000, 20.0, timestamp=0.0))
+        self.assertFalse(changes.changed("dev", 4000, 20.3, timestamp=1.0))
+        self.assertTrue(changes.changed("dev", 4000, 20.6, timestamp=2.0))
+        # Тег молчит дольше max_silence
+        self.assertTrue(changes.changed("dev", 4000, 20.6, timestamp=12.0))
+        self.assertEqual(changes.stats()["suppressed"], 1)
+
+    def test_exact_values_ignore_deadband(self):
+        changes = ChangeFilter(absolute=5.0)
+        self.assertTrue(changes.changed("dev", 4064, 1, exact=True, timestamp=0.0))
+        self.assertTrue(changes.changed("dev", 4064, 2, exact=True, timestamp=1.0))
+
+    def test_device_and_tag_deadbands(self):
+        changes = ChangeFilter(absolute=0.0)
+        changes.set_deadband("dev", absolute=1.0)
+        changes.set_deadband("dev:4000", absolute=10.0)
+        self.assertEqual(changes.deadband("dev", 4000).absolute, 10.0)
+        self.assertEqual(changes.deadband("dev", 4002).absolute, 1.0)
+        self.assertEqual(changes.deadband("other", 4000).absolute, 0.0)
+
+    def test_unchanged_block_is_not_decoded(self):
+        changes = ChangeFilter(max_silence=10.0)
+        span = ReadSpan(4000, 2, [(4000, "FLOAT 32")])
+        decoded = []
+
+        def decode():
+            decoded.append(True)
+            return {4000: 23.5}
+
+        self.assertEqual(changes.filter_block("dev", span, [0, 48193], decode, timestamp=0.0), {4000: 23.5})
+        self.assertEqual(changes.filter_block("dev", span, [0, 48193], decode, timestamp=1.0), {})
+        self.assertEqual(len(decoded), 1)
+        self.assertEqual(changes.stats()["blocks_skipped"], 1)
+
+        # Пауза дольше max_silence - блок разбирается и передается
+        self.assertEqual(changes.filter_block("dev", span, [0, 48193], decode, timestamp=11.0), {4000: 23.5})
+
+        changes.reset()
+        self.assertEqual(changes.filter_block("dev", span, [0, 48193], decode, timestamp=12.0), {4000: 23.5})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import time
+import unittest
+from circuit_breaker import DeviceBreakers, BreakerState
+from events import DeviceQuarantined, DeviceProbing, DeviceRecovered
+
+
+class DeviceBreakersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.breakers = DeviceBreakers(failure_threshold=2, base_backoff=0.05, max_backoff=0.1, metrics=None)
+        self.events = []
+        self.breakers.subscribe(self.events.append)
+
+    def _quarantine(self):
+        for _ in range(2):
+            self.breakers.record_failure("A")
+
+    def test_opens_after_threshold(self):
+        self.breakers.record_failure("A")
+        self.assertIs(self.breakers.check("A"), BreakerState.CLOSED)
+        self.breakers.record_failure("A")
+        self.assertIs(self.breakers.check("A"), BreakerState.OPEN)
+        self.assertIsInstance(self.events[-1], DeviceQuarantined)
+
+    def test_success_resets_failures(self):
+        self.breakers.record_failure("A")
+        self.breakers.record_success("A")
+        self.breakers.record_failure("A")
+        self.assertIs(self.breakers.check("A"), BreakerState.CLOSED)
+
+    def test_single_probe_then_recovery(self):
+        self._quarantine()
+        time.sleep(0.06)
+        self.assertIs(self.breakers.check("A"), BreakerState.HALF_OPEN)
+        # Пока идет пробный запрос, остальные потребители устройство пропускают
+        self.assertIs(self.breakers.check("A"), BreakerState.OPEN)
+
+        self.breakers.record_success("A")
+        self.assertIs(self.breakers.check("A"), BreakerState.CLOSED)
+        self.assertEqual([type(event) for event in self.events], [DeviceQuarantined, DeviceProbing, DeviceRecovered])
+
+    def test_failed_probe_doubles_backoff_up_to_limit(self):
+        self._quarantine()
+        for expected in (0.1, 0.1):
+            time.sleep(self.breakers.retry_in("A") + 0.01)
+            self.assertIs(self.breakers.check("A"), BreakerState.HALF_OPEN)
+            self.breakers.record_failure("A")
+            self.assertEqual(self.breakers.breaker("A").backoff, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
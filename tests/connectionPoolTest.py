@@ -0,0 +1,102 @@
+import unittest
+from pymodbus.exceptions import ModbusIOException
+from benchmarks.simulators import TcpDeviceSimulator, RtuDeviceSimulator
+from bus_scheduler import SerialBusScheduler
+from connection_pool import ConnectionPool
+
+
+class ConnectionPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = TcpDeviceSimulator().start()
+        self.addCleanup(self.simulator.stop)
+        self.pool = ConnectionPool(timeout=0.5)
+        self.addCleanup(self.pool.close_all)
+
+    def _device(self, device_id, **extra):
+        return dict(type="tcp", ip=self.simulator.host, port=self.simulator.port, device_id=device_id, **extra)
+
+    def test_endpoint_key(self):
+        self.assertEqual(ConnectionPool.endpoint_key({"type": "tcp", "ip": "10.0.0.1"}), ("tcp", "10.0.0.1", 502))
+        self.assertEqual(ConnectionPool.endpoint_key({"type": "rtu", "port": "COM3", "baudrate": 19200}),
+                         ("rtu", "COM3", 19200, 8, 'N', 1))
+        with self.assertRaises(ValueError):
+            ConnectionPool.endpoint_key({"type": "ascii"})
+
+    def test_devices_share_endpoint_connection(self):
+        with self.pool.lease(self._device(1)) as first:
+            first.read_int(1, 0)
+        with self.pool.lease(self._device(2, word_order="little")) as second:
+            second.read_int(2, 0)
+
+        self.assertIs(first, second)
+        self.assertEqual(second.data_order(2), ("little", "little"))
+        self.assertEqual(len(self.pool._entries), 1)
+
+    def test_link_error_closes_connection(self):
+        with self.assertRaises(ModbusIOException):
+            with self.pool.lease(self._device(1)) as client:
+                raise ModbusIOException("нет ответа")
+        self.assertFalse(client._transport_open())
+
+        # Следующая выдача подключается заново
+        with self.pool.lease(self._device(1)) as again:
+            self.assertIs(again, client)
+            self.assertTrue(again._transport_open())
+
+    def test_idle_connections_are_evicted(self):
+        with self.pool.lease(self._device(1)) as client:
+            pass
+        self.pool.idle_timeout = 0.0
+        self.pool.evict_idle()
+        self.assertEqual(self.pool._entries, {})
+        self.assertFalse(client._transport_open())
+
+
+class SerialPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = RtuDeviceSimulator(baudrate=115200).start()
+        self.addCleanup(self.simulator.stop)
+        self.pool = ConnectionPool(timeout=0.5)
+        self.addCleanup(self.pool.close_all)
+
+    def _device(self, device_id, baudrate=115200):
+        return dict(type="rtu", port=self.simulator.port, baudrate=baudrate, device_id=device_id)
+
+    def test_devices_on_port_share_bus(self):
+        with self.pool.lease(self._device(1)) as first:
+            self.assertEqual(first._read_registers(1, 10, 2), [self.simulator.registers.get(10, 0),
+                                                              self.simulator.registers.get(11, 0)])
+        with self.pool.lease(self._device(2)) as second:
+            self.assertTrue(second.write_int(2, 12, 7))
+
+        self.assertIsInstance(first, SerialBusScheduler)
+        self.assertIs(first, second)
+        self.assertIs(self.pool.bus(self._device(1)), first)
+        self.assertEqual(self.simulator.registers[12], 7)
+
+    def test_link_error_keeps_bus(self):
+        with self.assertRaises(ModbusIOException):
+            with self.pool.lease(self._device(1)) as bus:
+                raise ModbusIOException("нет ответа")
+        # Потерю порта обрабатывает поток шины, пул ее не закрывает
+        self.assertTrue(bus.is_connected())
+        self.pool.idle_timeout = 0.0
+        self.pool.evict_idle()
+        self.assertTrue(bus.is_connected())
+
+    def test_other_line_settings_stop_bus(self):
+        first = self.pool.bus(self._device(1))
+        second = self.pool.scheduler(self._device(1, baudrate=9600))
+        self.assertIsNot(first, second)
+        self.assertFalse(first.is_connected())
+        self.assertEqual(list(self.pool._buses.values()), [second])
+
+    def test_scheduler_requires_serial_device(self):
+        with self.assertRaises(ValueError):
+            self.pool.scheduler({"type": "tcp", "ip": "10.0.0.1"})
+
+
+if __name__ == "__main__":
+    unittest.main()
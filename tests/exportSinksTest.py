@@ -0,0 +1,87 @@
+import threading
+import unittest
+from export_sinks import ExportSink, SinkPipeline
+
+
+class _MemorySink(ExportSink):
+    name = "memory"
+
+    def __init__(self):
+        self.rows = []
+
+    def write(self, rows):
+        self.rows.extend(rows)
+
+
+class _BrokenSink(ExportSink):
+    name = "broken"
+
+    def open(self):
+        raise OSError("нет доступа")
+
+    def write(self, rows):
+        raise AssertionError("запись в неоткрытый приемник")
+
+
+class _SlowSink(_MemorySink):
+    name = "slow"
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, rows):
+        self.release.wait()
+        super().write(rows)
+
+
+class SinkPipelineTest(unittest.TestCase):
+
+    def test_sink_must_implement_write(self):
+        class _NoWriteSink(ExportSink):
+            pass
+
+        with self.assertRaises(TypeError):
+            _NoWriteSink()
+
+    def test_rows_reach_sink_before_close(self):
+        sink = _MemorySink()
+        pipeline = SinkPipeline([sink])
+        pipeline.start()
+        for i in range(10):
+            pipeline.submit([(float(i), "tag", float(i))])
+        pipeline.close(timeout=5.0)
+        self.assertEqual(len(sink.rows), 10)
+
+    def test_close_does_not_hang_on_sink_that_failed_to_open(self):
+        sink = _MemorySink()
+        pipeline = SinkPipeline([_BrokenSink(), sink], maxsize=4)
+        pipeline.start()
+        pipeline.workers[0].thread.join(5.0)
+
+        # Больше пакетов, чем вмещает очередь
+        for i in range(10):
+            pipeline.submit([(float(i), "tag", float(i))])
+        pipeline.close(timeout=5.0)
+
+        stats = pipeline.stats()
+        self.assertEqual(stats["broken"]["dropped_batches"], 10)
+        self.assertEqual(stats["broken"]["queue_depth"], 0)
+        self.assertEqual(len(sink.rows) + stats["memory"]["dropped_rows"], 10)
+
+    def test_close_respects_timeout_with_full_queue(self):
+        sink = _SlowSink()
+        pipeline = SinkPipeline([sink], maxsize=2)
+        pipeline.start()
+        for i in range(5):
+            pipeline.submit([(float(i), "tag", float(i))])
+
+        pipeline.close(timeout=0.3)
+        self.assertTrue(pipeline.workers[0].thread.is_alive())
+        sink.release.set()
+        pipeline.workers[0].thread.join(5.0)
+        self.assertFalse(pipeline.workers[0].thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import historian as historian_module
+from historian import Historian, RECORD, INDEX, QUALITY_GOOD, DAY, segment_day
+
+# 2024-01-01 00:00:00 UTC
+DAY_START = 1704067200.0
+
+
+class HistorianTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = self.directory.name
+
+    def _historian(self, chunk_records=4):
+        historian = Historian(self.path, chunk_records=chunk_records)
+        self.addCleanup(historian.close)
+        return historian
+
+    def test_segment_record_and_index_format(self):
+        historian = self._historian()
+        for i in range(6):
+            historian.append("dev:4000", float(i), DAY_START + i)
+        historian.flush()
+
+        day = segment_day(DAY_START)
+        self.assertEqual(day, "2024-01-01")
+        with open(os.path.join(self.path, f"{day}.seg"), "rb") as f:
+            records = list(RECORD.iter_unpack(f.read()))
+        with open(os.path.join(self.path, f"{day}.idx"), "rb") as f:
+            index = list(INDEX.iter_unpack(f.read()))
+
+        self.assertEqual(RECORD.size, 24)
+        self.assertEqual(records[0], (DAY_START, 0, QUALITY_GOOD, 0.0))
+        self.assertEqual(len(records), 6)
+        # Индекс пишется на каждый полный блок из chunk_records записей
+        self.assertEqual(index, [(DAY_START, DAY_START + 3, 0, 4)])
+
+    def test_records_split_by_day(self):
+        historian = self._historian()
+        historian.append("dev:4000", 1.0, DAY_START - 1)
+        historian.append("dev:4000", 2.0, DAY_START + 1)
+        historian.flush()
+        self.assertEqual(historian.segments(), ["2023-12-31", "2024-01-01"])
+
+        timestamps, values, _ = historian.query("dev:4000", DAY_START - DAY, DAY_START + DAY)
+        self.assertEqual(list(timestamps), [DAY_START - 1, DAY_START + 1])
+        self.assertEqual(list(values), [1.0, 2.0])
+
+    def test_query_uses_index_and_tail(self):
+        historian = self._historian()
+        for i in range(10):
+            historian.append("dev:4000", float(i), DAY_START + i)
+            historian.append("dev:4002", -float(i), DAY_START + i)
+        historian.flush()
+
+        timestamps, values, quality = historian.query("dev:4002", DAY_START + 3, DAY_START + 9)
+        self.assertEqual(list(values), [-3.0, -4.0, -5.0, -6.0, -7.0, -8.0])
+        self.assertTrue(all(q == QUALITY_GOOD for q in quality))
+
+    def test_torn_tail_is_dropped_on_reopen(self):
+        historian = self._historian()
+        for i in range(5):
+            historian.append("dev:4000", float(i), DAY_START + i)
+        historian.close()
+
+        data_path = os.path.join(self.path, f"{segment_day(DAY_START)}.seg")
+        with open(data_path, "ab") as f:
+            f.write(b"\x00" * 10)
+
+        reopened = self._historian()
+        reopened.append("dev:4000", 5.0, DAY_START + 5)
+        reopened.flush()
+        self.assertEqual(os.path.getsize(data_path), 6 * RECORD.size)
+        self.assertEqual(reopened.tag_id("dev:4000"), 0)
+        _, values, _ = reopened.query("dev:4000", DAY_START, DAY_START + 10)
+        self.assertEqual(list(values), [0.0, 1.0, 2.0, 3.0, 4.0, 5.0])
+
+    def test_disk_error_keeps_records_queued(self):
+        historian = self._historian()
+        for i in range(3):
+            historian.append("dev:4000", float(i), DAY_START + i)
+
+        with mock.patch.object(historian_module._Segment, "write", side_effect=OSError("диск недоступен")):
+            with self.assertRaises(OSError):
+                historian.flush()
+        self.assertEqual(historian.stats(), {"written": 0, "pending": 3, "dropped": 0})
+
+        self.assertEqual(historian.flush(), 3)
+        _, values, _ = historian.query("dev:4000", DAY_START, DAY_START + 10)
+        self.assertEqual(list(values), [0.0, 1.0, 2.0])
+        self.assertEqual(historian.stats(), {"written": 3, "pending": 0, "dropped": 0})
+
+    def test_records_over_max_pending_are_dropped(self):
+        historian = Historian(self.path, max_pending=2)
+        self.addCleanup(historian.close)
+        for i in range(3):
+            historian.append("dev:4000", float(i), DAY_START + i)
+
+        with mock.patch.object(historian_module._Segment, "write", side_effect=OSError("диск недоступен")):
+            with self.assertRaises(OSError):
+                historian.flush()
+        self.assertEqual(historian.stats(), {"written": 0, "pending": 2, "dropped": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
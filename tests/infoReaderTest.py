@@ -0,0 +1,36 @@
+import unittest
+from config.register_map import MB210_101
+from readers.mb210101_reader import InfoReaderMB210101
+
+
+class _DeviceClient:
+    """Клиент с регистрами прибора: целые младшим регистром вперед"""
+
+    def __init__(self, registers):
+        self.registers = registers
+
+    def _read_registers(self, slave_id, address, count=2, use_cache=True):
+        return [self.registers.get(address + i, 0) for i in range(count)]
+
+    def data_order(self, slave_id):
+        return (None, None)
+
+
+class InfoReaderMB210101Test(unittest.TestCase):
+
+    def _sensor_type_address(self, channel):
+        return MB210_101.field("Тип датчика входа", channel).address
+
+    def test_configured_sensor_type(self):
+        address = self._sensor_type_address(1)
+        reader = InfoReaderMB210101(_DeviceClient({address: 35, address + 1: 0}))
+        self.assertTrue(reader.get_sensor_info(1, 1))
+
+    def test_unconfigured_sensor_type(self):
+        address = self._sensor_type_address(1)
+        reader = InfoReaderMB210101(_DeviceClient({address: 41, address + 1: 0}))
+        self.assertFalse(reader.get_sensor_info(1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from link_health import LinkHealth, LinkState
+
+
+class LinkHealthTest(unittest.TestCase):
+
+    def test_failures_degrade_then_drop_link(self):
+        link = LinkHealth(down_after=3)
+        link.record_failure()
+        self.assertIs(link.state, LinkState.DEGRADED)
+        link.record_failure()
+        link.record_failure()
+        self.assertIs(link.state, LinkState.DOWN)
+        self.assertEqual(link.consecutive_failures, 3)
+
+    def test_success_restores_link(self):
+        link = LinkHealth(down_after=1)
+        link.record_failure()
+        link.record_success(7)
+        self.assertIs(link.state, LinkState.CONNECTED)
+        self.assertEqual(link.consecutive_failures, 0)
+        self.assertEqual(link.last_slave_id, 7)
+
+    def test_heartbeat_only_after_idle(self):
+        link = LinkHealth(heartbeat_interval=0.05)
+        self.assertFalse(link.needs_heartbeat())
+        link._last_activity -= 0.1
+        self.assertTrue(link.needs_heartbeat())
+        link.record_success()
+        self.assertFalse(link.needs_heartbeat())
+
+    def test_reset(self):
+        link = LinkHealth(down_after=1)
+        link.record_failure()
+        link.reset()
+        self.assertIs(link.state, LinkState.CONNECTED)
+        self.assertEqual(link.consecutive_failures, 0)
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            LinkHealth(heartbeat_interval=0)
+        with self.assertRaises(ValueError):
+            LinkHealth(down_after=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import logging
+import queue
+import unittest
+from Logger.logger import (_LazyQueueHandler, log_function_call, set_profile, setup_logger,
+                           PROFILE_DEBUG, PROFILE_PRODUCTION)
+
+
+class _Counted:
+    """Аргумент, считающий, сколько раз его превращали в строку"""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __repr__(self):
+        self.formatted += 1
+        return "counted"
+
+    __str__ = __repr__
+
+
+class LoggerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(set_profile, PROFILE_DEBUG)
+
+    def test_queue_handler_does_not_format(self):
+        records = queue.SimpleQueue()
+        log = logging.getLogger("loggerTest.lazy")
+        log.propagate = False
+        log.setLevel(logging.DEBUG)
+        handler = _LazyQueueHandler(records)
+        log.addHandler(handler)
+        self.addCleanup(log.removeHandler, handler)
+
+        argument = _Counted()
+        log.debug("значение %s", argument)
+
+        record = records.get_nowait()
+        self.assertEqual(argument.formatted, 0)
+        self.assertEqual(record.getMessage(), "значение counted")
+
+    def test_disabled_level_skips_call_formatting(self):
+        @log_function_call(name="loggerTest.calls", level=logging.DEBUG)
+        def call(argument):
+            return argument
+
+        argument = _Counted()
+        set_profile(PROFILE_PRODUCTION)
+        self.assertIs(call(argument), argument)
+        self.assertEqual(argument.formatted, 0)
+        self.assertFalse(logging.getLogger("loggerTest.calls").isEnabledFor(logging.INFO))
+
+        set_profile(PROFILE_DEBUG)
+        self.assertTrue(logging.getLogger("loggerTest.calls").isEnabledFor(logging.DEBUG))
+
+    def test_setup_logger_is_idempotent(self):
+        log = setup_logger("loggerTest.once", logging.INFO)
+        self.assertIs(setup_logger("loggerTest.once", logging.DEBUG), log)
+        self.assertEqual(len(log.handlers), 1)
+        self.assertEqual(log.level, logging.INFO)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            set_profile("verbose")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import serial
+from exceptions import DeviceDisconnectedError
+from med_stream import MedStreamReader, MAX_LINE_LENGTH
+
+
+class _ScriptedPort:
+    """Порт, отдающий заданные блоки байт, затем ошибку отключения"""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.in_waiting = 0
+
+    def read(self, size):
+        if not self.chunks:
+            raise serial.SerialException("порт отключен")
+        return self.chunks.pop(0)
+
+    def close(self):
+        pass
+
+
+class MedStreamReaderTest(unittest.TestCase):
+
+    def _run(self, chunks, maxsize=16):
+        reader = MedStreamReader("COM_TEST", maxsize=maxsize)
+        reader._serial = _ScriptedPort(chunks)
+        reader._running.set()
+        reader._run()
+        return reader
+
+    def test_lines_split_across_chunks(self):
+        reader = self._run([b"12.5\r\n1", b"3.0\n", b"oops\n14"])
+        values = [sample.value for sample in reader.drain(0)]
+        self.assertEqual(values, [12.5, 13.0])
+        self.assertEqual(reader.stats()["malformed"], 1)
+        self.assertEqual(reader.latest.value, 13.0)
+
+    def test_overlong_line_is_dropped_and_resynced(self):
+        noise = b"\xff" * (MAX_LINE_LENGTH + 1)
+        reader = self._run([b"1.0\n", noise, noise, b"\xff\n2.0\n"])
+        self.assertEqual([sample.value for sample in reader.drain(0)], [1.0, 2.0])
+        self.assertEqual(reader.stats()["malformed"], 2)
+
+    def test_oldest_samples_are_dropped_when_full(self):
+        reader = self._run([b"1\n2\n3\n4\n"], maxsize=2)
+        self.assertEqual([sample.value for sample in reader.drain(0)], [3.0, 4.0])
+        self.assertEqual(reader.stats()["dropped"], 2)
+
+    def test_disconnect_is_reported(self):
+        reader = self._run([])
+        with self.assertRaises(DeviceDisconnectedError):
+            reader.get(timeout=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import urllib.error
+import urllib.request
+from metrics import (Histogram, MetricsRegistry, MetricsServer, pdu_sizes, OUTCOME_EXCEPTION, OUTCOME_TIMEOUT,
+                     TCP_FRAME_OVERHEAD)
+
+
+class HistogramTest(unittest.TestCase):
+
+    def test_buckets_and_quantiles(self):
+        histogram = Histogram((0.01, 0.1, 1.0))
+        for value in (0.005, 0.05, 0.05, 2.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(), [("0.01", 1), ("0.1", 3), ("1.0", 3), ("+Inf", 4)])
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(1.0), float("inf"))
+        self.assertIsNone(Histogram().quantile(0.5))
+
+
+class MetricsRegistryTest(unittest.TestCase):
+
+    def test_pdu_sizes(self):
+        self.assertEqual(pdu_sizes(3, 10), (5, 22))
+        self.assertEqual(pdu_sizes(16, 2), (10, 5))
+        self.assertEqual(pdu_sizes(3, 10, exception=True), (5, 2))
+
+    def test_snapshot_counts_transactions(self):
+        registry = MetricsRegistry()
+        registry.observe("COM3", 1, 3, 0.02, 8, 9, bus="COM3")
+        registry.observe("COM3", 1, 3, 0.03, 8, 5, OUTCOME_EXCEPTION, exception_code=2, bus="COM3")
+        registry.observe("COM3", 1, 3, 0.5, 8, 0, OUTCOME_TIMEOUT, bus="COM3")
+        registry.observe_shared("COM3", 1, 2, 0.04)
+
+        [device] = registry.snapshot()["devices"]
+        self.assertEqual(device["requests"], 3)
+        self.assertEqual(device["outcomes"], {"ok": 1, "exception": 1, "timeout": 1})
+        self.assertEqual(device["exception_codes"], {2: 1})
+        self.assertEqual((device["bytes_sent"], device["bytes_received"]), (24, 14))
+        snapshot = registry.snapshot()
+        self.assertAlmostEqual(snapshot["buses"]["COM3"]["busy_seconds"], 0.55)
+        self.assertEqual(snapshot["shared_reads"], [{"endpoint": "COM3", "slave_id": 1, "reads": 2, "saved_seconds": 0.04}])
+
+        registry.reset()
+        self.assertEqual(registry.snapshot()["devices"], [])
+
+    def test_prometheus_format(self):
+        registry = MetricsRegistry()
+        registry.observe('10.0.0.1:502 "a"', 2, 3, 0.004, TCP_FRAME_OVERHEAD + 5, TCP_FRAME_OVERHEAD + 6)
+        registry.observe_breaker("Прибор", "open")
+
+        text = registry.render_prometheus()
+        labels = 'endpoint="10.0.0.1:502 \\"a\\"",slave="2",function="3"'
+        self.assertIn(f"modbus_requests_total{{{labels}}} 1", text)
+        self.assertIn(f'modbus_request_duration_seconds_bucket{{{labels},le="0.005"}} 1', text)
+        self.assertIn(f'modbus_bytes_total{{{labels},direction="tx"}} 12', text)
+        self.assertIn('modbus_device_quarantined{device="Прибор"} 1', text)
+        self.assertTrue(text.endswith("\n"))
+
+
+class MetricsServerTest(unittest.TestCase):
+
+    def test_serves_metrics(self):
+        registry = MetricsRegistry()
+        registry.observe("COM3", 1, 3, 0.01, 8, 9)
+        server = MetricsServer(registry, port=0)
+        server.start()
+        self.addCleanup(server.stop)
+
+        with urllib.request.urlopen(f"http://{server.host}:{server.port}/metrics", timeout=5) as response:
+            self.assertEqual(response.status, 200)
+            self.assertIn("modbus_requests_total", response.read().decode("utf-8"))
+        with self.assertRaises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://{server.host}:{server.port}/other", timeout=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import pstats
+import tempfile
+import time
+import unittest
+from profiling import CycleProfiler, MODE_CPROFILE, MODE_SAMPLE, MODE_TRACEMALLOC
+
+
+def _work():
+    return sum(i * i for i in range(20000))
+
+
+class CycleProfilerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.control_file = os.path.join(self.directory.name, "profile.request")
+        self.profiler = CycleProfiler(self.directory.name, self.control_file, check_interval=0.0,
+                                      sample_interval=0.001)
+        self.addCleanup(self.profiler.stop)
+
+    def _run_cycles(self, count):
+        for _ in range(count):
+            with self.profiler.cycle():
+                _work()
+
+    def _outputs(self, suffix):
+        return [name for name in os.listdir(self.directory.name) if name.endswith(suffix)]
+
+    def test_idle_cycles_are_not_profiled(self):
+        self._run_cycles(3)
+        self.assertFalse(self.profiler.active)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_cprofile_session_covers_requested_cycles(self):
+        self.profiler.request(MODE_CPROFILE, 2)
+        self._run_cycles(1)
+        self.assertTrue(self.profiler.active)
+        self._run_cycles(1)
+        self.assertFalse(self.profiler.active)
+
+        [name] = self._outputs(".pstats")
+        stats = pstats.Stats(os.path.join(self.directory.name, name))
+        self.assertTrue(any(function[2] == "_work" for function in stats.stats))
+
+    def test_sample_mode_writes_collapsed_stacks(self):
+        self.profiler.request(MODE_SAMPLE, 1)
+        with self.profiler.cycle():
+            deadline = time.monotonic() + 0.1
+            while time.monotonic() < deadline:
+                _work()
+
+        [name] = self._outputs(".collapsed")
+        with open(os.path.join(self.directory.name, name), encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(any("_work" in line for line in lines))
+
+    def test_tracemalloc_mode_writes_diff_per_cycle(self):
+        self.profiler.request(MODE_TRACEMALLOC, 2)
+        self._run_cycles(2)
+
+        [name] = self._outputs(".txt")
+        with open(os.path.join(self.directory.name, name), encoding="utf-8") as f:
+            self.assertEqual(f.read().count("=== Цикл"), 2)
+
+    def test_control_file_request(self):
+        with open(self.control_file, "w", encoding="utf-8") as f:
+            f.write("cprofile 1")
+        self._run_cycles(1)
+        self.assertFalse(os.path.exists(self.control_file))
+        self.assertEqual(len(self._outputs(".pstats")), 1)
+
+    def test_invalid_request(self):
+        with self.assertRaises(ValueError):
+            self.profiler.request("perf")
+        with self.assertRaises(ValueError):
+            self.profiler.request(MODE_CPROFILE, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
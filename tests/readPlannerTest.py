@@ -0,0 +1,66 @@
+import unittest
+from readers.read_planner import ReadPlanner, MAX_READ_COUNT
+from register_codec import encode_value
+
+
+class _MemoryClient:
+    """Клиент с регистрами в памяти, запоминает транзакции"""
+
+    def __init__(self, registers):
+        self.registers = registers
+        self.reads = []
+
+    def _read_registers(self, slave_id, address, count=2, use_cache=True):
+        self.reads.append((address, count))
+        return [self.registers.get(address + i, 0) for i in range(count)]
+
+
+class ReadPlannerTest(unittest.TestCase):
+
+    def test_adjacent_fields_share_span(self):
+        fields = [{"address": 10, "data_type": "FLOAT 32"}, {"address": 12, "data_type": "UINT 16"},
+                  {"address": 20, "data_type": "INT 16"}, {"address": 40, "data_type": "UINT 16"}]
+        spans = ReadPlanner(None, max_gap=8).plan(fields)
+        self.assertEqual([(span.address, span.count) for span in spans], [(10, 11), (40, 1)])
+
+    def test_gap_limit(self):
+        fields = [{"address": 0, "data_type": "UINT 16"}, {"address": 3, "data_type": "UINT 16"}]
+        self.assertEqual(len(ReadPlanner(None, max_gap=2).plan(fields)), 1)
+        self.assertEqual(len(ReadPlanner(None, max_gap=1).plan(fields)), 2)
+
+    def test_span_limit(self):
+        fields = [{"address": address, "data_type": "UINT 16"} for address in range(0, 200)]
+        spans = ReadPlanner(None).plan(fields)
+        self.assertEqual([span.count for span in spans], [MAX_READ_COUNT, 200 - MAX_READ_COUNT])
+
+    def test_duplicates_and_offset(self):
+        fields = [{"address": 5, "data_type": "UINT 16"}, {"address": 5, "data_type": "UINT 16"}]
+        spans = ReadPlanner(None).plan(fields, offset=100)
+        self.assertEqual([(span.address, span.fields) for span in spans], [(105, [(105, "UINT 16")])])
+
+    def test_read_decodes_fields(self):
+        registers = dict(zip((10, 11), encode_value("FLOAT 32", 23.5)))
+        registers[12] = 600
+        client = _MemoryClient(registers)
+        fields = [{"address": 10, "data_type": "FLOAT 32"}, {"address": 12, "data_type": "UINT 16"}]
+
+        values = ReadPlanner(client).read(1, fields)
+
+        self.assertEqual(values, {10: 23.5, 12: 600})
+        self.assertEqual(client.reads, [(10, 3)])
+
+    def test_short_reply(self):
+        planner = ReadPlanner(None)
+        span = planner.plan([{"address": 0, "data_type": "FLOAT 32"}])[0]
+        with self.assertRaises(ValueError):
+            planner.decode(span, [0])
+
+    def test_invalid_limits(self):
+        with self.assertRaises(ValueError):
+            ReadPlanner(None, max_count=MAX_READ_COUNT + 1)
+        with self.assertRaises(ValueError):
+            ReadPlanner(None, max_gap=-1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from register_cache import RegisterCache, ACCESS_READ_WRITE
+
+FIELDS = [{"address": 10, "data_type": "FLOAT 32", "access": ACCESS_READ_WRITE},
+          {"address": 12, "data_type": "UINT 16", "access": "Только чтение"}]
+
+
+class RegisterCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = RegisterCache(ttl=10.0)
+        self.cache.cache_fields(1, FIELDS)
+
+    def test_only_setting_registers_are_cached(self):
+        self.assertTrue(self.cache.is_cacheable(1, 10, 2))
+        self.assertFalse(self.cache.is_cacheable(1, 10, 3))
+        self.assertFalse(self.cache.is_cacheable(2, 10, 2))
+
+        self.cache.put(1, 10, [1, 2, 3])
+        self.assertEqual(self.cache.get(1, 10, 2), [1, 2])
+        self.assertIsNone(self.cache.get(1, 12, 1))
+        self.assertEqual(self.cache.stats(), {"hits": 1, "misses": 0, "bypassed": 1, "size": 2})
+
+    def test_expired_values_are_misses(self):
+        self.cache.ttl = -1.0
+        self.cache.put(1, 10, [1, 2])
+        self.assertIsNone(self.cache.get(1, 10, 2))
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_invalidate_and_flush(self):
+        self.cache.cache_fields(2, FIELDS, access=None)
+        self.cache.put(1, 10, [1, 2])
+        self.cache.put(2, 10, [1, 2, 3])
+
+        self.cache.invalidate(1, 11)
+        self.assertIsNone(self.cache.get(1, 10, 2))
+        self.cache.flush(2)
+        self.assertEqual(self.cache.stats()["size"], 1)
+        self.cache.flush()
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
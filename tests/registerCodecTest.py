@@ -0,0 +1,106 @@
+import random
+import struct
+import sys
+import unittest
+from register_codec import compile_layout, decode_value, encode_value, device_data_order, np
+
+ORDERS = [(None, None), ("big", "big"), ("big", "little"), ("little", "big"), ("little", "little")]
+
+
+def baseline_read_float(registers):
+    """read_float до перехода на register_codec"""
+    return struct.unpack('f', struct.pack('>HH', registers[1], registers[0]))[0]
+
+
+def baseline_write_float(value):
+    """write_float до перехода на register_codec"""
+    float_bytes = struct.pack('f', value)
+    return [struct.unpack('>H', float_bytes[2:4])[0], struct.unpack('>H', float_bytes[0:2])[0]]
+
+
+@unittest.skipUnless(sys.byteorder == "little", "исходные формулы зависят от порядка байт x86")
+class BaselineCompatibilityTest(unittest.TestCase):
+
+    def test_known_value(self):
+        self.assertEqual(decode_value("FLOAT 32", [48193, 0]), 23.5)
+        self.assertEqual(encode_value("FLOAT 32", 23.5), [48193, 0])
+
+    def test_float_round_trip_matches_baseline(self):
+        rng = random.Random(1)
+        for _ in range(1000):
+            registers = [rng.randrange(65536), rng.randrange(65536)]
+            value = baseline_read_float(registers)
+            if value != value:
+                continue
+            self.assertEqual(decode_value("FLOAT 32", registers), value)
+            self.assertEqual(encode_value("FLOAT 32", value), baseline_write_float(value))
+
+    def test_int16_is_raw_register(self):
+        # Исходный read_int возвращал регистр как есть
+        for order in ORDERS:
+            self.assertEqual(decode_value("UINT 16", [0x1234], *order), 0x1234)
+            self.assertEqual(encode_value("UINT 16", 0x1234, *order), [0x1234])
+            self.assertEqual(decode_value("INT 16", [0xFFFE], *order), -2)
+
+    def test_int32_low_register_first(self):
+        # Исходный read_int(count=2) возвращал младший регистр
+        self.assertEqual(decode_value("UINT 32", [35, 0]), 35)
+        self.assertEqual(encode_value("UINT 32", 35), [35, 0])
+        self.assertEqual(decode_value("UINT 32", [0x5678, 0x1234]), 0x12345678)
+        self.assertEqual(decode_value("INT 32", [0xFFFE, 0xFFFF]), -2)
+
+    def test_device_order_defaults_to_baseline(self):
+        self.assertEqual(device_data_order({}), (None, None))
+        self.assertEqual(device_data_order({"word_order": "little"}), ("little", "little"))
+        self.assertEqual(device_data_order({"word_order": "little", "byte_order": "big"}), ("little", "big"))
+
+
+class RegisterLayoutTest(unittest.TestCase):
+
+    FIELDS = ((4000, 0, "FLOAT 32"), (4002, 2, "UINT 16"), (4004, 4, "INT 32"), (4006, 6, "INT 16"),
+              (4007, 7, "UINT 32"))
+    VALUES = {4000: 23.5, 4002: 600, 4004: -70000, 4006: -5, 4007: 123456}
+
+    def test_block_matches_single_values(self):
+        for order in ORDERS:
+            layout = compile_layout(self.FIELDS, 10, *order)
+            registers = layout.encode([self.VALUES[key] for key in layout.keys])
+            self.assertEqual(len(registers), 10)
+            self.assertEqual(layout.decode_dict(registers), self.VALUES)
+            for key, offset, data_type in self.FIELDS:
+                width = 2 if data_type.endswith("32") else 1
+                self.assertEqual(registers[offset:offset + width], encode_value(data_type, self.VALUES[key], *order))
+
+    def test_named_orders(self):
+        # 0x41BC0000 = 23.5
+        expected = {("big", "big"): [0x41BC, 0x0000], ("big", "little"): [0xBC41, 0x0000],
+                    ("little", "big"): [0x0000, 0x41BC], ("little", "little"): [0x0000, 0xBC41]}
+        for order, registers in expected.items():
+            self.assertEqual(encode_value("FLOAT 32", 23.5, *order), registers)
+            self.assertEqual(decode_value("FLOAT 32", registers, *order), 23.5)
+
+    def test_decode_many(self):
+        for order in ORDERS:
+            layout = compile_layout(self.FIELDS, 10, *order)
+            registers = layout.encode([self.VALUES[key] for key in layout.keys])
+            rows = layout.decode_many([registers, registers])
+            self.assertEqual(len(rows), 2)
+            if np is not None:
+                self.assertEqual(int(rows[1][str(4007)]), 123456)
+                self.assertEqual(int(rows[0][str(4006)]), -5)
+            else:
+                self.assertEqual(dict(zip(layout.keys, rows[1])), self.VALUES)
+
+    def test_overlapping_fields(self):
+        layout = compile_layout(((0, 0, "FLOAT 32"), (1, 0, "UINT 16")), 2)
+        self.assertEqual(layout.decode_dict([0xBC41, 0]), {0: 23.5, 1: 0xBC41})
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValueError):
+            compile_layout(((0, 0, "FLOAT 64"),))
+        with self.assertRaises(ValueError):
+            decode_value("FLOAT 32", [0, 0], "middle", "big")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from config.register_map import RegisterMap, RegisterMapLoader, ACCESS_READ_ONLY, ACCESS_READ_WRITE
+
+SOURCE = [
+    {"name": "Тип", "access": ACCESS_READ_WRITE, "data_type": "UINT 32", "address": 100, "stride": 10},
+    {"name": "Значение", "data_type": "FLOAT 32", "address": 102, "stride": 10},
+    {"name": "Статус", "data_type": "UINT 16", "address": 104, "stride": 10},
+]
+
+
+class RegisterMapTest(unittest.TestCase):
+
+    def setUp(self):
+        self.register_map = RegisterMap("TEST", SOURCE, channels=2)
+
+    def test_channels_are_expanded(self):
+        self.assertEqual(len(self.register_map), 6)
+        field = self.register_map.field("Значение", 2)
+        self.assertEqual((field.address, field.width, field["data_type"]), (112, 2, "FLOAT 32"))
+        self.assertEqual([f.address for f in self.register_map.channel(1)], [100, 102, 104])
+
+    def test_lookup_by_address_and_access(self):
+        self.assertIs(self.register_map.at(113), self.register_map.field("Значение", 2))
+        self.assertIsNone(self.register_map.at(105))
+        self.assertEqual([f.name for f in self.register_map.where(ACCESS_READ_WRITE)], ["Тип", "Тип"])
+        self.assertEqual(len(self.register_map.where(ACCESS_READ_ONLY, channel=2)), 2)
+        with self.assertRaises(KeyError):
+            self.register_map.field("Нет такого")
+
+    def test_field_decode(self):
+        self.assertEqual(self.register_map.field("Тип").decode([35, 0]), 35)
+        self.assertEqual(self.register_map.field("Значение").decode([0x41BC, 0], "big", "big"), 23.5)
+
+    def test_invalid_maps(self):
+        with self.assertRaises(ValueError):
+            RegisterMap("OVERLAP", [{"name": "a", "data_type": "FLOAT 32", "address": 0},
+                                    {"name": "b", "data_type": "UINT 16", "address": 1}])
+        with self.assertRaises(ValueError):
+            RegisterMap("DUPLICATE", [SOURCE[0], SOURCE[0]])
+        with self.assertRaises(ValueError):
+            RegisterMap("RANGE", [{"name": "a", "data_type": "FLOAT 32", "address": 65535}])
+
+
+class RegisterMapLoaderTest(unittest.TestCase):
+
+    def test_compiled_map_is_cached(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            loader = RegisterMapLoader(cache_dir)
+            first = loader.load("TEST", SOURCE, 2)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            cached = loader.load("TEST", SOURCE, 2)
+            self.assertIsNot(cached, first)
+            self.assertEqual([repr(f) for f in cached], [repr(f) for f in first])
+            self.assertEqual(cached.field("Тип", 2).decode([7, 0]), 7)
+
+            # Изменение исходной карты дает новый файл кэша
+            loader.load("TEST", SOURCE[:2], 2)
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import asyncio
+import struct
+import unittest
+from concurrent.futures import Future
+from pymodbus.client import ModbusTcpClient
+from benchmarks.simulators import RtuDeviceSimulator, Faults
+from bridge_server import ILLEGAL_DATA_ADDRESS
+from connection_pool import ConnectionPool
+from exceptions import ModbusExceptionResponse
+from rtu_gateway import RtuGateway, _Bus, _GatewayError, _Request
+
+# Регистры за этой границей отсутствуют в устройстве
+LAST_ADDRESS = 109
+
+
+class _FakeScheduler:
+    """Планировщик шины: чтение из памяти, исключение 2 за LAST_ADDRESS"""
+
+    def __init__(self, fail_starts=0):
+        self.fail_starts = fail_starts
+        self.reads = []
+        self.available = True
+
+    def start(self):
+        if self.fail_starts:
+            self.fail_starts -= 1
+            raise ConnectionError("порт не открыт")
+
+    def stop(self, timeout=None):
+        pass
+
+    def submit_read(self, slave_id, address, count, **kwargs):
+        self.reads.append((address, count))
+        future = Future()
+        if address + count - 1 > LAST_ADDRESS:
+            future.set_exception(ModbusExceptionResponse(ILLEGAL_DATA_ADDRESS, "нет регистра"))
+        else:
+            future.set_result(list(range(address, address + count)))
+        return future
+
+
+def _read_pdu(address, count):
+    return struct.pack(">BHH", 3, address, count)
+
+
+class RtuGatewayTest(unittest.TestCase):
+
+    def _gateway(self, scheduler, coalesce_window=0.05):
+        gateway = RtuGateway([], host="127.0.0.1", port=0, coalesce_window=coalesce_window)
+        bus = _Bus(scheduler)
+        gateway.buses[("fake",)] = bus
+        gateway.routes[1] = bus
+        gateway.start()
+        self.addCleanup(gateway.stop)
+        return gateway
+
+    def _handle_all(self, gateway, requests):
+        async def run():
+            return await asyncio.gather(*(gateway._handle(client, 1, _read_pdu(address, count))
+                                          for client, address, count in requests), return_exceptions=True)
+        return asyncio.run_coroutine_threadsafe(run(), gateway._loop).result(5)
+
+    def test_riders_cover_overlapping_reads(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        bus = _Bus(_FakeScheduler())
+        requests = [_Request(client, 1, 3, address, count, None, loop.create_future())
+                    for client, address, count in [(1, 100, 4), (2, 102, 4), (3, 200, 2)]]
+        for request in requests:
+            bus.queues.setdefault(request.client, []).append(request)
+
+        address, count, riders = bus.riders(requests[0])
+        self.assertEqual((address, count), (100, 6))
+        self.assertEqual(riders, requests[:2])
+        self.assertEqual(list(bus.queues[3]), [requests[2]])
+
+    def test_coalesced_reads_share_one_transaction(self):
+        scheduler = _FakeScheduler()
+        gateway = self._gateway(scheduler)
+        replies = self._handle_all(gateway, [(1, 100, 4), (2, 102, 4)])
+
+        self.assertEqual(scheduler.reads, [(100, 6)])
+        self.assertEqual(replies[0], struct.pack(">BB4H", 3, 8, 100, 101, 102, 103))
+        self.assertEqual(replies[1], struct.pack(">BB4H", 3, 8, 102, 103, 104, 105))
+        self.assertEqual(gateway.stats()["coalesced"], 1)
+
+    def test_exception_in_coalesced_span_is_reissued_per_request(self):
+        scheduler = _FakeScheduler()
+        gateway = self._gateway(scheduler)
+        replies = self._handle_all(gateway, [(1, 104, 4), (2, 106, 6)])
+
+        self.assertEqual(scheduler.reads, [(104, 8), (104, 4), (106, 6)])
+        self.assertEqual(replies[0], struct.pack(">BB4H", 3, 8, 104, 105, 106, 107))
+        self.assertIsInstance(replies[1], _GatewayError)
+        self.assertEqual(replies[1].code, ILLEGAL_DATA_ADDRESS)
+        self.assertEqual(gateway.stats()["coalesced"], 0)
+
+    def test_bus_unavailable_at_start_is_reopened(self):
+        scheduler = _FakeScheduler(fail_starts=1)
+        gateway = self._gateway(scheduler)
+        bus = gateway.routes[1]
+        self.assertFalse(bus.available)
+
+        for _ in range(50):
+            if bus.available:
+                break
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), gateway._loop).result(5)
+        self.assertTrue(bus.available)
+        self.assertEqual(self._handle_all(gateway, [(1, 100, 1)])[0], struct.pack(">BBH", 3, 2, 100))
+
+    def test_gateway_shares_pool_bus(self):
+        simulator = RtuDeviceSimulator(Faults(latency=0.2), baudrate=115200).start()
+        self.addCleanup(simulator.stop)
+        pool = ConnectionPool(timeout=1.0)
+        self.addCleanup(pool.close_all)
+        device = {"name": "rtu", "type": "rtu", "port": simulator.port, "baudrate": 115200, "device_id": 1}
+        gateway = RtuGateway([device], host="127.0.0.1", port=0, pool=pool)
+        gateway.start()
+        self.addCleanup(gateway.stop)
+        bus = pool.bus(device)
+        self.assertIs(gateway.routes[1].scheduler, bus)
+
+        # Чтение шлюза присоединяется к чтению опроса, уже стоящему в очереди шины
+        polled = bus.submit_read(1, 0, 10)
+        client = ModbusTcpClient("127.0.0.1", port=gateway.port, timeout=5)
+        client.connect()
+        self.addCleanup(client.close)
+        reply = client.read_holding_registers(2, count=4, device_id=1)
+
+        self.assertEqual(reply.registers, polled.result(5)[2:6])
+        self.assertEqual(simulator.requests, 1)
+        self.assertEqual(bus.single_flight.stats()["hits"], 1)
+
+        gateway.stop()
+        self.assertTrue(bus.is_connected())
+
+
+if __name__ == "__main__":
+    unittest.main()
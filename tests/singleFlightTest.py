@@ -0,0 +1,59 @@
+import unittest
+from concurrent.futures import Future
+from single_flight import SingleFlight
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def setUp(self):
+        self.shared = []
+        self.flights = SingleFlight(lambda slave_id, waiters, elapsed: self.shared.append((slave_id, waiters)))
+        self.started = []
+
+    def _start(self):
+        future = Future()
+        self.started.append(future)
+        return future
+
+    def test_covered_read_joins_flight(self):
+        leader = self.flights.submit(1, 10, 4, self._start)
+        follower = self.flights.submit(1, 11, 2, self._start)
+        self.assertEqual(len(self.started), 1)
+
+        self.started[0].set_result([10, 11, 12, 13])
+        self.assertEqual(leader.result(1), [10, 11, 12, 13])
+        self.assertEqual(follower.result(1), [11, 12])
+        self.assertEqual(self.shared, [(1, 1)])
+        self.assertEqual(self.flights.in_flight(), 0)
+
+    def test_other_device_or_wider_range_starts_new_flight(self):
+        self.flights.submit(1, 10, 2, self._start)
+        self.flights.submit(2, 10, 2, self._start)
+        self.flights.submit(1, 10, 3, self._start)
+        self.assertEqual(len(self.started), 3)
+
+    def test_error_reaches_all_waiters(self):
+        leader = self.flights.submit(1, 10, 2, self._start)
+        follower = self.flights.submit(1, 10, 2, self._start)
+        self.started[0].set_exception(TimeoutError("нет ответа"))
+        for future in (leader, follower):
+            with self.assertRaises(TimeoutError):
+                future.result(1)
+
+    def test_cancelled_waiter_keeps_transaction(self):
+        leader = self.flights.submit(1, 10, 2, self._start)
+        follower = self.flights.submit(1, 10, 2, self._start)
+        leader.cancel()
+        self.assertFalse(self.started[0].cancelled())
+        self.started[0].set_result([1, 2])
+        self.assertEqual(follower.result(1), [1, 2])
+
+    def test_forget_stops_joining(self):
+        self.flights.submit(1, 10, 2, self._start)
+        self.flights.forget(1, 11, 1)
+        self.flights.submit(1, 10, 2, self._start)
+        self.assertEqual(len(self.started), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
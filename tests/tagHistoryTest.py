@@ -0,0 +1,53 @@
+import unittest
+from tag_history import RingBuffer, TagHistory, capacity_for, MAX_CAPACITY
+
+
+class RingBufferTest(unittest.TestCase):
+
+    def test_keeps_last_samples_contiguous(self):
+        buffer = RingBuffer(3)
+        for i in range(5):
+            buffer.append(float(i), 10.0 * i)
+        times, values = buffer.last()
+        self.assertEqual(list(times), [2.0, 3.0, 4.0])
+        self.assertEqual(list(values), [20.0, 30.0, 40.0])
+        self.assertEqual(buffer.latest(), (4.0, 40.0))
+        self.assertEqual(list(buffer.since(3.0)[1]), [30.0, 40.0])
+
+
+class TagHistoryTest(unittest.TestCase):
+
+    def test_capacity_from_period_and_retention(self):
+        self.assertEqual(capacity_for(0.5, 60.0), 120)
+        self.assertEqual(capacity_for(1e-6, 600.0), MAX_CAPACITY)
+        with self.assertRaises(ValueError):
+            capacity_for(0, 60.0)
+
+        history = TagHistory(retention=60.0)
+        history.set_period("Прибор", 2.0)
+        history.set_period("Прибор:4000", 0.1)
+        self.assertEqual(history.capacity("Прибор:4000"), 600)
+        self.assertEqual(history.capacity("Прибор:4002"), 30)
+        self.assertEqual(history.capacity("Другой"), 60)
+
+    def test_set_period_resizes_existing_buffers(self):
+        history = TagHistory(retention=10.0)
+        for i in range(20):
+            history.record("Прибор", {4000: float(i)}, timestamp=float(i))
+        self.assertEqual(len(history.buffer("Прибор:4000")), 10)
+
+        history.set_period("Прибор", 5.0)
+        buffer = history.buffer("Прибор:4000")
+        self.assertEqual(buffer.capacity, 2)
+        self.assertEqual(list(history.last("Прибор:4000")[1]), [18.0, 19.0])
+
+    def test_window(self):
+        history = TagHistory()
+        for i in range(10):
+            history.append("Поток", float(i), timestamp=100.0 + i)
+        self.assertEqual(list(history.window("Поток", 2.5, now=109.0)[1]), [7.0, 8.0, 9.0])
+        self.assertIsNone(history.latest("Нет"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from contextlib import contextmanager
+from config.register_map import MB210_101, ACCESS_READ_ONLY, ACCESS_READ_WRITE
+from register_codec import encode_value
+from tag_scheduler import TagScheduler
+
+
+class _Device:
+    """Образ регистров MB210-101 с периодом измерения по каналам"""
+
+    def __init__(self, periods_ms):
+        self.registers = {}
+        for channel, period in periods_ms.items():
+            field = MB210_101.field("Период измерения входа", channel)
+            self.registers[field.address] = period
+        self.reads = []
+
+    def _read_registers(self, slave_id, address, count=2):
+        self.reads.append((address, count))
+        return [self.registers.get(address + i, 0) for i in range(count)]
+
+
+class TagSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.device = {"name": "MB", "device_id": 1}
+        self.scheduler = TagScheduler(fast_period=1.0, slow_period=60.0)
+        self.tags = self.scheduler.add_fields(self.device, MB210_101)
+
+    def period_fields(self):
+        return [MB210_101.field("Период измерения входа", channel) for channel in range(1, MB210_101.channels + 1)]
+
+    def test_default_period_by_access(self):
+        for tag in self.tags:
+            expected = 60.0 if tag.field.access == ACCESS_READ_WRITE else 1.0
+            self.assertEqual(tag.period, expected)
+
+    def test_autotune_per_channel(self):
+        client = _Device({1: 600, 2: 5000})
+        periods = self.scheduler.autotune(client, self.device, self.period_fields())
+
+        self.assertEqual(periods, {1: 0.6, 2: 5.0})
+        for tag in self.tags:
+            if tag.field.access != ACCESS_READ_ONLY:
+                self.assertEqual(tag.period, 60.0)
+            elif tag.channel == 2:
+                self.assertEqual(tag.period, 5.0)
+            else:
+                # Период канала 1 короче заданного - остается заданный
+                self.assertEqual(tag.period, 1.0)
+        # Регистры периода всех каналов читаются одним блоком
+        self.assertEqual(len(client.reads), 1)
+
+    def test_autotune_follows_instrument(self):
+        self.scheduler.autotune(_Device({3: 10000}), self.device, self.period_fields())
+        self.scheduler.autotune(_Device({3: 2000}), self.device, self.period_fields())
+        tag = next(tag for tag in self.tags if tag.channel == 3 and tag.field.access == ACCESS_READ_ONLY)
+        self.assertEqual(tag.period, 2.0)
+
+    def test_due_tags_are_read_in_one_block(self):
+        client = _Device({})
+        scheduler = TagScheduler()
+        scheduler.add_fields(self.device, MB210_101.channel(1)[:2])
+
+        @contextmanager
+        def lease(device):
+            yield client
+
+        updated = scheduler.poll(lease, now=0.0)
+        self.assertEqual(len(updated), 2)
+        self.assertEqual(client.reads, [(4000, 3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from tcp_client import PyModbusClientTCP
+
+
+class _Result:
+    registers = [0x0000, 0x4120]
+
+    def isError(self):
+        return False
+
+
+class _MemoryTransport:
+    """Транспорт без comm_params, как в benchmarks/logging_overhead.py"""
+
+    def is_socket_open(self):
+        return True
+
+    def read_holding_registers(self, address, count, device_id):
+        return _Result()
+
+
+class _CommParams:
+    timeout_connect = 3.0
+
+
+class _TimedTransport(_MemoryTransport):
+    """Транспорт, запоминающий таймаут, действовавший во время транзакции"""
+
+    def __init__(self):
+        self.comm_params = _CommParams()
+        self.armed = None
+
+    def read_holding_registers(self, address, count, device_id):
+        self.armed = self.comm_params.timeout_connect
+        return _Result()
+
+
+class TcpClientTest(unittest.TestCase):
+
+    def _client(self, transport):
+        client = PyModbusClientTCP("test", timeout=0.25)
+        client.metrics = None
+        client.client = transport
+        return client
+
+    def test_transport_without_comm_params(self):
+        client = self._client(_MemoryTransport())
+        self.assertEqual(client._read_registers(1, 4000, 2), [0x0000, 0x4120])
+
+    def test_response_timeout_is_restored_after_transaction(self):
+        transport = _TimedTransport()
+        client = self._client(transport)
+        client._read_registers(1, 4000, 2)
+
+        self.assertEqual(transport.armed, 0.25)
+        self.assertEqual(transport.comm_params.timeout_connect, 3.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import socket
+import struct
+import threading
+import unittest
+from benchmarks.simulators import TcpDeviceSimulator, Faults
+from exceptions import ModbusExceptionResponse
+from metrics import MetricsRegistry
+from readers.read_planner import ReadPlanner
+from tcp_client import PyModbusClientTCP
+from tcp_pipeline import ModbusTcpPipeline, PipelineRequest
+
+REQUESTS = [(1, 4000, 3), (1, 4003, 3), (1, 4064, 8), (2, 4000, 3)]
+
+MBAP = struct.Struct(">HHHB")
+
+
+class _ReversingServer:
+    """Сервер Modbus TCP: принимает пакет запросов и отвечает в обратном порядке по одному байту
+
+    Чтение возвращает регистры address..address + count - 1
+    """
+
+    def __init__(self, batch):
+        self.batch = batch
+        self.headers = []
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        conn, _ = self.listener.accept()
+        with conn, self.listener:
+            stream = conn.makefile("rb")
+            requests = []
+            for _ in range(self.batch):
+                header = MBAP.unpack(stream.read(MBAP.size))
+                self.headers.append(header)
+                requests.append((header, stream.read(header[2] - 1)))
+
+            reply = bytearray()
+            for (transaction_id, _, _, unit_id), pdu in reversed(requests):
+                _, address, count = struct.unpack(">BHH", pdu)
+                body = struct.pack(f">BB{count}H", 3, 2 * count, *range(address, address + count))
+                reply += MBAP.pack(transaction_id, 0, len(body) + 1, unit_id) + body
+            for byte in reply:
+                conn.sendall(bytes([byte]))
+
+
+class TcpPipelineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.faults = Faults(latency=0.002)
+        self.simulator = TcpDeviceSimulator(self.faults).start()
+        self.addCleanup(self.simulator.stop)
+
+    def _client(self, pipeline_depth):
+        client = PyModbusClientTCP(self.simulator.host, self.simulator.port, pipeline_depth=pipeline_depth, timeout=0.5)
+        client.metrics = MetricsRegistry()
+        client.connect()
+        self.addCleanup(client.disconnect)
+        return client
+
+    def test_pipelined_batch_matches_sequential_reads(self):
+        sequential = self._client(1).read_batch(REQUESTS)
+        pipelined = self._client(4).read_batch(REQUESTS)
+        self.assertEqual(pipelined, sequential)
+
+    def test_pipelined_batch_keeps_bookkeeping(self):
+        client = self._client(4)
+        fields = [{"address": 4000, "data_type": "FLOAT 32"}, {"address": 4002, "data_type": "UINT 16"}]
+        client.enable_cache(ttl=10.0).cache_fields(1, fields, access=None)
+        client.read_batch(REQUESTS)
+
+        timeouts = client.timeouts.snapshot()
+        self.assertEqual(timeouts[1]["samples"], 3)
+        self.assertEqual(timeouts[2]["samples"], 1)
+        requests = sum(device["requests"] for device in client.metrics.snapshot()["devices"])
+        self.assertEqual(requests, len(REQUESTS))
+
+        # Блок из кэша при повторном пакете не запрашивается
+        client.read_batch(REQUESTS)
+        requests = sum(device["requests"] for device in client.metrics.snapshot()["devices"])
+        self.assertEqual(requests, 2 * len(REQUESTS) - 1)
+
+    def test_planner_reads_spans_in_one_batch(self):
+        client = self._client(4)
+        batches = []
+        read_batch = client.read_batch
+        client.read_batch = lambda requests: batches.append(requests) or read_batch(requests)
+
+        fields = [{"address": 4000, "data_type": "FLOAT 32"}, {"address": 4064, "data_type": "INT 16"}]
+        values = ReadPlanner(client).read(1, fields)
+
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(len(batches[0]), 2)
+        self.assertEqual(values, ReadPlanner(self._client(1)).read(1, fields))
+
+    def test_lost_replies_fall_back_to_sequential(self):
+        client = self._client(4)
+        self.faults.drop_rate = 1.0
+        results = client.read_batch(REQUESTS[:2])
+        self.assertEqual(client.pipeline_depth, 1)
+        self.assertTrue(all(isinstance(result, Exception) for result in results))
+        self.assertGreater(client.timeouts.snapshot()[1]["backoff"], 1)
+
+
+class MbapFramingTest(unittest.TestCase):
+
+    def test_request_pdu(self):
+        self.assertEqual(PipelineRequest(1, 0x0FA0, 3).pdu(), bytes.fromhex("030fa00003"))
+        self.assertEqual(PipelineRequest(1, 10, values=[1, 0xABCD]).pdu(), bytes.fromhex("10000a0002040001abcd"))
+
+    def test_parse_replies(self):
+        request = PipelineRequest(5, 100, 2)
+        self.assertEqual(request.parse(bytes.fromhex("0304000100ff")), [1, 255])
+        with self.assertRaises(ModbusExceptionResponse) as context:
+            request.parse(bytes.fromhex("8302"))
+        self.assertEqual(context.exception.exception_code, 2)
+        self.assertIsNone(PipelineRequest(5, 100, values=[1]).parse(bytes.fromhex("1000640001")))
+
+    def test_out_of_order_fragmented_replies(self):
+        requests = [PipelineRequest(unit, address, count) for unit, address, count in [(1, 0, 2), (2, 100, 1), (3, 7, 3)]]
+        server = _ReversingServer(len(requests))
+        pipeline = ModbusTcpPipeline("127.0.0.1", server.port, depth=len(requests), timeout=2.0)
+        self.addCleanup(pipeline.close)
+
+        results = pipeline.execute(requests)
+
+        self.assertEqual(results, [[0, 1], [100], [7, 8, 9]])
+        self.assertEqual([header[0] for header in server.headers], [1, 2, 3])
+        self.assertEqual([header[1:] for header in server.headers], [(0, 6, 1), (0, 6, 2), (0, 6, 3)])
+        self.assertTrue(all(request.elapsed is not None for request in requests))
+
+
+if __name__ == "__main__":
+    unittest.main()
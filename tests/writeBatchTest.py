@@ -0,0 +1,92 @@
+import unittest
+from config.register_map import RegisterMap, ACCESS_READ_WRITE
+from exceptions import ModbusExceptionResponse
+from write_batch import WriteBatch, STATUS_FAILED, STATUS_MISMATCH, STATUS_SKIPPED, STATUS_VERIFIED, STATUS_WRITTEN
+
+SETTINGS = RegisterMap("TEST", [
+    {"name": "Уставка", "access": ACCESS_READ_WRITE, "data_type": "FLOAT 32", "address": 100},
+    {"name": "Режим", "access": ACCESS_READ_WRITE, "data_type": "UINT 16", "address": 102},
+    {"name": "Период", "access": ACCESS_READ_WRITE, "data_type": "UINT 32", "address": 110},
+    {"name": "Измерение", "data_type": "FLOAT 32", "address": 120},
+])
+
+
+class _Device:
+    """Устройство в памяти: регистров вне карты нет (исключение 02)"""
+
+    def __init__(self, fail_writes_at=None, stuck=()):
+        self.registers = {address: 0 for field in SETTINGS for address in range(field.address, field.address + field.width)}
+        self.fail_writes_at = fail_writes_at
+        self.stuck = set(stuck)
+        self.reads = []
+        self.writes = []
+
+    def _check(self, address, count):
+        if any(a not in self.registers for a in range(address, address + count)):
+            raise ModbusExceptionResponse(2, "нет регистра")
+
+    def _read_registers(self, slave_id, address, count=2, use_cache=True):
+        self.reads.append((address, count, use_cache))
+        self._check(address, count)
+        return [self.registers[a] for a in range(address, address + count)]
+
+    def _write_registers(self, slave_id, address, registers):
+        self.writes.append((address, len(registers)))
+        self._check(address, len(registers))
+        if address == self.fail_writes_at:
+            raise ConnectionError("нет ответа")
+        for a, value in enumerate(registers, start=address):
+            if a not in self.stuck:
+                self.registers[a] = value
+        return True
+
+
+class WriteBatchTest(unittest.TestCase):
+
+    def _batch(self, device):
+        return WriteBatch(device, 1, SETTINGS).set("Уставка", 23.5).set("Режим", 3).set("Период", 35)
+
+    def test_adjacent_fields_share_write(self):
+        spans = self._batch(_Device()).plan()
+        self.assertEqual([(span.address, span.count) for span in spans], [(100, 3), (110, 2)])
+
+    def test_verify_reads_only_written_registers(self):
+        device = _Device()
+        results = self._batch(device).commit(verify=True)
+
+        self.assertEqual(device.reads, [(100, 3, False), (110, 2, False)])
+        self.assertTrue(all(result.status == STATUS_VERIFIED for result in results.values()))
+        self.assertEqual(results[110].read_back, 35)
+        self.assertEqual([device.registers[110], device.registers[111]], [35, 0])
+
+    def test_mismatch_is_reported(self):
+        results = self._batch(_Device(stuck=[102])).commit(verify=True)
+        self.assertEqual(results[102].status, STATUS_MISMATCH)
+        self.assertEqual(results[102].read_back, 0)
+        self.assertEqual(results[100].status, STATUS_VERIFIED)
+
+    def test_failed_write_skips_remaining_spans(self):
+        device = _Device(fail_writes_at=100)
+        results = self._batch(device).commit()
+        self.assertEqual(device.writes, [(100, 3)])
+        self.assertEqual([results[a].status for a in (100, 102, 110)], [STATUS_FAILED, STATUS_FAILED, STATUS_SKIPPED])
+        self.assertIsInstance(results[100].error, ConnectionError)
+
+    def test_without_verify(self):
+        device = _Device()
+        results = self._batch(device).commit()
+        self.assertEqual(device.reads, [])
+        self.assertTrue(all(result.status == STATUS_WRITTEN for result in results.values()))
+
+    def test_invalid_fields(self):
+        batch = WriteBatch(_Device(), 1, SETTINGS)
+        with self.assertRaises(ValueError):
+            batch.set("Измерение", 1.0)
+        with self.assertRaises(ValueError):
+            batch.set("Режим", 70000)
+        with self.assertRaises(ValueError):
+            WriteBatch(_Device(), 1).set("Режим", 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import logging
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+from config.register_map import RegisterField, RegisterMap
+from readers.read_planner import ReadPlanner
+from register_codec import encode_value, DEFAULT_WORD_ORDER, DEFAULT_BYTE_ORDER
+from Logger.logger import logged
+
+# Ограничение функции 16 (Write Multiple Registers) по спецификации Modbus
+MAX_WRITE_COUNT = 123
+
+# Итог записи поля
+STATUS_WRITTEN = "written"
+STATUS_VERIFIED = "verified"
+STATUS_MISMATCH = "mismatch"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"
+
+
+class WriteResult:
+    """Итог записи одного поля"""
+    __slots__ = ("field", "value", "status", "error", "read_back")
+
+    def __init__(self, field: RegisterField, value: Any):
+        self.field = field
+        self.value = value
+        self.status = STATUS_SKIPPED
+        self.error: Optional[Exception] = None
+        # Значение, прочитанное с устройства при проверке
+        self.read_back: Any = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status in (STATUS_WRITTEN, STATUS_VERIFIED)
+
+    def __repr__(self) -> str:
+        error = f", error={self.error}" if self.error is not None else ""
+        return f"WriteResult({self.field.name!r}, channel={self.field.channel}, {self.value!r}, {self.status}{error})"
+
+
+class WriteSpan:
+    """Непрерывный блок регистров, записываемый одной транзакцией"""
+    __slots__ = ("address", "registers", "fields")
+
+    def __init__(self, address: int):
+        self.address = address
+        self.registers: List[int] = []
+        self.fields: List[RegisterField] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.registers)
+
+    def __repr__(self) -> str:
+        return f"WriteSpan(address={self.address}, count={self.count}, fields={len(self.fields)})"
+
+
+@logged(name="write_batch", level=logging.DEBUG)
+class WriteBatch:
+    """Пакетная запись полей одного устройства
+
+    Значения кодируются по карте регистров в момент добавления, смежные
+    поля объединяются в блоки функции 16. При verify=True записанные
+    регистры читаются обратно блочным чтением и сравниваются пословно.
+    После первой неудачной транзакции оставшиеся блоки не записываются
+    """
+
+    def __init__(self, client, slave_id: int, register_map: Optional[RegisterMap] = None,
+                 max_count: int = MAX_WRITE_COUNT):
+        if not 1 <= max_count <= MAX_WRITE_COUNT:
+            raise ValueError(f"max_count должен быть в диапазоне 1-{MAX_WRITE_COUNT}, получено: {max_count}")
+
+        self.client = client
+        self.slave_id = slave_id
+        self.register_map = register_map
+        self.max_count = max_count
+        self.data_order = client.data_order(slave_id) if hasattr(client, "data_order") \
+            else (DEFAULT_WORD_ORDER, DEFAULT_BYTE_ORDER)
+        # Адрес поля -> (поле, значение, регистры); повторная запись поля заменяет прежнюю
+        self._pending: Dict[int, Tuple[RegisterField, Any, List[int]]] = {}
+
+    def set(self, name: str, value: Any, channel: int = 1) -> "WriteBatch":
+        """Добавление записи поля карты по имени"""
+        if self.register_map is None:
+            raise ValueError("Для записи по имени поля нужна карта регистров")
+        return self.set_field(self.register_map.field(name, channel), value)
+
+    def set_field(self, field: RegisterField, value: Any) -> "WriteBatch":
+        """Добавление записи поля"""
+        if not field.writable:
+            raise ValueError(f"Поле {field} доступно только для чтения")
+        try:
+            registers = encode_value(field.data_type, value, *self.data_order)
+        except struct.error as e:
+            raise ValueError(f"Значение {value!r} не подходит для поля {field}: {e}") from None
+
+        self._pending[field.address] = (field, value, registers)
+        return self
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def plan(self) -> List[WriteSpan]:
+        """Разбиение записей на блоки смежных регистров"""
+        spans: List[WriteSpan] = []
+        current = None
+        for address in sorted(self._pending):
+            field, _, registers = self._pending[address]
+            if current is None or address != current.address + current.count \
+                    or current.count + len(registers) > self.max_count:
+                current = WriteSpan(address)
+                spans.append(current)
+            current.registers.extend(registers)
+            current.fields.append(field)
+
+        self.log.debug("План записи: %s полей -> %s транзакций", len(self._pending), len(spans))
+        return spans
+
+    def commit(self, verify: bool = False) -> Dict[int, WriteResult]:
+        """Запись всех добавленных полей, результат: адрес поля -> WriteResult"""
+        results = {address: WriteResult(field, value) for address, (field, value, _) in self._pending.items()}
+
+        failed = False
+        for span in self.plan():
+            if failed:
+                break
+            try:
+                self.client._write_registers(self.slave_id, span.address, span.registers)
+                status, error = STATUS_WRITTEN, None
+            except Exception as e:
+                self.log.exception(f"Ошибка записи блока {span} устройства {self.slave_id}: {e}")
+                status, error, failed = STATUS_FAILED, e, True
+            for field in span.fields:
+                results[field.address].status = status
+                results[field.address].error = error
+
+        if verify:
+            self._verify(results)
+
+        self._pending.clear()
+        written = sum(result.ok for result in results.values())
+        self.log.info("commit: записано %s из %s полей устройства %s", written, len(results), self.slave_id)
+        return results
+
+    def _verify(self, results: Dict[int, WriteResult]) -> None:
+        """Обратное чтение записанных полей и пословное сравнение
+
+        use_cache=False: чтение идет на устройство в обход кэша и не
+        присоединяется к чтению, поставленному в очередь шины до записи.
+        Блоки чтения не захватывают регистры между записанными полями: они
+        могут отсутствовать в устройстве и вызвать исключение 02
+        """
+        written = [self._pending[address][0] for address, result in results.items() if result.ok]
+        planner = ReadPlanner(self.client, max_gap=0)
+
+        for span in planner.plan(written):
+            try:
+                words = self.client._read_registers(self.slave_id, span.address, span.count, use_cache=False)
+            except Exception as e:
+                self.log.exception(f"Ошибка проверки блока {span} устройства {self.slave_id}: {e}")
+                for address, _ in span.fields:
+                    results[address].error = e
+                continue
+
+            for address, _ in span.fields:
+                field, _, registers = self._pending[address]
+                offset = address - span.address
+                actual = list(words[offset:offset + field.width])
+                result = results[address]
+                result.read_back = field.decode(actual, *self.data_order)
+                if actual == registers:
+                    result.status = STATUS_VERIFIED
+                else:
+                    result.status = STATUS_MISMATCH
+                    self.log.warning(f"Поле {field}: записано {result.value!r}, прочитано {result.read_back!r}")